@@ -0,0 +1,164 @@
+import time, hashlib, threading
+from collections import OrderedDict
+from functools import wraps
+
+from django.core.cache import cache as backend
+
+
+def get_version_key(*scope):
+    return format('archive_chan_version:%s' % ':'.join([str(part) for part in scope]))
+
+
+def new_version():
+    """Versions start at the current time so a version evicted from the cache is never reused."""
+    return int(time.time() * 1000)
+
+
+def get_version(*scope):
+    """Returns the current version of the data described by the scope, for example ('board', 'g')."""
+    key = get_version_key(*scope)
+    version = backend.get(key)
+
+    if version is None:
+        backend.add(key, new_version(), None)
+        version = backend.get(key, new_version())
+
+    return version
+
+
+def bump_version(*scope):
+    """Changes the version of the data described by the scope. Everything cached with
+    the previous version will not be used anymore.
+    """
+    key = get_version_key(*scope)
+
+    try:
+        backend.incr(key)
+
+    except ValueError:
+        backend.set(key, new_version(), None)
+
+
+def invalidate_boards():
+    """Call this after the list of boards changes."""
+    bump_version('boards')
+
+
+def invalidate_board(board_name):
+    """Call this after threads in the board are added, removed or modified."""
+    bump_version('board', board_name)
+
+
+def invalidate_thread(board_name, thread_number):
+    """Call this after the thread or its posts change. Board pages list the threads
+    so they are invalidated as well.
+    """
+    bump_version('thread', board_name, thread_number)
+    invalidate_board(board_name)
+
+
+def invalidate_tags():
+    """Call this after tags are created, removed, added to threads or removed from them."""
+    bump_version('tags')
+
+
+def invalidate_status():
+    """Call this after an update of a board starts or ends."""
+    bump_version('status')
+
+
+def get_or_set(name, scopes, timeout, function):
+    """Returns the value returned by the function. The value is cached with a key
+    containing the versions of the scopes, for example [('status',)].
+    """
+    versions = '.'.join([str(get_version(*scope)) for scope in scopes])
+    key = format('archive_chan_data:%s:%s' % (name, versions))
+    value = backend.get(key)
+
+    if value is None:
+        value = function()
+        backend.set(key, value, timeout)
+
+    return value
+
+
+def get_scopes(kwargs, scopes):
+    """Creates a list of scopes the view depends on using the url parameters."""
+    scopes = [(scope,) for scope in scopes]
+
+    if 'board' in kwargs:
+        scopes.append(('board', kwargs['board']))
+
+    if 'thread' in kwargs:
+        scopes.append(('thread', kwargs['board'], kwargs['thread']))
+
+    return scopes
+
+
+def get_page_key(request, scopes):
+    versions = '.'.join([str(get_version(*scope)) for scope in scopes])
+    url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return format('archive_chan_page:%s:%s' % (versions, url))
+
+
+def cache_page(timeout, *scopes):
+    """Works like django.views.decorators.cache.cache_page but the cache key contains the versions
+    of the board and the thread the view refers to. Additional scopes the view depends on can be
+    passed as well, for example 'boards'. The pages can be cached for a long time because they are
+    invalidated as soon as the data changes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            key = get_page_key(request, get_scopes(kwargs, scopes))
+            response = backend.get(key)
+
+            if response is None:
+                response = view(request, *args, **kwargs)
+
+                def store(response):
+                    if response.status_code == 200:
+                        backend.set(key, response, timeout)
+
+                # Template responses can't be pickled before they are rendered.
+                if hasattr(response, 'add_post_render_callback'):
+                    response.add_post_render_callback(store)
+                else:
+                    store(response)
+
+            return response
+        return wrapper
+    return decorator
+
+
+class LRUCache:
+    """Small thread safe cache living in the memory of the process. The least recently used
+    entries are removed when the cache is full.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if not key in self.entries:
+                return default
+
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
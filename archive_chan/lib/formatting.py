@@ -0,0 +1,100 @@
+import re
+from functools import lru_cache
+
+from django.utils.html import escape
+from django.utils.text import normalize_newlines
+
+# Increase this number after changing the way the comments are formatted.
+# Stored comments rendered by a different version will be rendered again
+# on the fly and can be updated using archive_chan_render_posts command.
+FORMAT_VERSION = 2
+
+# All elements of the escaped comment are found by this pattern in a single pass.
+# Alternatives are tried in order so >>quote at the beginning of the line is not greentext.
+# Greentext ends at the end of the line unless a code block started in it is still open.
+token_pattern = re.compile(
+    r'(?P<code>\[code\](?P<code_body>.*?)\[/code\])'
+    r'|(?P<quote>&gt;&gt;(?P<post_id>[0-9]+))'
+    r'|(?P<greentext>^&gt;(?:\[code\].*?\[/code\]|[^\n])*)',
+    flags=re.MULTILINE|re.DOTALL
+)
+
+greentext_prefix = '&gt;'
+
+
+@lru_cache(maxsize=256)
+def get_highlight_pattern(phrase):
+    """Returns a compiled pattern matching the escaped phrase. The phrase is escaped so it
+    is always treated literally. HTML entities are matched separately to avoid breaking them.
+    """
+    return re.compile(
+        r'(?P<phrase>%s)|&[#0-9a-zA-Z]+;' % re.escape(escape(phrase)),
+        flags=re.IGNORECASE
+    )
+
+
+def highlight_match(match):
+    if match.group('phrase') is None:
+        return match.group(0)
+
+    return format('<span class="highlight">%s</span>' % match.group('phrase'))
+
+
+def highlight(text, phrase):
+    """Highlights the phrase in the escaped text."""
+    if not phrase:
+        return text
+
+    return get_highlight_pattern(phrase).sub(highlight_match, text)
+
+
+def tokenize(text, start, end, phrase):
+    """Formats the part of the escaped text between start and end."""
+    parts = []
+    position = start
+
+    for match in token_pattern.finditer(text, start, end):
+        parts.append(highlight(text[position:match.start()], phrase))
+
+        # >>quote
+        if match.lastgroup == 'quote':
+            parts.append('<a class="post-link" post_id="%s">%s</a>' % (
+                match.group('post_id'),
+                highlight(match.group('quote'), phrase)
+            ))
+
+        # >le meme arrows, they can contain quotes.
+        elif match.lastgroup == 'greentext':
+            parts.append('<span class="greentext">%s%s</span>' % (
+                highlight(greentext_prefix, phrase),
+                tokenize(text, match.start() + len(greentext_prefix), match.end(), phrase)
+            ))
+
+        # [code]i++;[/code]
+        elif match.lastgroup == 'code':
+            parts.append('<pre><code>%s</code></pre>' % (
+                tokenize(text, match.start('code_body'), match.end('code_body'), phrase)
+            ))
+
+        position = match.end()
+
+    parts.append(highlight(text[position:end], phrase))
+
+    return ''.join(parts)
+
+
+def format_post(text, phrase=None):
+    """Formats an already escaped post comment."""
+    # Most comments contain nothing to format.
+    if not '&gt;' in text and not '[code]' in text:
+        return highlight(text, phrase)
+
+    return tokenize(text, 0, len(text), phrase)
+
+
+def render_comment(comment, phrase=None):
+    """Returns HTML displayed in place of a raw post comment. The phrase will be highlighted."""
+    text = format_post(normalize_newlines(escape(comment)), phrase)
+
+    # Generated markup never contains newlines so they can be replaced at the end.
+    return text.replace('\n', '<br />')
@@ -0,0 +1,95 @@
+"""Saving and tagging many threads at once. Every operation executes a constant number
+of queries no matter how many threads are selected. Bulk statements don't send the model
+signals so the caches are invalidated here.
+"""
+from django.db import transaction
+
+from archive_chan.models import Thread, Tag, TagToThread, FrozenThread
+import archive_chan.lib.cache as cache
+
+
+def get_threads(board_name, numbers=None, parameters=None):
+    """Selects the threads with the given numbers or the threads displayed in the board view
+    with the given filter parameters (a dictionary like request.GET). Returns a list of
+    (id, number) pairs.
+    """
+    from archive_chan.views.core import BoardView
+
+    if numbers is not None:
+        queryset = Thread.objects.filter(board=board_name, number__in=numbers)
+    else:
+        queryset = Thread.objects.filter(board=board_name, replies__gte=1)
+        queryset = BoardView.filter_threads(queryset, parameters or {})
+
+    return list(queryset.order_by().values_list('id', 'number').distinct())
+
+
+def invalidate(board_name, threads):
+    """Like calling cache.invalidate_thread for every thread but the board is invalidated once."""
+    for thread_id, thread_number in threads:
+        cache.bump_version('thread', board_name, thread_number)
+
+    cache.invalidate_board(board_name)
+
+
+def set_saved(board_name, threads, state):
+    """Saves or unsaves the threads. Frozen threads are thawed when unsaved because
+    only saved threads can be frozen. Returns the number of modified threads.
+    """
+    ids = [thread_id for thread_id, thread_number in threads]
+
+    if not ids:
+        return 0
+
+    with transaction.atomic():
+        modified = Thread.objects.filter(id__in=ids).exclude(saved=state).update(saved=state)
+
+        if not state:
+            for frozen in FrozenThread.objects.filter(thread__in=ids):
+                frozen.thaw()
+
+    invalidate(board_name, threads)
+
+    return modified
+
+
+def add_tag(board_name, threads, tag_name):
+    """Adds the tag to the threads which don't have it yet. Returns the number of tagged threads."""
+    ids = [thread_id for thread_id, thread_number in threads]
+
+    if not ids:
+        return 0
+
+    with transaction.atomic():
+        tag, created = Tag.objects.get_or_create(name=tag_name)
+        tagged = set(TagToThread.objects.filter(tag=tag, thread__in=ids).values_list('thread', flat=True))
+        TagToThread.objects.bulk_create([TagToThread(thread_id=thread_id, tag=tag) for thread_id in ids if not thread_id in tagged])
+
+    invalidate(board_name, threads)
+    cache.invalidate_tags()
+
+    return len(ids) - len(tagged)
+
+
+def remove_tag(board_name, threads, tag_name):
+    """Removes the tag from the threads. Returns the number of modified threads."""
+    ids = [thread_id for thread_id, thread_number in threads]
+
+    if not ids:
+        return 0
+
+    tag = Tag.objects.filter(name=tag_name).first()
+
+    if tag is None:
+        return 0
+
+    # Queryset delete would fetch the objects to send the signals.
+    removed = Thread.objects.execute(
+        'DELETE FROM {tagtothread} WHERE tag_id = %s AND thread_id IN %s',
+        [tag.pk, tuple(ids)]
+    )
+
+    invalidate(board_name, threads)
+    cache.invalidate_tags()
+
+    return removed
@@ -4,8 +4,10 @@ from django.utils.timezone import utc
 from django.db import transaction
 from django.core.files.base import ContentFile
 
-from archive_chan.models import Thread, Post, Image, Trigger, TagToThread, Update
+from archive_chan.models import Thread, Post, Image, Trigger, TagToThread, Update, FrozenThread
 from archive_chan.settings import AppSettings
+from archive_chan.lib.stats import add_post_to_hourly_stats, remove_posts_from_hourly_stats
+import archive_chan.lib.cache as cache
 
 class ScrapError(Exception):
     pass
@@ -174,7 +176,7 @@ class Triggers:
             if action[0] == 'save' and not thread.saved:
                 thread.saved = True
                 thread.auto_saved = True
-                thread.save()
+                thread.save(update_fields=['saved', 'auto_saved'])
 
             if action[0] == 'add_tag':
                 if not TagToThread.objects.filter(thread=thread, tag=action[1]).exists():
@@ -418,7 +420,7 @@ class ThreadScraper(Scraper):
                 thread.save()
 
             # Save post.
-            post = Post.objects.create(
+            post = Post(
                 thread=thread,
                 number=post_data.number,
                 time=post_data.time,
@@ -429,6 +431,8 @@ class ThreadScraper(Scraper):
                 subject=post_data.subject,
                 comment=post_data.comment
             )
+            post.render_comment()
+            post.save()
 
             # Save image.
             if not post_data.filename is None:
@@ -439,6 +443,13 @@ class ThreadScraper(Scraper):
 
                 image.save()
 
+            add_post_to_hourly_stats(
+                self.board,
+                post.time,
+                has_image=not post_data.filename is None,
+                is_main=post.number == thread.number
+            )
+
             self.triggers.handle(post_data, thread)
 
         self.stats.add('added_posts', 1)
@@ -461,6 +472,10 @@ class ThreadScraper(Scraper):
         try:
             thread = Thread.objects.get(board=self.board, number=self.thread_info.number)
 
+            # Frozen threads are not supposed to change.
+            if FrozenThread.objects.filter(thread=thread).exists():
+                return
+
             if not self.should_be_updated(thread):
                 return
 
@@ -496,8 +511,12 @@ class ThreadScraper(Scraper):
                     self.add_post(post_data, thread)
 
             # Remove posts which don't exist in the thread.
-            for post in thread.post_set.all():
-                if not post.number in post_numbers:
+            removed_posts = thread.post_set.exclude(number__in=post_numbers)
+
+            if removed_posts.exists():
+                remove_posts_from_hourly_stats(removed_posts)
+
+                for post in removed_posts:
                     self.stats.add('removed_posts', 1)
                     self.modified = True
                     post.delete()
@@ -506,6 +525,10 @@ class ThreadScraper(Scraper):
             sys.stderr.write('%s\m' % (e))
             self.modified = True
 
+        # Cached pages which display this thread are outdated now.
+        if self.modified:
+            cache.invalidate_thread(self.board.name, self.thread_info.number)
+
 
 class ThreadScraperThread(ThreadScraper, threading.Thread):
     """This is simply a ThreadScraper which is supposed to run as a thread."""
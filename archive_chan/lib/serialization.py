@@ -0,0 +1,108 @@
+"""Conversion of the archived data to JSON in the format used by the 4chan API."""
+import os, json, calendar
+
+from archive_chan.models import Thread, Image
+
+
+def dumps(data):
+    return json.dumps(data, separators=(',', ':'))
+
+
+def get_timestamp(time):
+    return calendar.timegm(time.utctimetuple())
+
+
+def get_image(post):
+    """Returns the image of the post fetched with select_related or None."""
+    try:
+        return post.image
+    except Image.DoesNotExist:
+        return None
+
+
+def get_post_data(post, thread):
+    """Returns a dictionary describing the post. Empty fields are omitted like in the 4chan API."""
+    data = {
+        'no': post.number,
+        'resto': 0 if post.number == thread.number else thread.number,
+        'time': get_timestamp(post.time),
+    }
+
+    for key, value in (('name', post.name), ('trip', post.trip), ('email', post.email), ('country', post.country), ('sub', post.subject)):
+        if value:
+            data[key] = value
+
+    if post.comment:
+        data['com'] = post.get_comment_html()
+
+    image = get_image(post)
+
+    if image is not None:
+        name, extension = os.path.splitext(os.path.basename(image.image.name))
+        data['tim'] = int(name) if name.isdigit() else name
+        data['ext'] = extension
+        data['filename'] = image.original_name
+
+    # 4chan does not count the first post.
+    if post.number == thread.number:
+        data['replies'] = max(thread.replies - 1, 0)
+        data['images'] = max(thread.images - (1 if image is not None else 0), 0)
+
+    return data
+
+
+def iter_thread_json(thread, chunk_size):
+    """Yields parts of a JSON document with all posts of the thread: {"posts": [...]}."""
+    yield '{"posts":['
+
+    first = True
+
+    for chunk in thread.iter_post_chunks(chunk_size):
+        parts = [dumps(get_post_data(post, thread)) for post in chunk]
+
+        if not first:
+            yield ','
+
+        yield ','.join(parts)
+        first = False
+
+    yield ']}'
+
+
+def get_thread_list_data(row):
+    number, last_reply, replies, images = row
+
+    return {
+        'no': number,
+        'last_modified': get_timestamp(last_reply) if last_reply else 0,
+        'replies': max(replies - 1, 0),
+        'images': images,
+    }
+
+
+def iter_thread_list_json(board_name, chunk_size):
+    """Yields parts of a JSON document listing the threads of the board like threads.json: [{"page": 1, "threads": [...]}]."""
+    yield '[{"page":1,"threads":['
+
+    queryset = Thread.objects.filter(board=board_name).order_by('-number').values_list('number', 'last_reply', 'replies', 'images')
+    last_number = None
+
+    while True:
+        chunk_queryset = queryset
+
+        if last_number is not None:
+            chunk_queryset = chunk_queryset.filter(number__lt=last_number)
+
+        chunk = list(chunk_queryset[:chunk_size])
+
+        if not chunk:
+            break
+
+        if last_number is not None:
+            yield ','
+
+        yield ','.join([dumps(get_thread_list_data(row)) for row in chunk])
+
+        last_number = chunk[-1][0]
+
+    yield ']}]'
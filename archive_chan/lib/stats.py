@@ -1,12 +1,194 @@
 import datetime
 
 from django.utils.timezone import utc
-from django.db.models import Count, Min, Max
+from django.db.models import Count, Min, Max, Sum, F
 
-from archive_chan.models import Board, Thread, Post
+from archive_chan.models import Board, Thread, Post, HourlyStats, FrozenThread, Update, UpdateDailyStats
 from archive_chan.settings import AppSettings
 
 
+def get_hour(time):
+    """Returns the beginning of the hour used as a key in HourlyStats."""
+    return time.replace(minute=0, second=0, microsecond=0)
+
+
+def get_hour_select():
+    """Returns a select which truncates the post time to the hour."""
+    return {'hour': 'date_trunc(\'hour\', "%s"."time")' % Post._meta.db_table}
+
+
+def update_hourly_stats(board, hour, posts=0, image_posts=0, threads=0):
+    """Adds the values to the counters stored in the database. Values can be negative."""
+    row, created = HourlyStats.objects.get_or_create(board=board, hour=hour)
+
+    HourlyStats.objects.filter(pk=row.pk).update(
+        posts=F('posts') + posts,
+        image_posts=F('image_posts') + image_posts,
+        threads=F('threads') + threads
+    )
+
+
+def add_post_to_hourly_stats(board, time, has_image, is_main):
+    """Call this after adding a post."""
+    update_hourly_stats(
+        board,
+        get_hour(time),
+        posts=1,
+        image_posts=1 if has_image else 0,
+        threads=1 if is_main else 0
+    )
+
+
+def get_hourly_counts(posts_queryset):
+    """Groups the posts by board and hour. Returns a dictionary with the counters."""
+    counts = {}
+
+    posts = posts_queryset.extra(get_hour_select()).values('thread__board', 'hour').order_by().annotate(
+        posts=Count('id'),
+        image_posts=Count('image')
+    )
+
+    for entry in posts:
+        counts[(entry['thread__board'], entry['hour'])] = {
+            'posts': entry['posts'],
+            'image_posts': entry['image_posts'],
+            'threads': 0,
+        }
+
+    threads = posts_queryset.filter(number=F('thread__number')).extra(get_hour_select()).values('thread__board', 'hour').order_by().annotate(
+        threads=Count('id')
+    )
+
+    for entry in threads:
+        counts[(entry['thread__board'], entry['hour'])]['threads'] = entry['threads']
+
+    return counts
+
+
+def remove_posts_from_hourly_stats(posts_queryset):
+    """Call this before deleting the posts. Counters are decreased with one query per hour."""
+    for (board_name, hour), values in get_hourly_counts(posts_queryset).items():
+        HourlyStats.objects.filter(board=board_name, hour=hour).update(
+            posts=F('posts') - values['posts'],
+            image_posts=F('image_posts') - values['image_posts'],
+            threads=F('threads') - values['threads']
+        )
+
+
+def add_frozen_threads_to_hourly_counts(counts, board):
+    """Adds the posts archived in the frozen threads of the board to the counters."""
+    for frozen in FrozenThread.objects.filter(thread__board=board).select_related('thread'):
+        for post in frozen.get_posts():
+            key = (frozen.thread.board_id, get_hour(post.time))
+            values = counts.setdefault(key, {'posts': 0, 'image_posts': 0, 'threads': 0})
+
+            values['posts'] += 1
+            if getattr(post, Post.image.cache_name) is not None:
+                values['image_posts'] += 1
+            if post.is_main():
+                values['threads'] += 1
+
+
+def rebuild_hourly_stats(board):
+    """Recreates the statistics of the board from scratch."""
+    counts = get_hourly_counts(Post.objects.filter(thread__board=board))
+    add_frozen_threads_to_hourly_counts(counts, board)
+
+    HourlyStats.objects.filter(board=board).delete()
+    HourlyStats.objects.bulk_create([
+        HourlyStats(board_id=board_name, hour=hour, **values) for (board_name, hour), values in counts.items()
+    ])
+
+    return len(counts)
+
+
+def rebuild_update_stats(board):
+    """Recreates the last update of the board and the daily statistics of the days in which it was updated."""
+    board.last_update = Update.objects.filter(board=board).order_by('-start').first()
+    Board.objects.filter(pk=board.pk).update(last_update=board.last_update)
+
+    dates = Update.objects.filter(board=board, status=Update.COMPLETED).exclude(end=None).extra({
+        'date': 'date("end")'
+    }).values_list('date', flat=True).order_by().distinct()
+
+    for date in dates:
+        UpdateDailyStats.recalculate(date)
+
+    return len(dates)
+
+
+def get_hourly_stats(board_name, timespan):
+    """Statistics of a board or of all boards read from HourlyStats."""
+    context = {}
+
+    queryset = HourlyStats.objects
+
+    if board_name is not None:
+        queryset = queryset.filter(board=board_name)
+
+    totals = queryset.aggregate(
+        total_posts=Sum('posts'),
+        total_image_posts=Sum('image_posts'),
+        total_threads=Sum('threads'),
+        last_hour=Max('hour')
+    )
+
+    # Base this on the last hour with any posts like the statistics calculated from the posts.
+    if totals['last_hour'] is not None:
+        timespan_time = totals['last_hour'] - datetime.timedelta(hours=timespan)
+        hours = queryset.filter(hour__gt=timespan_time).values('hour').order_by('hour').annotate(amount=Sum('posts'))
+    else:
+        hours = []
+
+    posts = [{'date': entry['hour'].date(), 'hour': entry['hour'].hour, 'amount': entry['amount']} for entry in hours]
+    context['chart_data'] = get_posts_chart_data(posts)
+
+    # Posts.
+    context['total_posts'] = totals['total_posts'] or 0
+    context['total_image_posts'] = totals['total_image_posts'] or 0
+
+    context['recent_posts'] = sum([entry['amount'] for entry in posts])
+    context['recent_posts_timespan'] = timespan
+
+    # Threads.
+    context['total_threads'] = totals['total_threads'] or 0
+
+    return context
+
+
+def get_frozen_thread_stats(frozen):
+    """Statistics of a frozen thread calculated from the archived posts."""
+    context = {}
+
+    posts = frozen.get_posts()
+
+    # Same as in the thread mode of get_stats.
+    timespan = (posts[-1].time - posts[0].time).total_seconds() / 3600
+    timespan_time = posts[-1].time - datetime.timedelta(hours=timespan)
+    recent_posts = [post for post in posts if post.time > timespan_time]
+
+    hours = {}
+    for post in recent_posts:
+        key = (post.time.date(), post.time.hour)
+        hours[key] = hours.get(key, 0) + 1
+
+    context['chart_data'] = get_posts_chart_data([
+        {'date': date, 'hour': hour, 'amount': amount} for (date, hour), amount in sorted(hours.items())
+    ])
+
+    # Posts.
+    context['total_posts'] = len(posts)
+    context['total_image_posts'] = len([post for post in posts if getattr(post, Post.image.cache_name) is not None])
+
+    context['recent_posts'] = len(recent_posts)
+    context['recent_posts_timespan'] = timespan
+
+    # Threads.
+    context['total_threads'] = 1
+
+    return context
+
+
 def get_stats(**kwargs):
     board_name = kwargs.get('board', None)
     thread_number = kwargs.get('thread', None)
@@ -18,6 +200,17 @@ def get_stats(**kwargs):
     # (saved threads which do not get deleted would alter the results).
     timespan = AppSettings.get('RECENT_POSTS_AGE')
 
+    # Boards and the entire archive use the precalculated statistics.
+    if thread_number is None:
+        return get_hourly_stats(board_name, timespan)
+
+    # Posts of the frozen threads are not in the database.
+    if board_name and thread_number:
+        frozen = FrozenThread.objects.filter(thread__board=board_name, thread__number=thread_number).first()
+
+        if frozen is not None:
+            return get_frozen_thread_stats(frozen)
+
     queryset_posts = Post.objects
     queryset_threads = Thread.objects
 
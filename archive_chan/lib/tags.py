@@ -0,0 +1,83 @@
+import threading
+
+from django.db.models import Count
+
+from archive_chan.models import Tag
+import archive_chan.lib.cache as cache
+
+
+class TagIndex:
+    """Tag names indexed by their substrings. Works like a case insensitive
+    name__icontains filter but the results are ordered by the number of threads
+    with the tag and no queries are executed.
+    """
+    gram_length = 3
+
+    def __init__(self, tags):
+        """Tags are (name, number of threads) pairs."""
+        self.names = [name for name, threads in sorted(tags, key=lambda tag: (-tag[1], tag[0]))]
+        self.lower_names = [name.lower() for name in self.names]
+
+        # Substrings up to gram_length characters long mapped to the positions of the names.
+        # Positions are appended in order so every list is sorted by popularity.
+        self.grams = {}
+
+        for position, name in enumerate(self.lower_names):
+            for gram in self.get_grams(name, self.gram_length, True):
+                self.grams.setdefault(gram, []).append(position)
+
+    def get_grams(self, text, length, shorter):
+        """Returns a set of the substrings of the given length. Shorter substrings are included if requested."""
+        lengths = range(1, length + 1) if shorter else [length]
+        return set([text[i:i + l] for l in lengths for i in range(len(text) - l + 1)])
+
+    def suggest(self, query, limit):
+        """Returns at most limit names containing the query, the most popular first."""
+        query = query.lower()
+
+        if not query:
+            return self.names[:limit]
+
+        if len(query) <= self.gram_length:
+            return [self.names[position] for position in self.grams.get(query, [])[:limit]]
+
+        # Check the names which contain the least common substring of the query.
+        candidates = min(
+            [self.grams.get(gram, []) for gram in self.get_grams(query, self.gram_length, False)],
+            key=len
+        )
+
+        results = []
+
+        for position in candidates:
+            if query in self.lower_names[position]:
+                results.append(self.names[position])
+
+                if len(results) >= limit:
+                    break
+
+        return results
+
+
+index = None
+index_version = None
+index_lock = threading.Lock()
+
+
+def get_index():
+    """Returns the index of this process. It is rebuilt after the tags change."""
+    global index, index_version
+
+    version = cache.get_version('tags')
+
+    with index_lock:
+        if index is None or index_version != version:
+            tags = Tag.objects.annotate(threads=Count('tagtothread')).values_list('name', 'threads')
+            index = TagIndex(list(tags))
+            index_version = version
+
+        return index
+
+
+def suggest(query, limit=5):
+    return get_index().suggest(query, limit)
@@ -0,0 +1,120 @@
+import re, timeit
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.utils.html import escape
+from django.utils.text import normalize_newlines
+
+from archive_chan.models import Post
+import archive_chan.lib.formatting as formatting
+
+
+def legacy_formatpost(text):
+    """The formatpost filter as it was implemented before the tokenizer."""
+    text = re.sub(
+        r'(?P<text>&gt;&gt;(?P<post_id>[0-9]+))',
+        r'<a class="post-link" post_id="\g<post_id>">\g<text></a>',
+        text
+    )
+
+    text = re.sub(
+        r'^(&gt;.*)$',
+        r'<span class="greentext">\1</span>',
+        text,
+        flags=re.MULTILINE
+    )
+
+    text = re.sub(
+        r'\[code\](.*?)\[\/code\]',
+        r'<pre><code>\1</code></pre>',
+        text,
+        flags=re.MULTILINE|re.DOTALL
+    )
+
+    return text
+
+
+def legacy_highlight(text, phrase):
+    """The highlight filter as it was implemented before the tokenizer."""
+    return re.sub(
+        r'(' + phrase + ')',
+        r'<span class="highlight">\1</span>',
+        text,
+        flags=re.IGNORECASE
+    )
+
+
+def legacy_render_comment(comment, phrase=None):
+    """Equivalent of the filter chain previously used in the templates."""
+    text = escape(comment)
+
+    if phrase is not None:
+        text = legacy_highlight(text, phrase)
+
+    return normalize_newlines(legacy_formatpost(text)).replace('\n', '<br />')
+
+
+sample_comments = [
+    '>>123456\nI agree.',
+    '>implying\n>>654321 this\nplain text line',
+    'Look at this:\n[code]for (i = 0; i < 10; i++) {\n    printf("%d", i);\n}[/code]\nNice, right?',
+    'Just a long line of text without any special formatting, repeated. ' * 10,
+]
+
+
+class Command(BaseCommand):
+    args = ''
+    help = 'Compare the performance of the comment formatter with the previously used filters.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--iterations',
+            action="store",
+            type="int",
+            dest='iterations',
+            default=1000,
+            help='How many times each set of comments is formatted.',
+        ),
+        make_option(
+            '--posts',
+            action="store",
+            type="int",
+            dest='posts',
+            default=0,
+            help='Use that many comments from the database instead of the built in samples.',
+        ),
+        make_option(
+            '--phrase',
+            action="store",
+            dest='phrase',
+            default='the',
+            help='Phrase highlighted in the search benchmark.',
+        ),
+    )
+
+    def handle(self, *args, **options):
+        if options['posts'] > 0:
+            comments = list(Post.objects.order_by('-id').values_list('comment', flat=True)[:options['posts']])
+        else:
+            comments = sample_comments
+
+        phrase = options['phrase']
+
+        benchmarks = (
+            ('thread', lambda: [legacy_render_comment(comment) for comment in comments],
+                       lambda: [formatting.render_comment(comment) for comment in comments]),
+            ('search', lambda: [legacy_render_comment(comment, phrase) for comment in comments],
+                       lambda: [formatting.render_comment(comment, phrase) for comment in comments]),
+        )
+
+        print('Comments: %s Iterations: %s' % (len(comments), options['iterations']))
+
+        for name, legacy, current in benchmarks:
+            legacy_time = timeit.timeit(legacy, number=options['iterations'])
+            current_time = timeit.timeit(current, number=options['iterations'])
+
+            print('%s Legacy: %.3f sec Current: %.3f sec Speedup: %.2fx' % (
+                name,
+                legacy_time,
+                current_time,
+                legacy_time / current_time if current_time > 0 else 0
+            ))
@@ -0,0 +1,199 @@
+import datetime, random, sys
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import utc
+
+from archive_chan.models import Board, Thread, Post, Image, get_sharded_path
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    args = ''
+    help = 'Show query plans of the most frequent archive queries with and without the indexes declared in the models. Optionally generate a synthetic board first. PostgreSQL only. WARNING: comparing the plans drops the indexes inside a transaction which is rolled back later, it locks the tables so do not run it on a live database.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--board',
+            action="store",
+            dest='board',
+            default='benchmark',
+            help='Board used in the queries. Synthetic data is generated in this board.',
+        ),
+        make_option(
+            '--generate',
+            action="store",
+            type="int",
+            dest='generate',
+            default=0,
+            help='Generate that many posts in the board before running the queries.',
+        ),
+        make_option(
+            '--posts-per-thread',
+            action="store",
+            type="int",
+            dest='posts_per_thread',
+            default=300,
+            help='Number of posts in each generated thread.',
+        ),
+        make_option(
+            '--compare',
+            action="store_true",
+            dest='compare',
+            help='Also show the plans without the indexes.',
+        ),
+    )
+
+    def get_audit(self, board):
+        """Returns the audited queries: (description, queryset, (model, columns) of the index which should be used)."""
+        thread = Thread.objects.filter(board=board).order_by('-replies').first()
+        image = Image.objects.filter(post__thread__board=board).order_by('-id').first()
+
+        now = datetime.datetime.now().replace(tzinfo=utc)
+        threshold = now - datetime.timedelta(hours=board.store_threads_for or 48)
+        thread_number = thread.number if thread else 0
+        image_name = image.image.name if image else ''
+        thumbnail_name = image.thumbnail.name if image else ''
+
+        return [
+            (
+                'Board view: newest threads',
+                Thread.objects.filter(board=board, replies__gte=1).order_by('-last_reply')[:20],
+                (Thread, ('board_id', 'last_reply')),
+            ),
+            (
+                'archive_chan_remove_old_threads: expired threads',
+                Thread.objects.filter(board=board, saved=False, last_reply__lt=threshold),
+                (Thread, ('board_id', 'saved', 'last_reply')),
+            ),
+            (
+                'Thread view: chunk of posts',
+                Post.objects.filter(thread=thread, number__gt=0).order_by('number')[:100],
+                (Post, ('thread_id', 'number')),
+            ),
+            (
+                'Statistics: posts in a time window',
+                Post.objects.filter(time__gt=threshold).order_by('time'),
+                (Post, ('time',)),
+            ),
+            (
+                'Search: newest posts',
+                Post.objects.filter(thread__board=board).order_by('-time')[:20],
+                (Post, ('time',)),
+            ),
+            (
+                'archive_chan_remove_orphaned_files: image lookup',
+                Image.objects.filter(image=image_name)[:1],
+                (Image, ('image',)),
+            ),
+            (
+                'archive_chan_remove_orphaned_files: thumbnail lookup',
+                Image.objects.filter(thumbnail=thumbnail_name)[:1],
+                (Image, ('thumbnail',)),
+            ),
+        ]
+
+    def get_index_names(self, model, columns):
+        """Finds the names of the indexes created for the columns, including pattern ops indexes."""
+        cursor = connection.cursor()
+        cursor.execute('SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s', [model._meta.db_table])
+
+        names = []
+        for name, definition in cursor.fetchall():
+            definition = definition.replace(' varchar_pattern_ops', '').replace(' text_pattern_ops', '')
+            if definition.endswith('(%s)' % ', '.join(columns)):
+                names.append(name)
+
+        return names
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        cursor = connection.cursor()
+        cursor.execute('EXPLAIN ANALYZE ' + sql, params)
+        return '\n'.join(['    %s' % row[0] for row in cursor.fetchall()])
+
+    def show_plans(self, audit, title):
+        print('\n===== %s =====' % title)
+
+        for description, queryset, index in audit:
+            print('\n%s\n%s' % (description, self.explain(queryset)))
+
+    def generate(self, board, amount, posts_per_thread):
+        """Inserts synthetic threads, posts and images. Signals are not used to make this fast."""
+        now = datetime.datetime.now().replace(tzinfo=utc)
+        number = (Post.objects.filter(thread__board=board).order_by('-number').values_list('number', flat=True).first() or 0) + 1
+        generated = 0
+
+        while generated < amount:
+            with transaction.atomic():
+                size = min(posts_per_thread, amount - generated)
+                first_time = now - datetime.timedelta(hours=random.randint(0, 24 * 60))
+                times = [first_time + datetime.timedelta(seconds=i * 30) for i in range(size)]
+
+                thread = Thread.objects.create(
+                    board=board,
+                    number=number,
+                    saved=random.random() < 0.1,
+                    replies=size,
+                    images=len(range(0, size, 3)),
+                    first_reply=times[0],
+                    last_reply=times[-1]
+                )
+
+                Post.objects.bulk_create([
+                    Post(thread=thread, number=number + i, time=times[i], comment='Synthetic post %s' % (number + i))
+                    for i in range(size)
+                ])
+
+                post_ids = Post.objects.filter(thread=thread).order_by('number').values_list('id', 'number')
+                Image.objects.bulk_create([
+                    Image(
+                        post_id=post_id,
+                        original_name='image',
+                        image=get_sharded_path('post_images', '%s.jpg' % post_number),
+                        thumbnail=get_sharded_path('post_thumbnails', '%s.jpg' % post_number)
+                    )
+                    for i, (post_id, post_number) in enumerate(post_ids) if i % 3 == 0
+                ])
+
+            number += size
+            generated += size
+            sys.stdout.write('\rGenerated posts: %s' % generated)
+            sys.stdout.flush()
+
+        print('')
+
+        cursor = connection.cursor()
+        for model in (Thread, Post, Image):
+            cursor.execute('ANALYZE %s' % connection.ops.quote_name(model._meta.db_table))
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('This command requires PostgreSQL.')
+
+        board, created = Board.objects.get_or_create(name=options['board'], defaults={'active': False})
+
+        if options['generate'] > 0:
+            self.generate(board, options['generate'], options['posts_per_thread'])
+
+        audit = self.get_audit(board)
+
+        self.show_plans(audit, 'With indexes')
+
+        if options['compare']:
+            try:
+                with transaction.atomic():
+                    cursor = connection.cursor()
+
+                    for description, queryset, (model, columns) in audit:
+                        for name in self.get_index_names(model, columns):
+                            cursor.execute('DROP INDEX %s' % connection.ops.quote_name(name))
+
+                    self.show_plans(audit, 'Without indexes')
+                    raise Rollback()
+
+            except Rollback:
+                pass
@@ -0,0 +1,394 @@
+import os, datetime, json, csv, gzip
+from multiprocessing import Pool
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Min, Max
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import utc
+
+from archive_chan.models import Thread, Post, Image, TagToThread, FrozenThread
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+# Exported models: name -> (model, columns, board lookup, time lookup).
+# Columns are passed to values_list.
+EXPORTS = {
+    'thread': (
+        Thread,
+        ('id', 'board', 'number', 'saved', 'auto_saved', 'replies', 'images', 'first_reply', 'last_reply'),
+        'board',
+        None,
+    ),
+    'post': (
+        Post,
+        ('id', 'thread', 'number', 'time', 'name', 'trip', 'email', 'country', 'subject', 'comment'),
+        'thread__board',
+        'time',
+    ),
+    'image': (
+        Image,
+        ('id', 'post', 'original_name', 'image', 'thumbnail'),
+        'post__thread__board',
+        'post__time',
+    ),
+    'tagtothread': (
+        TagToThread,
+        ('id', 'thread', 'tag__name', 'automatically_added', 'save_time'),
+        'thread__board',
+        None,
+    ),
+}
+
+
+def get_field(model, column):
+    """Follows the lookup and returns the field which holds the value."""
+    for name in column.split('__'):
+        field = model._meta.get_field(name)
+
+        if field.rel is not None:
+            model = field.rel.to
+            field = model._meta.pk
+
+    return field
+
+
+class NdjsonWriter:
+    extension = 'ndjson.gz'
+
+    def __init__(self, path, model, columns):
+        self.file = gzip.open(path, 'wt')
+        self.columns = columns
+
+    def default(self, value):
+        if isinstance(value, datetime.datetime):
+            return value.isoformat()
+        raise TypeError(repr(value))
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(dict(zip(self.columns, row)), default=self.default, separators=(',', ':')))
+            self.file.write('\n')
+
+    def close(self):
+        self.file.close()
+
+
+class CsvWriter:
+    extension = 'csv.gz'
+
+    def __init__(self, path, model, columns):
+        self.file = gzip.open(path, 'wt', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    extension = 'parquet'
+
+    types = {
+        'AutoField': 'int64',
+        'IntegerField': 'int64',
+        'SmallIntegerField': 'int64',
+        'BooleanField': 'bool_',
+        'FloatField': 'float64',
+    }
+
+    def __init__(self, path, model, columns):
+        self.columns = columns
+        self.schema = pyarrow.schema([(column, self.get_type(get_field(model, column))) for column in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression='snappy')
+
+    def get_type(self, field):
+        internal_type = field.get_internal_type()
+
+        if internal_type == 'DateTimeField':
+            return pyarrow.timestamp('us', tz='UTC')
+
+        if internal_type in self.types:
+            return getattr(pyarrow, self.types[internal_type])()
+
+        return pyarrow.string()
+
+    def write(self, rows):
+        data = dict([(column, [row[i] for row in rows]) for i, column in enumerate(self.columns)])
+        self.writer.write_table(pyarrow.Table.from_pydict(data, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {
+    'ndjson': NdjsonWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def get_queryset(name, board, since, until):
+    model, columns, board_lookup, time_lookup = EXPORTS[name]
+    queryset = model.objects.all()
+
+    if board is not None:
+        queryset = queryset.filter(**{board_lookup: board})
+
+    # Threads and tags are selected by the time of the posts in the thread.
+    if time_lookup is None:
+        prefix = '' if model is Thread else 'thread__'
+
+        if since is not None:
+            queryset = queryset.filter(**{prefix + 'last_reply__gte': since})
+        if until is not None:
+            queryset = queryset.filter(**{prefix + 'first_reply__lt': until})
+
+    else:
+        if since is not None:
+            queryset = queryset.filter(**{time_lookup + '__gte': since})
+        if until is not None:
+            queryset = queryset.filter(**{time_lookup + '__lt': until})
+
+    return queryset
+
+
+def iter_frozen_rows(name, board, since, until):
+    """Yields the post or image rows of the frozen threads. Those posts are not in the post
+    and image tables, the rows have the same columns as the rows read from the tables.
+    """
+    model, columns, board_lookup, time_lookup = EXPORTS[name]
+    queryset = FrozenThread.objects.order_by('pk')
+
+    if board is not None:
+        queryset = queryset.filter(thread__board=board)
+    if since is not None:
+        queryset = queryset.filter(thread__last_reply__gte=since)
+    if until is not None:
+        queryset = queryset.filter(thread__first_reply__lt=until)
+
+    last_pk = 0
+
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:100])
+
+        if not chunk:
+            break
+
+        last_pk = chunk[-1].pk
+
+        for frozen in chunk:
+            for post_data in frozen.iter_data():
+                time = parse_datetime(post_data['time'])
+
+                if (since is not None and time < since) or (until is not None and time >= until):
+                    continue
+
+                if model is Post:
+                    values = dict(post_data, thread=frozen.pk, time=time)
+                elif post_data['image'] is not None:
+                    values = dict(post_data['image'], post=post_data['id'])
+                else:
+                    continue
+
+                yield tuple([values[column] for column in columns])
+
+
+def export(task):
+    """Executed by the workers. Writes one file, returns (file name, number of rows)."""
+    name, file_name, board, since, until, format, chunk_size, frozen = task
+    model, columns, board_lookup, time_lookup = EXPORTS[name]
+
+    writer = WRITERS[format](file_name, model, columns)
+    rows = 0
+    last_id = 0
+
+    try:
+        if frozen:
+            chunk = []
+
+            for row in iter_frozen_rows(name, board, since, until):
+                chunk.append(row)
+
+                if len(chunk) >= chunk_size:
+                    writer.write(chunk)
+                    rows += len(chunk)
+                    chunk = []
+
+            if chunk:
+                writer.write(chunk)
+                rows += len(chunk)
+
+            return (file_name, rows)
+
+        queryset = get_queryset(name, board, since, until).order_by('id').values_list(*columns)
+
+        while True:
+            chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+
+            if not chunk:
+                break
+
+            writer.write(chunk)
+            rows += len(chunk)
+            last_id = chunk[-1][0]
+
+    finally:
+        writer.close()
+
+    return (file_name, rows)
+
+
+def get_months(since, until):
+    """Returns (start, end) pairs of the months overlapping the range."""
+    months = []
+    month = since.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    while month < until:
+        if month.month == 12:
+            next_month = month.replace(year=month.year + 1, month=1)
+        else:
+            next_month = month.replace(month=month.month + 1)
+
+        months.append((max(month, since), min(next_month, until)))
+        month = next_month
+
+    return months
+
+
+class Command(BaseCommand):
+    args = '<output_directory>'
+    help = 'Export threads, posts, images and tags for analytics. Posts and images are written to one file per month by parallel workers, posts and images of the frozen threads are written to separate files. Parquet files are created if pyarrow is installed, gzipped CSV files otherwise.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--board',
+            action="store",
+            dest='board',
+            help='Export only this board.',
+        ),
+        make_option(
+            '--since',
+            action="store",
+            dest='since',
+            help='Export only the posts created after this date (YYYY-MM-DD).',
+        ),
+        make_option(
+            '--until',
+            action="store",
+            dest='until',
+            help='Export only the posts created before this date (YYYY-MM-DD).',
+        ),
+        make_option(
+            '--format',
+            action="store",
+            dest='format',
+            default='auto',
+            help='ndjson, parquet or csv. Default: parquet if available, csv otherwise.',
+        ),
+        make_option(
+            '--jobs',
+            action="store",
+            type="int",
+            dest='jobs',
+            default=4,
+            help='Number of files written at the same time.',
+        ),
+        make_option(
+            '--chunk-size',
+            action="store",
+            type="int",
+            dest='chunk_size',
+            default=10000,
+            help='Number of rows fetched with one query.',
+        ),
+    )
+
+    def parse_date(self, value):
+        if value is None:
+            return None
+
+        try:
+            return datetime.datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=utc)
+        except ValueError:
+            raise CommandError('Invalid date, use YYYY-MM-DD.')
+
+    def get_tasks(self, directory, board, since, until, format, chunk_size):
+        extension = WRITERS[format].extension
+        tasks = []
+
+        for name in ('thread', 'tagtothread'):
+            tasks.append((name, os.path.join(directory, '%s.%s' % (name, extension)), board, since, until, format, chunk_size, False))
+
+        # Posts of the frozen threads are only stored in the archive.
+        for name in ('post', 'image'):
+            tasks.append((name, os.path.join(directory, '%s-frozen.%s' % (name, extension)), board, since, until, format, chunk_size, True))
+
+        # Split the large tables by month.
+        bounds = get_queryset('post', board, since, until).aggregate(first=Min('time'), last=Max('time'))
+
+        if bounds['first'] is not None:
+            for start, end in get_months(since or bounds['first'], until or bounds['last'] + datetime.timedelta(seconds=1)):
+                for name in ('post', 'image'):
+                    file_name = os.path.join(directory, '%s-%s.%s' % (name, start.strftime('%Y-%m'), extension))
+                    tasks.append((name, file_name, board, start, end, format, chunk_size, False))
+
+        return tasks
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('Specify the output directory.')
+
+        format = options['format']
+
+        if format == 'auto':
+            format = 'parquet' if pyarrow is not None else 'csv'
+
+        if not format in WRITERS:
+            raise CommandError('Unknown format %s.' % format)
+
+        if format == 'parquet' and pyarrow is None:
+            raise CommandError('Parquet requires pyarrow.')
+
+        directory = args[0]
+        os.makedirs(directory, exist_ok=True)
+
+        processing_start = datetime.datetime.now()
+
+        tasks = self.get_tasks(
+            directory,
+            options['board'],
+            self.parse_date(options['since']),
+            self.parse_date(options['until']),
+            format,
+            options['chunk_size']
+        )
+
+        # The workers must not share the connection of this process.
+        connection.close()
+
+        pool = Pool(options['jobs'])
+        total_rows = 0
+
+        try:
+            for file_name, rows in pool.imap_unordered(export, tasks):
+                total_rows += rows
+                print('%s Rows: %s' % (file_name, rows))
+
+            pool.close()
+
+        finally:
+            pool.terminate()
+            pool.join()
+
+        processing_time = datetime.datetime.now() - processing_start
+
+        print('%s Files: %s Rows: %s Time passed: %s sec' % (datetime.datetime.now(), len(tasks), total_rows, processing_time.seconds))
@@ -0,0 +1,100 @@
+import datetime
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import utc
+
+from archive_chan.models import Thread, Post, FrozenThread
+import archive_chan.lib.cache as cache
+
+class Command(BaseCommand):
+    args = ''
+    help = 'Move the posts of old saved threads to compressed archives. Posts of the frozen threads are deleted from the database which keeps the tables used by the board listings, search and statistics small. Frozen threads are still displayed but they can not be searched. Unsaving a thread restores its posts.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--days',
+            action="store",
+            type="int",
+            dest='days',
+            default=30,
+            help='Freeze threads without replies for that many days.',
+        ),
+        make_option(
+            '--board',
+            action="store",
+            dest='board',
+            help='Freeze only the threads in this board.',
+        ),
+        make_option(
+            '--batch-size',
+            action="store",
+            type="int",
+            dest='batch_size',
+            default=10,
+            help='Number of threads frozen in one transaction.',
+        ),
+        make_option(
+            '--dry-run',
+            action="store_true",
+            dest='dry_run',
+            help='Only count the threads which would be frozen.',
+        ),
+        make_option(
+            '--progress',
+            action="store_true",
+            dest='progress',
+            help='Display progress.',
+        ),
+    )
+
+    def handle(self, *args, **options):
+        processing_start = datetime.datetime.now()
+
+        time_threshold = datetime.datetime.now().replace(tzinfo=utc) - datetime.timedelta(days=options['days'])
+        queryset = Thread.objects.filter(saved=True, last_reply__lt=time_threshold, frozenthread=None).order_by('id')
+
+        if options['board'] is not None:
+            queryset = queryset.filter(board=options['board'])
+
+        if options['dry_run']:
+            print('%s Threads to freeze: %s Posts: %s' % (
+                datetime.datetime.now(),
+                queryset.count(),
+                Post.objects.filter(thread__in=queryset).count()
+            ))
+            return
+
+        frozen_threads = 0
+        frozen_posts = 0
+        last_id = 0
+
+        while True:
+            threads = list(queryset.filter(id__gt=last_id).select_related('board')[:options['batch_size']])
+
+            if not threads:
+                break
+
+            last_id = threads[-1].id
+
+            with transaction.atomic():
+                for thread in threads:
+                    posts = thread.post_set.count()
+
+                    if posts == 0:
+                        continue
+
+                    FrozenThread.freeze(thread)
+
+                    frozen_threads += 1
+                    frozen_posts += posts
+
+            for thread in threads:
+                cache.invalidate_thread(thread.board.name, thread.number)
+
+            if options['progress']:
+                print('Frozen threads: %s Posts: %s' % (frozen_threads, frozen_posts))
+
+        processing_time = datetime.datetime.now() - processing_start
+
+        print('%s Frozen threads: %s Posts: %s Time passed: %s sec' % (datetime.datetime.now(), frozen_threads, frozen_posts, processing_time.seconds))
@@ -0,0 +1,286 @@
+import os, datetime, sys, json, gzip, tarfile, itertools
+from multiprocessing import Pool
+from optparse import make_option
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from archive_chan.models import Board, Thread, Post, Image, FrozenThread, fs, image_upload_to, thumbnail_upload_to
+from archive_chan.lib.scraper import PostData, Triggers
+from archive_chan.lib.stats import get_hour, update_hourly_stats
+import archive_chan.lib.cache as cache
+
+
+# Set in each worker process by init_worker.
+worker = {}
+
+
+def init_worker(board_name, media_directory):
+    worker['board'] = Board.objects.get(name=board_name)
+    worker['media_directory'] = media_directory
+    worker['triggers'] = Triggers()
+
+
+def save_file(source_name, name, upload_to):
+    """Copies the file from the media directory to the storage. Returns the new name or None if the file does not exist."""
+    path = os.path.join(worker['media_directory'], source_name)
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'rb') as f:
+        return fs.save(upload_to(None, name), File(f))
+
+
+def import_thread(thread_json):
+    """Adds the posts of the thread which are not in the database yet. Returns the number of added posts."""
+    board = worker['board']
+    posts_data = [PostData(post_json) for post_json in thread_json['posts']]
+
+    if not posts_data:
+        return 0
+
+    thread_number = posts_data[0].number
+
+    try:
+        thread = Thread.objects.get(board=board, number=thread_number)
+
+        if FrozenThread.objects.filter(thread=thread).exists():
+            return 0
+
+        existing = set(thread.post_set.values_list('number', flat=True))
+
+    except Thread.DoesNotExist:
+        thread = Thread(board=board, number=thread_number)
+        existing = set()
+
+    posts_data = [post_data for post_data in posts_data if not post_data.number in existing]
+
+    if not posts_data:
+        return 0
+
+    # Copy the files first like the scraper does. Files left after a failed transaction
+    # are removed by archive_chan_remove_orphaned_files.
+    files = {}
+    if worker['media_directory'] is not None:
+        for post_data in posts_data:
+            if post_data.filename is not None:
+                image_name = '%s%s' % (post_data.filename, post_data.extension)
+                image = save_file(image_name, image_name, image_upload_to)
+                thumbnail = save_file('%ss.jpg' % post_data.filename, '%s.jpg' % post_data.filename, thumbnail_upload_to)
+
+                if image is not None and thumbnail is not None:
+                    files[post_data.number] = (image, thumbnail)
+
+    with transaction.atomic():
+        if not thread.pk:
+            thread.save()
+
+        posts = []
+        for post_data in posts_data:
+            post = Post(
+                thread=thread,
+                number=post_data.number,
+                time=post_data.time,
+                name=post_data.name,
+                trip=post_data.trip,
+                email=post_data.email,
+                country=post_data.country,
+                subject=post_data.subject,
+                comment=post_data.comment
+            )
+            post.render_comment()
+            posts.append(post)
+
+        Post.objects.bulk_create(posts)
+
+        # bulk_create does not set the primary keys.
+        post_ids = dict(thread.post_set.filter(number__in=files.keys()).values_list('number', 'id'))
+        originals = dict([(post_data.number, post_data.original_filename) for post_data in posts_data])
+
+        Image.objects.bulk_create([
+            Image(post_id=post_ids[number], original_name=originals[number] or '', image=image, thumbnail=thumbnail)
+            for number, (image, thumbnail) in files.items()
+        ])
+
+        # Signals are not sent by bulk_create.
+        Thread.objects.add_posts(
+            thread.pk,
+            posts=len(posts),
+            images=len(files),
+            first_reply=min([post.time for post in posts]),
+            last_reply=max([post.time for post in posts])
+        )
+
+        hours = {}
+        for post in posts:
+            values = hours.setdefault(get_hour(post.time), {'posts': 0, 'image_posts': 0, 'threads': 0})
+            values['posts'] += 1
+            if post.number in files:
+                values['image_posts'] += 1
+            if post.number == thread.number:
+                values['threads'] += 1
+
+        for hour, values in hours.items():
+            update_hourly_stats(board, hour, **values)
+
+        for post_data in posts_data:
+            worker['triggers'].handle(post_data, thread)
+
+    cache.invalidate_thread(board.name, thread.number)
+
+    return len(posts)
+
+
+def import_item(item):
+    """Executed by the workers. Returns (name, added posts, error message)."""
+    name, path, content = item
+
+    try:
+        if content is None:
+            with open(path, 'rb') as f:
+                content = f.read()
+
+        if name.endswith('.gz'):
+            content = gzip.decompress(content)
+
+        return (name, import_thread(json.loads(content.decode('utf-8'))), None)
+
+    except Exception as e:
+        return (name, 0, '%s: %s' % (name, e))
+
+
+class Command(BaseCommand):
+    args = '<board> <path path ...>'
+    help = 'Import threads from JSON files in the format used by the 4chan API. Paths can point to directories or tarballs containing .json or .json.gz files. Posts which are already in the database are skipped so the import can be repeated.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--media',
+            action="store",
+            dest='media',
+            help='Directory containing the images and thumbnails named like on 4chan. Images are not imported without it.',
+        ),
+        make_option(
+            '--jobs',
+            action="store",
+            type="int",
+            dest='jobs',
+            default=4,
+            help='Number of worker processes.',
+        ),
+        make_option(
+            '--checkpoint',
+            action="store",
+            dest='checkpoint',
+            help='File in which the imported files are recorded. Those files are skipped when the command is run again.',
+        ),
+        make_option(
+            '--progress',
+            action="store_true",
+            dest='progress',
+            help='Display progress.',
+        ),
+    )
+
+    def is_thread_file(self, name):
+        return name.endswith('.json') or name.endswith('.json.gz')
+
+    def iter_items(self, path):
+        """Yields (name, path, content) of the thread files. Files from the directories are
+        read by the workers, files from the tarballs are read here.
+        """
+        if os.path.isdir(path):
+            for directory, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+
+                for filename in sorted(filenames):
+                    if self.is_thread_file(filename):
+                        file_path = os.path.join(directory, filename)
+                        yield (file_path, file_path, None)
+
+        elif tarfile.is_tarfile(path):
+            with tarfile.open(path) as tar:
+                for member in tar:
+                    if member.isfile() and self.is_thread_file(member.name):
+                        yield ('%s:%s' % (path, member.name), None, tar.extractfile(member).read())
+
+        else:
+            raise CommandError('%s is neither a directory nor a tarball.' % path)
+
+    def handle(self, *args, **options):
+        if len(args) < 2:
+            raise CommandError('Specify the board and at least one path.')
+
+        board_name = args[0]
+
+        if not Board.objects.filter(name=board_name).exists():
+            raise CommandError('Board %s does not exist.' % board_name)
+
+        processing_start = datetime.datetime.now()
+
+        done = set()
+        if options['checkpoint'] is not None and os.path.exists(options['checkpoint']):
+            with open(options['checkpoint']) as f:
+                done = set(line.rstrip('\n') for line in f)
+
+        items = (item for path in args[1:] for item in self.iter_items(path) if not item[0] in done)
+
+        imported_files = 0
+        failed_files = 0
+        added_posts = 0
+
+        # The workers must not share the connection of this process.
+        connection.close()
+
+        pool = Pool(options['jobs'], init_worker, (board_name, options['media']))
+        checkpoint = open(options['checkpoint'], 'a') if options['checkpoint'] is not None else None
+
+        # Pool.imap would consume the whole generator at once and keep the contents of all
+        # files from the tarballs in memory. Items are submitted in bounded windows instead.
+        chunk_size = 10
+        window_size = options['jobs'] * 2 * chunk_size
+
+        try:
+            while True:
+                window = list(itertools.islice(items, window_size))
+
+                if not window:
+                    break
+
+                for name, posts, error in pool.imap_unordered(import_item, window, chunk_size):
+                    if error is not None:
+                        failed_files += 1
+                        sys.stderr.write('%s\n' % error)
+                        continue
+
+                    imported_files += 1
+                    added_posts += posts
+
+                    if checkpoint is not None:
+                        checkpoint.write('%s\n' % name)
+                        checkpoint.flush()
+
+                    if options['progress'] and imported_files % 100 == 0:
+                        print('Imported files: %s Added posts: %s Failed files: %s' % (imported_files, added_posts, failed_files))
+
+            pool.close()
+
+        finally:
+            pool.terminate()
+            pool.join()
+
+            if checkpoint is not None:
+                checkpoint.close()
+
+        cache.invalidate_board(board_name)
+
+        processing_time = datetime.datetime.now() - processing_start
+
+        print('%s Imported files: %s Added posts: %s Failed files: %s Time passed: %s sec' % (
+            datetime.datetime.now(),
+            imported_files,
+            added_posts,
+            failed_files,
+            processing_time.seconds
+        ))
@@ -1,16 +1,69 @@
-from datetime import datetime
-import sys, re
+from datetime import datetime, timedelta
+import sys, re, gzip
+from multiprocessing import Pool
 from optparse import make_option
 
 from django.core.management.base import BaseCommand, CommandError
 from django.utils.timezone import utc
 
-from archive_chan.models import Update, Board
+from archive_chan.models import Update, UpdateDailyStats, Board
 from archive_chan.settings import AppSettings
+import archive_chan.lib.cache as cache
+
+clean_pattern = re.compile(r'[^a-zA-Z0-9\.\-: ]')
+
+def parse_line(line, used_threads):
+    """Returns a dictionary with the Update fields. Board is returned as a name.
+    Raises ValueError or IndexError if the line can not be parsed.
+    """
+    line = clean_pattern.sub('', line.strip()).split()
+
+    date = datetime.strptime('%s %s' % (line[0], line[1]), '%Y-%m-%d %H:%M:%S.%f').replace(tzinfo=utc)
+    total_time = float(line[6])
+
+    # The line is printed after the update ends.
+    return {
+        'board': line[3].replace('/',''),
+        'status': Update.COMPLETED,
+        'start': date - timedelta(seconds=total_time),
+        'end': date,
+        'total_time': total_time,
+        'wait_time': total_time * float(line[8]) / 100,
+        'download_time': total_time * float(line[10]) / 100,
+        'processed_threads': int(line[15]),
+        'added_posts': int(line[18]),
+        'removed_posts': int(line[21]),
+        'downloaded_images': int(line[24]),
+        'downloaded_thumbnails': int(line[27]),
+        'downloaded_threads': int(line[30]),
+        'used_threads': used_threads,
+    }
+
+def parse_file(args):
+    """Executed by the workers. Returns (file path, parsed lines, errors)."""
+    file_path, used_threads = args
+    entries = []
+    errors = []
+
+    try:
+        opener = gzip.open if file_path.endswith('.gz') else open
+
+        with opener(file_path, 'rt') as f:
+            for line in f:
+                try:
+                    entries.append(parse_line(line, used_threads))
+
+                except (ValueError, IndexError) as e:
+                    errors.append('%s' % e)
+
+    except (OSError, EOFError) as e:
+        errors.append('%s' % e)
+
+    return (file_path, entries, errors)
 
 class Command(BaseCommand):
     args = '<file_path file_path ...>'
-    help = 'Imports data from scraper log files.'
+    help = 'Imports data from scraper log files. Files can be compressed with gzip. Updates which are already in the database are skipped.'
     option_list = BaseCommand.option_list + (
         make_option(
             '-t',
@@ -19,58 +72,103 @@ class Command(BaseCommand):
             dest='used_threads',
             help='Specify the number of threads to set in the database. Log does not contain that data.',
         ),
+        make_option(
+            '--jobs',
+            action="store",
+            type="int",
+            dest='jobs',
+            default=4,
+            help='Number of files parsed at the same time.',
+        ),
+        make_option(
+            '--batch-size',
+            action="store",
+            type="int",
+            dest='batch_size',
+            default=1000,
+            help='Number of updates inserted with one query.',
+        ),
     )
 
-    def handle(self, *args, **options):
-        boards = {}
+    def update_rollups(self, boards, dates):
+        """Does the work of the Update post_save signal for the imported updates."""
+        for board_name in boards:
+            last_update = Update.objects.filter(board=board_name).order_by('-start').first()
+            Board.objects.filter(name=board_name).update(last_update=last_update)
+
+        for date in dates:
+            UpdateDailyStats.recalculate(date)
 
+        if boards:
+            cache.invalidate_status()
+
+    def handle(self, *args, **options):
         if options['used_threads'] is None:
-            raise ValueError('Specify the number of used threads.')
-
-        options['used_threads'] = int(options['used_threads'])
-
-        sucessful = 0
-        failed = 0
-        added = 0
-
-        for file_path in args:
-            try: 
-                with open(file_path) as f:
-                    for line in f:
-                        try:
-                            line = re.sub('[^a-zA-Z0-9\.\-: ]', '', line.strip()).split()
-
-                            data = {
-                                'date': datetime.strptime( '%s %s' % (line[0], line[1]), '%Y-%m-%d %H:%M:%S.%f').replace(tzinfo=utc),
-                                'board': line[3].replace('/',''),
-                                'total_time': float(line[6]),
-                                'wait_time': float(line[6]) * float(line[8]) / 100,
-                                'download_time': float(line[6]) * float(line[10]) / 100,
-                                'processed_threads': int(line[15]),
-                                'added_posts': int(line[18]),
-                                'removed_posts': int(line[21]),
-                                'downloaded_images': int(line[24]),
-                                'downloaded_thumbnails': int(line[27]),
-                                'downloaded_threads': int(line[30]),
-                                'used_threads': options['used_threads'],
-                            }
-
-                            if not data['board'] in boards:
-                                boards[data['board']] = Board.objects.get(name=data['board'])
-                            data['board'] = boards[data['board']]
-
-                            update, created = Update.objects.get_or_create(**data)
-
-                            if created:
-                                added += 1
-
-                            sucessful += 1
-
-                            print('Successful: %s Added: %s Failed %s' % (sucessful, added, failed))
-
-                        except (ValueError, IndexError) as e:
-                            failed += 1
-                            sys.stderr.write('%s\n' % e)
-
-            except FileNotFoundError as e:
-                sys.stderr.write('%s\n' % e)
+            raise CommandError('Specify the number of used threads.')
+
+        used_threads = int(options['used_threads'])
+
+        boards = set(Board.objects.values_list('name', flat=True))
+        existing = set(Update.objects.values_list('board', 'end'))
+
+        total_added = 0
+        total_failed = 0
+
+        # Bulk inserts don't send post_save, the rollups are updated at the end.
+        updated_boards = set()
+        updated_dates = set()
+
+        # Workers only parse the files, they never use the database.
+        pool = Pool(options['jobs'])
+
+        try:
+            for file_path, entries, errors in pool.imap(parse_file, [(file_path, used_threads) for file_path in args]):
+                added = 0
+                duplicates = 0
+                failed = len(errors)
+                batch = []
+
+                for error in errors:
+                    sys.stderr.write('%s: %s\n' % (file_path, error))
+
+                for data in entries:
+                    if not data['board'] in boards:
+                        failed += 1
+                        sys.stderr.write('%s: board %s does not exist\n' % (file_path, data['board']))
+                        continue
+
+                    key = (data['board'], data['end'])
+
+                    if key in existing:
+                        duplicates += 1
+                        continue
+
+                    existing.add(key)
+                    updated_boards.add(data['board'])
+                    updated_dates.add(data['end'].date())
+
+                    data['board_id'] = data.pop('board')
+                    batch.append(Update(**data))
+
+                    if len(batch) >= options['batch_size']:
+                        Update.objects.bulk_create(batch)
+                        added += len(batch)
+                        batch = []
+
+                Update.objects.bulk_create(batch)
+                added += len(batch)
+
+                total_added += added
+                total_failed += failed
+
+                print('%s Added: %s Duplicates: %s Failed: %s' % (file_path, added, duplicates, failed))
+
+            pool.close()
+
+        finally:
+            pool.terminate()
+            pool.join()
+
+        self.update_rollups(updated_boards, updated_dates)
+
+        print('Files: %s Added: %s Failed: %s' % (len(args), total_added, total_failed))
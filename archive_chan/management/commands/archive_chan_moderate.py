@@ -0,0 +1,95 @@
+import datetime
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from archive_chan.models import Board
+import archive_chan.lib.moderation as moderation
+
+class Command(BaseCommand):
+    args = '<board>'
+    help = 'Save, unsave or tag many threads at once. Threads are selected by their numbers or by a filter which is a query string of the board view, for example "saved=no&last_reply=week".'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--threads',
+            action="store",
+            dest='threads',
+            help='Comma separated list of thread numbers.',
+        ),
+        make_option(
+            '--filter',
+            action="store",
+            dest='filter',
+            help='Select the threads displayed in the board view with these parameters. Empty filter selects all threads.',
+        ),
+        make_option(
+            '--save',
+            action="store_true",
+            dest='save',
+            help='Save the threads.',
+        ),
+        make_option(
+            '--unsave',
+            action="store_true",
+            dest='unsave',
+            help='Unsave the threads. Frozen threads are restored.',
+        ),
+        make_option(
+            '--add-tag',
+            action="store",
+            dest='add_tag',
+            help='Add this tag to the threads.',
+        ),
+        make_option(
+            '--remove-tag',
+            action="store",
+            dest='remove_tag',
+            help='Remove this tag from the threads.',
+        ),
+        make_option(
+            '--dry-run',
+            action="store_true",
+            dest='dry_run',
+            help='Only count the selected threads.',
+        ),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('Specify the board.')
+
+        board_name = args[0]
+
+        if not Board.objects.filter(name=board_name).exists():
+            raise CommandError('Board %s does not exist.' % board_name)
+
+        if (options['threads'] is None) == (options['filter'] is None):
+            raise CommandError('Specify either the threads or the filter.')
+
+        if options['save'] and options['unsave']:
+            raise CommandError('Threads can not be saved and unsaved at once.')
+
+        if options['threads'] is not None:
+            try:
+                numbers = [int(number) for number in options['threads'].split(',') if number]
+            except ValueError:
+                raise CommandError('Invalid thread number.')
+
+            threads = moderation.get_threads(board_name, numbers=numbers)
+        else:
+            threads = moderation.get_threads(board_name, parameters=QueryDict(options['filter']))
+
+        print('%s Selected threads: %s' % (datetime.datetime.now(), len(threads)))
+
+        if options['dry_run']:
+            return
+
+        if options['save'] or options['unsave']:
+            print('Saved state changed: %s' % moderation.set_saved(board_name, threads, bool(options['save'])))
+
+        if options['add_tag']:
+            print('Tag added: %s' % moderation.add_tag(board_name, threads, options['add_tag']))
+
+        if options['remove_tag']:
+            print('Tag removed: %s' % moderation.remove_tag(board_name, threads, options['remove_tag']))
@@ -0,0 +1,158 @@
+import datetime
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.timezone import utc
+
+from archive_chan.models import Thread, Post, Image
+
+class Command(BaseCommand):
+    args = ''
+    help = 'Partition the post table by month on PostgreSQL 12 or newer. Without --convert the command creates the partitions for the next months and should be run periodically, for example together with archive_chan_remove_old_threads. Statements are only printed unless --apply is used. Queries which filter the posts by time (statistics, search) read only the matching partitions, the ORM works without changes.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--convert',
+            action="store_true",
+            dest='convert',
+            help='Convert the existing post table to a partitioned table. WARNING: this copies all posts and locks the table.',
+        ),
+        make_option(
+            '--months-ahead',
+            action="store",
+            type="int",
+            dest='months_ahead',
+            default=3,
+            help='Number of future months for which the partitions are created.',
+        ),
+        make_option(
+            '--apply',
+            action="store_true",
+            dest='apply',
+            help='Execute the statements instead of printing them.',
+        ),
+    )
+
+    def quote(self, name):
+        return connection.ops.quote_name(name)
+
+    def fetch_value(self, sql, params=[]):
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def is_partitioned(self):
+        return self.fetch_value(
+            'SELECT relkind FROM pg_class WHERE relname = %s AND pg_table_is_visible(oid)',
+            [Post._meta.db_table]
+        ) == 'p'
+
+    def iter_months(self, start, end):
+        """Yields the first days of the months from start to end inclusive."""
+        month = datetime.date(start.year, start.month, 1)
+
+        while month <= end:
+            yield month
+            month = self.next_month(month)
+
+    def next_month(self, month):
+        if month.month == 12:
+            return datetime.date(month.year + 1, 1, 1)
+        return datetime.date(month.year, month.month + 1, 1)
+
+    def get_partition_sql(self, month):
+        """Statement creating the partition with the posts from the given month."""
+        table = Post._meta.db_table
+
+        return 'CREATE TABLE IF NOT EXISTS %s PARTITION OF %s FOR VALUES FROM (\'%s\') TO (\'%s\')' % (
+            self.quote('%s_y%sm%02d' % (table, month.year, month.month)),
+            self.quote(table),
+            month.isoformat(),
+            self.next_month(month).isoformat()
+        )
+
+    def get_partitions_sql(self, start, months_ahead):
+        now = datetime.datetime.now().replace(tzinfo=utc).date()
+        end = now
+        for i in range(months_ahead):
+            end = self.next_month(end)
+
+        return [self.get_partition_sql(month) for month in self.iter_months(start, end)]
+
+    def get_convert_sql(self, months_ahead):
+        """Statements which replace the post table with a partitioned copy."""
+        table = Post._meta.db_table
+        old_table = '%s_unpartitioned' % table
+
+        first_post = self.fetch_value('SELECT MIN("time") FROM %s' % self.quote(table))
+        start = first_post.date() if first_post else datetime.datetime.now().date()
+
+        sequence = self.fetch_value('SELECT pg_get_serial_sequence(%s, %s)', [table, 'id'])
+
+        # Primary keys of partitioned tables must contain the partition key so the posts can no
+        # longer be referenced by a foreign key. Django does not need that constraint.
+        cursor = connection.cursor()
+        cursor.execute(
+            'SELECT conname FROM pg_constraint WHERE contype = \'f\' AND conrelid = %s::regclass AND confrelid = %s::regclass',
+            [Image._meta.db_table, table]
+        )
+        foreign_keys = [row[0] for row in cursor.fetchall()]
+
+        statements = ['ALTER TABLE %s DROP CONSTRAINT %s' % (self.quote(Image._meta.db_table), self.quote(name)) for name in foreign_keys]
+        statements += [
+            'ALTER TABLE %s RENAME TO %s' % (self.quote(table), self.quote(old_table)),
+            'CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS) PARTITION BY RANGE ("time")' % (self.quote(table), self.quote(old_table)),
+            # Posts outside of the created partitions land here instead of failing.
+            'CREATE TABLE %s PARTITION OF %s DEFAULT' % (self.quote('%s_default' % table), self.quote(table)),
+        ]
+        statements += self.get_partitions_sql(start, months_ahead)
+        statements += [
+            'INSERT INTO %s SELECT * FROM %s' % (self.quote(table), self.quote(old_table)),
+            'ALTER SEQUENCE %s OWNED BY NONE' % sequence,
+            'DROP TABLE %s' % self.quote(old_table),
+            'ALTER SEQUENCE %s OWNED BY %s.%s' % (sequence, self.quote(table), self.quote('id')),
+            'ALTER TABLE %s ADD PRIMARY KEY ("id", "time")' % self.quote(table),
+            # LIKE does not copy the foreign keys, partitioned tables can reference other tables.
+            'ALTER TABLE %s ADD FOREIGN KEY (%s) REFERENCES %s (%s) DEFERRABLE INITIALLY DEFERRED' % (
+                self.quote(table),
+                self.quote(Post._meta.get_field('thread').column),
+                self.quote(Thread._meta.db_table),
+                self.quote(Thread._meta.pk.column)
+            ),
+        ]
+        # Indexes created on the parent table are created on every partition.
+        statements += [sql.rstrip(';') for sql in connection.creation.sql_indexes_for_model(Post, no_style())]
+        statements.append('ANALYZE %s' % self.quote(table))
+
+        return statements
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('This command requires PostgreSQL.')
+
+        if options['convert']:
+            if self.is_partitioned():
+                raise CommandError('The post table is already partitioned.')
+
+            statements = self.get_convert_sql(options['months_ahead'])
+
+        else:
+            if not self.is_partitioned():
+                raise CommandError('The post table is not partitioned, use --convert first.')
+
+            statements = self.get_partitions_sql(datetime.datetime.now().date(), options['months_ahead'])
+
+        if not options['apply']:
+            for sql in statements:
+                print('%s;' % sql)
+            return
+
+        with transaction.atomic():
+            cursor = connection.cursor()
+
+            for sql in statements:
+                cursor.execute(sql)
+
+        print('%s Executed statements: %s' % (datetime.datetime.now(), len(statements)))
@@ -0,0 +1,40 @@
+import datetime
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from archive_chan.models import Board
+from archive_chan.lib.stats import rebuild_hourly_stats, rebuild_update_stats
+import archive_chan.lib.cache as cache
+
+class Command(BaseCommand):
+    args = ''
+    help = 'Recalculate the hourly statistics from the posts and the statistics displayed on the status page from the updates. Use this if the statistics are incorrect, for example after importing or manually deleting data.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--board',
+            action="store",
+            dest='board',
+            help='Rebuild the statistics only for this board.',
+        ),
+    )
+
+    def handle(self, *args, **options):
+        boards = Board.objects.all()
+
+        if options['board'] is not None:
+            boards = boards.filter(name=options['board'])
+
+        for board in boards:
+            processing_start = datetime.datetime.now()
+
+            with transaction.atomic():
+                hours = rebuild_hourly_stats(board)
+                days = rebuild_update_stats(board)
+
+            processing_time = datetime.datetime.now() - processing_start
+
+            print('%s Board: %s Hours: %s Days: %s Time passed: %s sec' % (datetime.datetime.now(), board, hours, days, processing_time.seconds))
+
+        cache.invalidate_status()
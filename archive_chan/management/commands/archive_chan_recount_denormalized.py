@@ -1,38 +1,73 @@
-from django.db.models import Max, Min, Count
-from django.core.management.base import BaseCommand
+import datetime
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import utc
 
 from archive_chan.models import Thread
 
 class Command(BaseCommand):
     args = ''
     help = 'Recount the data in the thread model.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--board',
+            action="store",
+            dest='board',
+            help='Recount only the threads in this board.',
+        ),
+        make_option(
+            '--since',
+            action="store",
+            dest='since',
+            help='Recount only the threads with the last reply after this date (YYYY-MM-DD).',
+        ),
+        make_option(
+            '--chunk-size',
+            action="store",
+            type="int",
+            dest='chunk_size',
+            default=1000,
+            help='Number of threads recounted in one statement.',
+        ),
+    )
 
     def handle(self, *args, **options):
-        threads = Thread.objects.annotate(
-            correct_first_reply=Min('post__time'),
-            correct_last_reply=Max('post__time'),
-            correct_replies=Count('post'),
-            correct_images=Count('post__image')
-        )
-
-        total = 0
+        processing_start = datetime.datetime.now()
+
+        threads = Thread.objects.order_by('id')
+
+        if options['board'] is not None:
+            threads = threads.filter(board=options['board'])
+
+        if options['since'] is not None:
+            try:
+                since = datetime.datetime.strptime(options['since'], '%Y-%m-%d').replace(tzinfo=utc)
+            except ValueError:
+                raise CommandError('Invalid date, use YYYY-MM-DD.')
+
+            threads = threads.filter(last_reply__gte=since)
+
+        total = threads.count()
+        processed = 0
         updated = 0
+        last_id = 0
+
+        while True:
+            pks = list(threads.filter(id__gt=last_id).values_list('id', flat=True)[:options['chunk_size']])
 
-        for thread in threads:
-            if (thread.correct_first_reply != thread.first_reply
-                or thread.correct_last_reply != thread.last_reply
-                or thread.correct_replies != thread.replies
-                or thread.correct_images != thread.images):
+            if not pks:
+                break
 
-                thread.first_reply = thread.correct_first_reply
-                thread.last_reply = thread.correct_last_reply
-                thread.replies = thread.correct_replies
-                thread.images = thread.correct_images
+            with transaction.atomic():
+                updated += Thread.objects.recount(pks)
 
-                thread.save()
+            processed += len(pks)
+            last_id = pks[-1]
 
-                updated += 1
+            print('Processed: %s/%s Updated: %s' % (processed, total, updated))
 
-            total += 1
+        processing_time = datetime.datetime.now() - processing_start
 
-            print('Total: %s Updated: %s' % (total, updated))
+        print('%s Total: %s Updated: %s Time passed: %s sec' % (datetime.datetime.now(), processed, updated, processing_time.seconds))
@@ -1,16 +1,68 @@
-import datetime
+import datetime, sys
+from optparse import make_option
 
 from django.core.management.base import BaseCommand
-from django.db.models import Max
+from django.db import transaction
 from django.utils.timezone import utc
-from django.core.signals import Signal
 
-from archive_chan.models import Board, Thread, Post, post_post_delete
-from django.db.models.signals import post_delete
+from archive_chan.models import Board, Thread, Post, Image, fs
+from archive_chan.lib.stats import remove_posts_from_hourly_stats
+import archive_chan.lib.cache as cache
 
 class Command(BaseCommand):
     args = ''
     help = 'Remove old, unsaved threads. This command should be run periodically to clean the database.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--batch-size',
+            action="store",
+            type="int",
+            dest='batch_size',
+            default=50,
+            help='Number of threads deleted in one transaction.',
+        ),
+        make_option(
+            '--dry-run',
+            action="store_true",
+            dest='dry_run',
+            help='Only count the threads, posts and images which would be deleted.',
+        ),
+        make_option(
+            '--progress',
+            action="store_true",
+            dest='progress',
+            help='Display progress.',
+        ),
+    )
+
+    def delete_threads(self, pks):
+        """Deletes the threads with all related data in one short transaction. Signals are not sent
+        and the files are not removed, this function returns their names instead.
+        """
+        with transaction.atomic():
+            posts = Post.objects.filter(thread__in=pks)
+            remove_posts_from_hourly_stats(posts)
+
+            files = []
+            for image, thumbnail in Image.objects.filter(post__thread__in=pks).values_list('image', 'thumbnail'):
+                files.extend([name for name in (image, thumbnail) if name])
+
+            pks = tuple(pks)
+            Thread.objects.execute('DELETE FROM {image} WHERE post_id IN (SELECT id FROM {post} WHERE thread_id IN %s)', [pks])
+            posts = Thread.objects.execute('DELETE FROM {post} WHERE thread_id IN %s', [pks])
+            Thread.objects.execute('DELETE FROM {tagtothread} WHERE thread_id IN %s', [pks])
+            Thread.objects.execute('DELETE FROM {thread} WHERE id IN %s', [pks])
+
+        return (posts, files)
+
+    def remove_files(self, files):
+        """Remove the files of the deleted images. Called after the transaction is committed."""
+        for name in files:
+            try:
+                fs.delete(name)
+
+            except Exception as e:
+                sys.stderr.write('%s\n' % (e))
 
     def handle(self, *args, **options):
         boards = Board.objects.filter(store_threads_for__gt=0)
@@ -20,22 +72,72 @@ class Command(BaseCommand):
 
             # Get the posts older than the amount specified in the board settings.
             time_threshold = datetime.datetime.now().replace(tzinfo=utc) - datetime.timedelta(hours=board.store_threads_for)
-            queryset = Thread.objects.filter(board=board, last_reply__lt=time_threshold, saved=False)
+            # Frozen threads are saved, they are excluded in case they were unsaved without thawing them.
+            queryset = Thread.objects.filter(board=board, last_reply__lt=time_threshold, saved=False, frozenthread=None)
 
-            # Count for stats and delete.
-            amount = queryset.count()
+            if options['dry_run']:
+                print('%s Board: %s Threads to delete: %s Posts: %s Images: %s' % (
+                    datetime.datetime.now(),
+                    board,
+                    queryset.count(),
+                    Post.objects.filter(thread__in=queryset).count(),
+                    Image.objects.filter(post__thread__in=queryset).count()
+                ))
+                continue
 
-            post_delete.disconnect(receiver=post_post_delete, sender=Post)
+            deleted_threads = 0
+            deleted_posts = 0
+            deleted_files = 0
+            transactions = 0
+            total_lock_time = datetime.timedelta()
+            max_lock_time = datetime.timedelta()
+            last_id = 0
 
             try:
-                queryset.delete()
+                while True:
+                    pks = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:options['batch_size']])
+
+                    if not pks:
+                        break
+
+                    last_id = pks[-1]
+
+                    transaction_start = datetime.datetime.now()
+                    posts, files = self.delete_threads(pks)
+                    lock_time = datetime.datetime.now() - transaction_start
+
+                    self.remove_files(files)
+
+                    transactions += 1
+                    total_lock_time += lock_time
+                    max_lock_time = max(max_lock_time, lock_time)
+                    deleted_threads += len(pks)
+                    deleted_posts += posts
+                    deleted_files += len(files)
+
+                    if options['progress']:
+                        print('Deleted threads: %s Posts: %s Transaction time: %s sec' % (deleted_threads, deleted_posts, round(lock_time.total_seconds(), 3)))
 
             except Exception as e:
-                sys.stderr.write('%s\m' % (e))
+                sys.stderr.write('%s\n' % (e))
 
             finally:
-                post_delete.connect(post_post_delete, sender=Post)
+                cache.invalidate_board(board.name)
+                cache.invalidate_tags()
 
             processing_time = datetime.datetime.now() - processing_start
+            seconds = max(processing_time.total_seconds(), 0.001)
 
-            print('%s Board: %s Deleted threads: %s Time passed: %s sec' % (datetime.datetime.now(), board, amount, processing_time.seconds))
+            print('%s Board: %s Deleted threads: %s Posts: %s Files: %s Time passed: %s sec (%s threads/sec, %s posts/sec) Transactions: %s Lock time: %s sec total, %s sec max' % (
+                datetime.datetime.now(),
+                board,
+                deleted_threads,
+                deleted_posts,
+                deleted_files,
+                round(seconds, 2),
+                round(deleted_threads / seconds, 2),
+                round(deleted_posts / seconds, 2),
+                transactions,
+                round(total_lock_time.total_seconds(), 3),
+                round(max_lock_time.total_seconds(), 3),
+            ))
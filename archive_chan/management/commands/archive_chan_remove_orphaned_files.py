@@ -1,14 +1,15 @@
-from os import path, listdir, remove
+import os, datetime, sys, heapq, time
 from optparse import make_option
-import datetime
+from concurrent.futures import ThreadPoolExecutor
 
-from django.core.management.base import BaseCommand
-from archive_chan.models import Image
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from archive_chan.models import Image, FrozenThread
 from django.conf import settings
 
 class Command(BaseCommand):
     args = ''
-    help = 'Remove orphaned files - files without a corresponding database entry. In theory they should be deleted automatically but who knows. WARNING: this is a dumb function which will simply iterate and query the database once for each file. It can really strain your server.' 
+    help = 'Remove orphaned files - files without a corresponding database entry and report database entries without files. In theory orphaned files should be deleted automatically but who knows. File names stored in the database are streamed in sorted order and merged with a sorted walk of the directories, no queries are executed per file. PostgreSQL only.'
     option_list = BaseCommand.option_list + (
         make_option(
             '--progress',
@@ -16,57 +17,210 @@ class Command(BaseCommand):
             dest='progress',
             help='Display progress.',
         ),
+        make_option(
+            '--dry-run',
+            action="store_true",
+            dest='dry_run',
+            help='Do not remove anything, only report the orphaned files.',
+        ),
+        make_option(
+            '--jobs',
+            action="store",
+            type="int",
+            dest='jobs',
+            default=4,
+            help='Number of threads removing the files.',
+        ),
+        make_option(
+            '--chunk-size',
+            action="store",
+            type="int",
+            dest='chunk_size',
+            default=10000,
+            help='Number of names fetched from the database and files removed at once.',
+        ),
     )
 
-
-    def __init__(self, *args, **kwargs):
-        super(Command, self).__init__(*args, **kwargs)
-        self.files_deleted = 0
-        self.thumbnails_deleted = 0
-
+    def iter_db_names(self, field, upload_to_directory, chunk_size):
+        """Yields file names stored in the database using a server side cursor. Names are sorted
+        by their bytes which is the same order in which Python compares strings.
+        """
+        column = connection.ops.quote_name(field)
+        table = connection.ops.quote_name(Image._meta.db_table)
+
+        connection.ensure_connection()
+        cursor = connection.connection.cursor(name='archive_chan_orphaned_%s' % field)
+        cursor.itersize = chunk_size
+
+        try:
+            cursor.execute(
+                'SELECT %s FROM %s WHERE %s LIKE %%s ORDER BY %s COLLATE "C"' % (column, table, column, column),
+                [upload_to_directory + '/%']
+            )
+
+            for row in cursor:
+                yield row[0]
+
+        finally:
+            cursor.close()
+
+    def get_frozen_names(self, upload_to_directory):
+        """Returns a sorted list of the file names used by the frozen threads. Those files
+        do not have entries in the image table.
+        """
+        names = []
+        last_pk = 0
+
+        while True:
+            chunk = list(FrozenThread.objects.filter(pk__gt=last_pk).order_by('pk')[:100])
+
+            if not chunk:
+                break
+
+            last_pk = chunk[-1].pk
+
+            for frozen in chunk:
+                names.extend([name for name in frozen.get_file_names() if name.startswith(upload_to_directory + '/')])
+
+        names.sort()
+        return names
+
+    def iter_file_names(self, directory, relative_directory):
+        """Yields paths of all files in the directory relative to MEDIA_ROOT in the same order
+        as the database. Directories are sorted as if their names ended with a slash which makes
+        their contents appear at the same position as in a sorted list of full paths.
+        """
+        try:
+            entries = [(entry.name + '/' if entry.is_dir() else entry.name, entry) for entry in os.scandir(directory)]
+
+        except FileNotFoundError:
+            return
+
+        entries.sort(key=lambda entry: entry[0])
+
+        for sort_name, entry in entries:
+            relative_path = relative_directory + '/' + entry.name
+
+            if entry.is_dir():
+                for name in self.iter_file_names(entry.path, relative_path):
+                    yield name
+            else:
+                yield relative_path
+
+    def merge(self, db_names, file_names):
+        """Compares two sorted streams. Yields ('orphaned', name) for files without database entries and
+        ('missing', name) for database entries without files.
+        """
+        db_name = next(db_names, None)
+        file_name = next(file_names, None)
+        previous_db_name = None
+
+        while db_name is not None or file_name is not None:
+            # The same file might be used by many entries.
+            if db_name is not None and db_name == previous_db_name:
+                db_name = next(db_names, None)
+
+            elif file_name is None or (db_name is not None and db_name < file_name):
+                yield ('missing', db_name)
+                previous_db_name = db_name
+                db_name = next(db_names, None)
+
+            elif db_name is None or file_name < db_name:
+                yield ('orphaned', file_name)
+                file_name = next(file_names, None)
+
+            else:
+                previous_db_name = db_name
+                db_name = next(db_names, None)
+                file_name = next(file_names, None)
+
+    def is_newer(self, name, timestamp):
+        """Checks if the file was modified after the timestamp. Such files might have been
+        downloaded after the names were read from the database so they are not orphaned.
+        """
+        try:
+            return os.stat(os.path.join(settings.MEDIA_ROOT, name)).st_mtime > timestamp
+
+        except OSError:
+            return True
+
+    def remove_file(self, name):
+        try:
+            os.remove(os.path.join(settings.MEDIA_ROOT, name))
+            return True
+
+        except OSError as e:
+            sys.stderr.write('%s\n' % (e))
+            return False
+
+    def remove_files(self, executor, names):
+        return sum(executor.map(self.remove_file, names))
+
+    def process_directory(self, upload_to_directory, field, executor, options):
+        """Search for orphaned files and remove them. Returns the number of orphaned and missing files."""
+        orphaned = 0
+        missing = 0
+        removed = 0
+        to_remove = []
+
+        # The walk takes a long time, files downloaded in the meantime are not in the cursor.
+        sweep_start = time.time()
+
+        with transaction.atomic():
+            db_names = heapq.merge(
+                self.iter_db_names(field, upload_to_directory, options['chunk_size']),
+                self.get_frozen_names(upload_to_directory)
+            )
+            file_names = self.iter_file_names(os.path.join(settings.MEDIA_ROOT, upload_to_directory), upload_to_directory)
+
+            for status, name in self.merge(db_names, file_names):
+                if status == 'missing':
+                    missing += 1
+                    if int(options['verbosity']) >= 2:
+                        print('Missing file: %s' % name)
+                    continue
+
+                if self.is_newer(name, sweep_start):
+                    if int(options['verbosity']) >= 2:
+                        print('New file skipped: %s' % name)
+                    continue
+
+                orphaned += 1
+                if int(options['verbosity']) >= 2:
+                    print('Orphaned file: %s' % name)
+
+                if not options['dry_run']:
+                    to_remove.append(name)
+
+                    if len(to_remove) >= options['chunk_size']:
+                        removed += self.remove_files(executor, to_remove)
+                        to_remove = []
+
+                if options['progress'] and orphaned % 1000 == 0:
+                    print('%s Orphaned: %s Missing: %s' % (upload_to_directory, orphaned, missing))
+
+        removed += self.remove_files(executor, to_remove)
+
+        return (orphaned, missing, removed)
 
     def handle(self, *args, **options):
-        processing_start = datetime.datetime.now()
-
-        self.files_deleted = self.process_directory('post_images', self.image_exists_in_db, options['progress'])
-        self.thumbnails_deleted = self.process_directory('post_thumbnails', self.thumbnail_exists_in_db, options['progress'])
+        if connection.vendor != 'postgresql':
+            raise CommandError('This command requires PostgreSQL.')
 
-        processing_time = datetime.datetime.now() - processing_start
-
-        print('%s Time passed: %s sec Deleted images: %s Deleted thumbnails: %s' % (datetime.datetime.now(), processing_time.seconds, self.files_deleted, self.thumbnails_deleted))
-
-
-    def process_directory(self, upload_to_directory, check_in_db_function, show_progress):
-        """Search for orphaned files and remove them."""
-        files_deleted = 0
-
-        dir_path = path.join(settings.MEDIA_ROOT, upload_to_directory)
-
-        if path.isdir(dir_path):
-            for (index, filename) in enumerate(listdir(dir_path)):
-                # Just info.
-                if show_progress:
-                    print('%s - %s' % (index, filename))
-
-                full_path = path.join(dir_path, filename)
-
-                # Check if this is a file or a directory.
-                if path.isfile(full_path):
-                    # Remove image.
-                    if not check_in_db_function(path.join(upload_to_directory, filename)):
-                        try:
-                            remove(full_path)
-                            files_deleted += 1
-
-                        except:
-                            pass
-
-        return files_deleted
+        processing_start = datetime.datetime.now()
 
+        with ThreadPoolExecutor(max_workers=options['jobs']) as executor:
+            for upload_to_directory, field in (('post_images', 'image'), ('post_thumbnails', 'thumbnail')):
+                orphaned, missing, removed = self.process_directory(upload_to_directory, field, executor, options)
 
-    def image_exists_in_db(self, upload_to_path):
-        return Image.objects.filter(image=upload_to_path).exists()
+                print('%s Directory: %s Orphaned files: %s Removed files: %s Database entries without files: %s' % (
+                    datetime.datetime.now(),
+                    upload_to_directory,
+                    orphaned,
+                    removed,
+                    missing
+                ))
 
+        processing_time = datetime.datetime.now() - processing_start
 
-    def thumbnail_exists_in_db(self, upload_to_path):
-        return Image.objects.filter(thumbnail=upload_to_path).exists()
+        print('%s Time passed: %s sec' % (datetime.datetime.now(), processing_time.seconds))
@@ -0,0 +1,69 @@
+import datetime
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from archive_chan.models import Post
+from archive_chan.lib.formatting import FORMAT_VERSION
+
+class Command(BaseCommand):
+    args = ''
+    help = 'Render and store the HTML of the post comments. Only outdated posts are processed unless --all is specified. Run this after upgrading the application.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--all',
+            action="store_true",
+            dest='all',
+            help='Render all posts, even those which are up to date.',
+        ),
+        make_option(
+            '--batch-size',
+            action="store",
+            type="int",
+            dest='batch_size',
+            default=1000,
+            help='Number of posts processed in one transaction.',
+        ),
+        make_option(
+            '--progress',
+            action="store_true",
+            dest='progress',
+            help='Display progress.',
+        ),
+    )
+
+    def handle(self, *args, **options):
+        processing_start = datetime.datetime.now()
+
+        queryset = Post.objects.only('id', 'comment').order_by('id')
+
+        if not options['all']:
+            queryset = queryset.exclude(comment_html_version=FORMAT_VERSION)
+
+        last_id = 0
+        rendered = 0
+
+        while True:
+            posts = list(queryset.filter(id__gt=last_id)[:options['batch_size']])
+
+            if not posts:
+                break
+
+            with transaction.atomic():
+                for post in posts:
+                    post.render_comment()
+                    Post.objects.filter(pk=post.pk).update(
+                        comment_html=post.comment_html,
+                        comment_html_version=post.comment_html_version
+                    )
+
+            last_id = posts[-1].id
+            rendered += len(posts)
+
+            if options['progress']:
+                print('Rendered: %s Last id: %s' % (rendered, last_id))
+
+        processing_time = datetime.datetime.now() - processing_start
+
+        print('%s Rendered posts: %s Time passed: %s sec' % (datetime.datetime.now(), rendered, processing_time.seconds))
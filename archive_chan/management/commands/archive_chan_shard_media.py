@@ -0,0 +1,129 @@
+import os, datetime, sys
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from archive_chan.models import Image, fs, get_sharded_path
+
+class Command(BaseCommand):
+    args = ''
+    help = 'Move the images and thumbnails stored in the flat post_images and post_thumbnails directories to the sharded layout used for the new files. Rows are updated in batches. The command can be interrupted and run again, files which were already moved are detected.'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--batch-size',
+            action="store",
+            type="int",
+            dest='batch_size',
+            default=1000,
+            help='Number of images moved before updating the database.',
+        ),
+        make_option(
+            '--dry-run',
+            action="store_true",
+            dest='dry_run',
+            help='Only count the images which would be moved.',
+        ),
+        make_option(
+            '--progress',
+            action="store_true",
+            dest='progress',
+            help='Display progress.',
+        ),
+    )
+
+    fields = (('image', 'post_images'), ('thumbnail', 'post_thumbnails'))
+
+    collisions = 0
+
+    def get_queryset(self):
+        """Images with at least one file which is not in a subdirectory."""
+        query = Q()
+        for field, directory in self.fields:
+            query |= Q(**{'%s__regex' % field: r'^%s/[^/]+$' % directory})
+
+        return Image.objects.filter(query).order_by('id')
+
+    def move_file(self, name, directory):
+        """Moves the file and returns its new name. Returns None if the file does not exist.
+        If a different file already exists in the new location nothing is moved, the collision
+        is reported and the old name is returned.
+        """
+        if not name.startswith(directory + '/') or '/' in name[len(directory) + 1:]:
+            return name
+
+        new_name = get_sharded_path(directory, name[len(directory) + 1:])
+        source = fs.path(name)
+        destination = fs.path(new_name)
+
+        if os.path.exists(source):
+            # os.rename would silently overwrite it.
+            if os.path.exists(destination):
+                self.collisions += 1
+                sys.stderr.write('File exists: %s Not moved: %s\n' % (new_name, name))
+                return name
+
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            os.rename(source, destination)
+            return new_name
+
+        # Moved during the previous run which was interrupted before updating the database
+        # or the same file is used by other row.
+        if os.path.exists(destination):
+            return new_name
+
+        return None
+
+    def handle(self, *args, **options):
+        processing_start = datetime.datetime.now()
+
+        queryset = self.get_queryset()
+
+        if options['dry_run']:
+            print('%s Images to move: %s' % (datetime.datetime.now(), queryset.count()))
+            return
+
+        moved = 0
+        missing = 0
+        last_id = 0
+
+        while True:
+            images = list(queryset.filter(id__gt=last_id).values_list('id', 'image', 'thumbnail')[:options['batch_size']])
+
+            if not images:
+                break
+
+            last_id = images[-1][0]
+
+            # Move the files first. If the command is interrupted now the files will be found
+            # in the new locations during the next run.
+            updates = []
+            for pk, image, thumbnail in images:
+                values = {}
+
+                for (field, directory), name in zip(self.fields, (image, thumbnail)):
+                    new_name = self.move_file(name, directory)
+
+                    if new_name is None:
+                        missing += 1
+                        sys.stderr.write('Missing file: %s\n' % name)
+
+                    elif new_name != name:
+                        values[field] = new_name
+
+                if values:
+                    updates.append((pk, values))
+
+            with transaction.atomic():
+                for pk, values in updates:
+                    Image.objects.filter(pk=pk).update(**values)
+
+            moved += len(updates)
+
+            if options['progress']:
+                print('Moved images: %s Missing files: %s Collisions: %s' % (moved, missing, self.collisions))
+
+        processing_time = datetime.datetime.now() - processing_start
+
+        print('%s Moved images: %s Missing files: %s Collisions: %s Time passed: %s sec' % (datetime.datetime.now(), moved, missing, self.collisions, processing_time.seconds))
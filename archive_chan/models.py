@@ -1,15 +1,32 @@
-import os, time
+import os, time, datetime, hashlib, json, gzip
 
-from django.db import models
-from django.db.models import Max, Min, Count, F
+from django.db import models, connection
+from django.db.models import Max, Min, Count, Sum, F, Q
 from django.core.urlresolvers import reverse
 from django.core.files.storage import FileSystemStorage
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import utc
 
 from archive_chan.settings import AppSettings
+import archive_chan.lib.cache as cache
+import archive_chan.lib.formatting as formatting
 
 # This overrides the global media url.
 fs = FileSystemStorage(base_url=AppSettings.get('MEDIA_URL'))
 
+def get_sharded_path(directory, filename):
+    """Spreads the files over 65536 subdirectories, for example post_images/3f/a2/1400000000000.jpg.
+    The path depends only on the file name so it can be recalculated by archive_chan_shard_media.
+    """
+    digest = hashlib.md5(filename.encode('utf-8')).hexdigest()
+    return '/'.join((directory, digest[0:2], digest[2:4], filename))
+
+def image_upload_to(instance, filename):
+    return get_sharded_path('post_images', filename)
+
+def thumbnail_upload_to(instance, filename):
+    return get_sharded_path('post_thumbnails', filename)
+
 class Board(models.Model):
     name = models.CharField(max_length=255, primary_key = True)
     active = models.BooleanField(
@@ -25,6 +42,9 @@ class Board(models.Model):
         help_text='Store threads after they reach that many replies.'
     )
 
+    # Most recently started update. Maintained by a signal, used by the status page.
+    last_update = models.ForeignKey('Update', null=True, blank=True, editable=False, on_delete=models.SET_NULL, related_name='+')
+
     class Meta:
         ordering = ['name']
 
@@ -35,6 +55,82 @@ class Board(models.Model):
         return reverse('archive_chan:board', args=[self.name])
 
 
+class ThreadManager(models.Manager):
+    """Maintains the denormalized counters of the threads. All methods update only the affected
+    columns in a single statement which is executed by the database atomically.
+    """
+    def execute(self, sql, params):
+        cursor = connection.cursor()
+        cursor.execute(sql.format(
+            thread=connection.ops.quote_name(Thread._meta.db_table),
+            post=connection.ops.quote_name(Post._meta.db_table),
+            image=connection.ops.quote_name(Image._meta.db_table),
+            tagtothread=connection.ops.quote_name(TagToThread._meta.db_table),
+            frozenthread=connection.ops.quote_name(FrozenThread._meta.db_table)
+        ), params)
+        return cursor.rowcount
+
+    def add_posts(self, pk, posts=0, images=0, first_reply=None, last_reply=None):
+        """Call this after adding posts or images to the thread. Negative values can be used
+        to remove images, use remove_posts to remove posts.
+        """
+        columns = ['replies = replies + %s', 'images = images + %s']
+        params = [posts, images]
+
+        if first_reply is not None:
+            columns.append('first_reply = CASE WHEN first_reply IS NULL OR first_reply > %s THEN %s ELSE first_reply END')
+            params.extend([first_reply, first_reply])
+
+        if last_reply is not None:
+            columns.append('last_reply = CASE WHEN last_reply IS NULL OR last_reply < %s THEN %s ELSE last_reply END')
+            params.extend([last_reply, last_reply])
+
+        params.append(pk)
+
+        return self.execute('UPDATE {thread} SET %s WHERE id = %%s' % ', '.join(columns), params)
+
+    def remove_posts(self, pk, posts=0, images=0):
+        """Call this after removing posts from the thread."""
+        return self.execute(
+            'UPDATE {thread} SET replies = replies - %s, images = images - %s, '
+            'first_reply = (SELECT MIN(time) FROM {post} WHERE {post}.thread_id = {thread}.id), '
+            'last_reply = (SELECT MAX(time) FROM {post} WHERE {post}.thread_id = {thread}.id) '
+            'WHERE id = %s',
+            [posts, images, pk]
+        )
+
+    def recount(self, pks):
+        """Recalculates the counters of many threads at once. Only incorrect rows are updated.
+        Frozen threads are skipped because their posts are not in the post table.
+        Returns the number of updated threads.
+        """
+        pks = tuple(pks)
+
+        if not pks:
+            return 0
+
+        return self.execute(
+            'UPDATE {thread} SET replies = counts.replies, images = counts.images, '
+            'first_reply = counts.first_reply, last_reply = counts.last_reply '
+            'FROM ('
+                'SELECT {thread}.id AS thread_id, COUNT({post}.id) AS replies, COUNT({image}.id) AS images, '
+                'MIN({post}.time) AS first_reply, MAX({post}.time) AS last_reply '
+                'FROM {thread} '
+                'LEFT JOIN {post} ON {post}.thread_id = {thread}.id '
+                'LEFT JOIN {image} ON {image}.post_id = {post}.id '
+                'WHERE {thread}.id IN %s '
+                'AND NOT EXISTS (SELECT 1 FROM {frozenthread} WHERE {frozenthread}.thread_id = {thread}.id) '
+                'GROUP BY {thread}.id'
+            ') AS counts '
+            'WHERE {thread}.id = counts.thread_id AND ('
+                '{thread}.replies != counts.replies OR {thread}.images != counts.images '
+                'OR {thread}.first_reply IS DISTINCT FROM counts.first_reply '
+                'OR {thread}.last_reply IS DISTINCT FROM counts.last_reply'
+            ')',
+            [pks]
+        )
+
+
 class Thread(models.Model):
     board = models.ForeignKey('Board')
     number = models.IntegerField()
@@ -47,6 +143,8 @@ class Thread(models.Model):
     first_reply = models.DateTimeField(null=True, default=None)
     last_reply = models.DateTimeField(null=True, default=None)
 
+    objects = ThreadManager()
+
     # Used by scraper.
     def last_reply_time(self):
         last = self.post_set.last()
@@ -59,12 +157,76 @@ class Thread(models.Model):
     def count_replies(self):
         return self.post_set.count() - 1
 
+    def get_frozen(self):
+        """Returns the FrozenThread or None. The result is remembered like with
+        select_related('frozenthread') so it can be checked many times without queries.
+        """
+        try:
+            return self.frozenthread
+        except FrozenThread.DoesNotExist:
+            setattr(self, Thread.frozenthread.cache_name, None)
+            return None
+
     # Used by board template. Can't figure out a query which wouldd fetch everything in one go.
     def first_post(self):
+        frozen = self.get_frozen()
+
+        if frozen is not None:
+            return frozen.get_first_post(self)
+
         return self.post_set.select_related('image').first()
 
+    # Used by thread view.
+    def get_post_chunk_bounds(self, chunk_size):
+        """Returns (first number, last number) pairs describing chunks of at most chunk_size
+        posts ordered by number. Only the numbers are fetched, the posts can be fetched later
+        with get_post_chunk, for example only if the rendered chunk is not in the cache.
+        """
+        frozen = self.get_frozen()
+
+        if frozen is not None:
+            numbers = frozen.get_numbers()
+        else:
+            numbers = list(self.post_set.order_by('number').values_list('number', flat=True))
+
+        return [
+            (numbers[i], numbers[min(i + chunk_size, len(numbers)) - 1])
+            for i in range(0, len(numbers), chunk_size)
+        ]
+
+    def get_post_chunk(self, first_number, last_number):
+        """Returns the posts with numbers in the range ordered by number.
+        Posts of the frozen threads are read from the archive.
+        """
+        frozen = self.get_frozen()
+
+        if frozen is not None:
+            return frozen.get_posts(self, first_number, last_number)
+
+        chunk = list(self.post_set.select_related('image').filter(
+            number__gte=first_number,
+            number__lte=last_number
+        ).order_by('number'))
+
+        # Avoid fetching the same thread for each post again.
+        for post in chunk:
+            post.thread = self
+
+        return chunk
+
+    def iter_post_chunks(self, chunk_size):
+        """Yields lists of at most chunk_size posts ordered by number. Every chunk is
+        fetched with a separate query so memory usage does not depend on the size of the thread.
+        """
+        for first_number, last_number in self.get_post_chunk_bounds(chunk_size):
+            yield self.get_post_chunk(first_number, last_number)
+
     class Meta:
         unique_together = ('board', 'number')
+        index_together = [
+            ['board', 'last_reply'], # Board view.
+            ['board', 'saved', 'last_reply'], # archive_chan_remove_old_threads.
+        ]
 
     def __str__(self):
         return format("#%s" % (self.number))
@@ -76,8 +238,8 @@ class Thread(models.Model):
 class Post(models.Model):
     thread = models.ForeignKey('Thread')
 
-    number = models.IntegerField()
-    time = models.DateTimeField()
+    number = models.IntegerField(db_index=True) # Links to the posts in other threads.
+    time = models.DateTimeField(db_index=True) # Statistics and search results.
 
     name = models.CharField(max_length=255, blank=True)
     trip = models.CharField(max_length=255, blank=True)
@@ -87,13 +249,32 @@ class Post(models.Model):
     subject = models.TextField(blank=True)
     comment = models.TextField(blank=True)
 
+    # Comment rendered once by the scraper. Version of the formatter is stored to detect outdated data.
+    comment_html = models.TextField(blank=True)
+    comment_html_version = models.IntegerField(default=0)
+
     save_time = models.DateTimeField(auto_now_add = True)
 
     def is_main(self):
         return (self.number == self.thread.number)
 
+    def render_comment(self):
+        """Renders the comment and stores the result in this instance. It has to be saved later."""
+        self.comment_html = formatting.render_comment(self.comment)
+        self.comment_html_version = formatting.FORMAT_VERSION
+
+    def get_comment_html(self):
+        """Returns the rendered comment. Outdated comments are rendered again on the fly."""
+        if self.comment_html_version != formatting.FORMAT_VERSION:
+            return formatting.render_comment(self.comment)
+
+        return self.comment_html
+
     class Meta:
         ordering = ['number']
+        index_together = [
+            ['thread', 'number'], # Thread view and the scraper.
+        ]
 
     def __str__(self):
         return format("#%s" % (self.number))
@@ -104,14 +285,243 @@ class Post(models.Model):
 class Image(models.Model):
     original_name = models.CharField(max_length=255)
     post = models.OneToOneField('Post')
-    image = models.FileField(upload_to = "post_images", storage=fs) # It is impossible to use ImageField to store webm.
-    thumbnail = models.FileField(upload_to = "post_thumbnails", storage=fs)
+    # Indexed for archive_chan_remove_orphaned_files.
+    image = models.FileField(upload_to = image_upload_to, storage=fs, db_index=True) # It is impossible to use ImageField to store webm.
+    thumbnail = models.FileField(upload_to = thumbnail_upload_to, storage=fs, db_index=True)
 
     def get_extension(self):
         name, extension = os.path.splitext(self.image.name)
         return extension
 
 
+class FrozenThread(models.Model):
+    """Posts and images of a thread which is not going to change stored as compressed JSON.
+    Created by archive_chan_freeze_threads to keep the post and image tables small. The files
+    stay where they were, archive_chan_remove_orphaned_files knows about them.
+    Frozen threads are always saved, unsaving a thread thaws it.
+    The posts are stored in FrozenPostChunk rows so a part of the thread can be read without
+    decompressing all posts. The first post is stored here for the board listings.
+    """
+    VERSION = 2
+
+    # Number of posts stored in one FrozenPostChunk.
+    CHUNK_SIZE = 100
+
+    thread = models.OneToOneField('Thread', primary_key=True)
+    first_post = models.BinaryField()
+    save_time = models.DateTimeField(auto_now_add = True)
+
+    @staticmethod
+    def compress(data):
+        return gzip.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    def decompress(data):
+        return json.loads(gzip.decompress(bytes(data)).decode('utf-8'))
+
+    @staticmethod
+    def get_post_data(post):
+        if post.comment_html_version != formatting.FORMAT_VERSION:
+            post.render_comment()
+
+        post_data = {
+            'id': post.id,
+            'number': post.number,
+            'time': post.time.isoformat(),
+            'name': post.name,
+            'trip': post.trip,
+            'email': post.email,
+            'country': post.country,
+            'subject': post.subject,
+            'comment': post.comment,
+            'comment_html': post.comment_html,
+            'comment_html_version': post.comment_html_version,
+            'save_time': post.save_time.isoformat(),
+            'image': None,
+        }
+
+        try:
+            post_data['image'] = {
+                'id': post.image.id,
+                'original_name': post.image.original_name,
+                'image': post.image.image.name,
+                'thumbnail': post.image.thumbnail.name,
+            }
+        except Image.DoesNotExist:
+            pass
+
+        return post_data
+
+    @staticmethod
+    def create_post(post_data, thread):
+        """Returns an unsaved post with its image. It behaves like a post fetched from the
+        database with select_related('image').
+        """
+        post_data = dict(post_data)
+        image_data = post_data.pop('image')
+        post_data['time'] = parse_datetime(post_data['time'])
+        post_data['save_time'] = parse_datetime(post_data['save_time'])
+
+        post = Post(thread=thread, **post_data)
+
+        if image_data is not None:
+            post.image = Image(post=post, **image_data)
+        else:
+            # Prevent a query when the image is accessed.
+            setattr(post, Post.image.cache_name, None)
+
+        return post
+
+    @classmethod
+    def freeze(cls, thread):
+        """Archives the posts of the thread and deletes them from the database. Signals are not sent
+        because the counters of the thread, the statistics and the files should not change.
+        Has to be called in a transaction.
+        """
+        frozen = None
+        last_number = None
+
+        while True:
+            queryset = thread.post_set.select_related('image').order_by('number')
+
+            if last_number is not None:
+                queryset = queryset.filter(number__gt=last_number)
+
+            posts = [cls.get_post_data(post) for post in queryset[:cls.CHUNK_SIZE]]
+
+            if not posts:
+                break
+
+            if frozen is None:
+                frozen = cls.objects.create(thread=thread, first_post=cls.compress({'version': cls.VERSION, 'post': posts[0]}))
+
+            FrozenPostChunk.objects.create(
+                frozen_thread=frozen,
+                first_number=posts[0]['number'],
+                last_number=posts[-1]['number'],
+                numbers=','.join([str(post['number']) for post in posts]),
+                data=cls.compress({'version': cls.VERSION, 'posts': posts})
+            )
+
+            last_number = posts[-1]['number']
+
+        if frozen is None:
+            return None
+
+        Thread.objects.execute('DELETE FROM {image} WHERE post_id IN (SELECT id FROM {post} WHERE thread_id = %s)', [thread.pk])
+        Thread.objects.execute('DELETE FROM {post} WHERE thread_id = %s', [thread.pk])
+
+        return frozen
+
+    def get_first_post(self, thread=None):
+        return self.create_post(self.decompress(self.first_post)['post'], thread or self.thread)
+
+    def get_numbers(self):
+        """Returns the numbers of the posts. Nothing is decompressed."""
+        numbers = []
+
+        for chunk_numbers in self.frozenpostchunk_set.order_by('first_number').values_list('numbers', flat=True):
+            numbers.extend([int(number) for number in chunk_numbers.split(',')])
+
+        return numbers
+
+    def iter_data(self, first_number=None, last_number=None):
+        """Yields the dictionaries describing the posts. Only the chunks overlapping the range are read."""
+        queryset = self.frozenpostchunk_set.order_by('first_number')
+
+        if first_number is not None:
+            queryset = queryset.filter(last_number__gte=first_number)
+
+        if last_number is not None:
+            queryset = queryset.filter(first_number__lte=last_number)
+
+        # One chunk is fetched and decompressed at a time.
+        for chunk_id in list(queryset.values_list('id', flat=True)):
+            data = FrozenPostChunk.objects.filter(id=chunk_id).values_list('data', flat=True)[0]
+
+            for post_data in self.decompress(data)['posts']:
+                if first_number is not None and post_data['number'] < first_number:
+                    continue
+                if last_number is not None and post_data['number'] > last_number:
+                    continue
+
+                yield post_data
+
+    def get_posts(self, thread=None, first_number=None, last_number=None):
+        """Returns a list of unsaved posts with their images ordered by number,
+        optionally only the posts with numbers in the range.
+        """
+        if thread is None:
+            thread = self.thread
+
+        return [self.create_post(post_data, thread) for post_data in self.iter_data(first_number, last_number)]
+
+    def get_images(self, thread=None):
+        """Returns a list of unsaved images ordered by the post number."""
+        posts = self.get_posts(thread)
+        return [post.image for post in posts if getattr(post, Post.image.cache_name) is not None]
+
+    def get_file_names(self):
+        """Returns the names of the image and thumbnail files used by the thread."""
+        names = []
+
+        for post_data in self.iter_data():
+            if post_data['image'] is not None:
+                names.extend([post_data['image']['image'], post_data['image']['thumbnail']])
+
+        return [name for name in names if name]
+
+    def thaw(self):
+        """Moves the posts back to the database and deletes the archive. Has to be called in a transaction."""
+        posts = self.get_posts()
+        images = [post.image for post in posts if getattr(post, Post.image.cache_name) is not None]
+
+        # bulk_create overwrites the auto_now_add field with the current time.
+        save_times = [(post.id, post.save_time) for post in posts]
+
+        Post.objects.bulk_create(posts)
+        Image.objects.bulk_create(images)
+
+        if save_times:
+            Thread.objects.execute(
+                'UPDATE {post} SET save_time = stored.save_time FROM (VALUES %s) AS stored (id, save_time) '
+                'WHERE {post}.id = stored.id' % ', '.join(['(%s, %s::timestamp with time zone)'] * len(save_times)),
+                [value for save_time in save_times for value in save_time]
+            )
+
+        FrozenThread.objects.filter(pk=self.pk).delete()
+
+
+class FrozenPostChunk(models.Model):
+    """At most FrozenThread.CHUNK_SIZE consecutive posts of a frozen thread."""
+    frozen_thread = models.ForeignKey('FrozenThread')
+    first_number = models.IntegerField()
+    last_number = models.IntegerField()
+    numbers = models.TextField() # Comma separated, used to split the thread without decompressing the posts.
+    data = models.BinaryField()
+
+    class Meta:
+        index_together = [
+            ['frozen_thread', 'first_number'],
+        ]
+
+
+class HourlyStats(models.Model):
+    """Number of posts, image posts and threads in a board created during an hour.
+    Maintained by the scraper and used to display statistics without scanning the posts.
+    """
+    board = models.ForeignKey('Board')
+    hour = models.DateTimeField()
+
+    posts = models.IntegerField(default=0)
+    image_posts = models.IntegerField(default=0)
+    threads = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('board', 'hour')
+        ordering = ['hour']
+
+
 class Trigger(models.Model):
     FIELD_CHOICES = (
         ('name', 'Name'),
@@ -179,7 +589,7 @@ class Update(models.Model):
     board = models.ForeignKey('Board')
     status = models.SmallIntegerField(choices=STATUS_CHOICES, default=CURRENT)
     start = models.DateTimeField()
-    end = models.DateTimeField(null=True)
+    end = models.DateTimeField(null=True, db_index=True) # UpdateDailyStats.
 
     used_threads = models.IntegerField()
 
@@ -198,9 +608,78 @@ class Update(models.Model):
     class Meta:
         ordering = ['-start']
 
+
+class UpdateDailyStats(models.Model):
+    """Sums of the completed updates which ended during a day. Used by the status page."""
+    date = models.DateField(unique=True)
+    updates = models.IntegerField(default=0)
+    total_time = models.FloatField(default=0)
+    added_posts = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+
+    @classmethod
+    def recalculate(cls, date):
+        """Recreates the statistics of a day from the updates."""
+        start = datetime.datetime.combine(date, datetime.time()).replace(tzinfo=utc)
+
+        totals = Update.objects.filter(
+            status=Update.COMPLETED,
+            end__gte=start,
+            end__lt=start + datetime.timedelta(days=1)
+        ).aggregate(
+            updates=Count('id'),
+            total_time=Sum('total_time'),
+            added_posts=Sum('added_posts')
+        )
+
+        cls.objects.filter(date=date).delete()
+
+        if totals['updates']:
+            cls.objects.create(date=date, **totals)
+
 from django.db.models.signals import pre_delete, post_save, pre_delete, post_delete
 from django.dispatch.dispatcher import receiver
 
+@receiver(post_save, sender=Board)
+@receiver(post_delete, sender=Board)
+def post_board_change(sender, instance, **kwargs):
+    """Invalidate cached pages listing the boards."""
+    cache.invalidate_boards()
+    cache.invalidate_board(instance.name)
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=TagToThread)
+@receiver(post_delete, sender=TagToThread)
+def post_tag_change(sender, instance, **kwargs):
+    """Tag suggestions depend on the names and the popularity of the tags."""
+    cache.invalidate_tags()
+
+@receiver(post_save, sender=Update)
+def post_update_save(sender, instance, **kwargs):
+    """Update the last update of the board and the daily statistics."""
+    Board.objects.filter(name=instance.board_id).filter(
+        Q(last_update=None) | Q(last_update__start__lte=instance.start)
+    ).update(last_update=instance)
+
+    if instance.status == Update.COMPLETED and instance.end is not None:
+        UpdateDailyStats.recalculate(instance.end.astimezone(utc).date())
+
+    cache.invalidate_status()
+
+@receiver(post_delete, sender=Update)
+def post_update_delete(sender, instance, **kwargs):
+    """Point the board to its previous update and update the daily statistics."""
+    previous = Update.objects.filter(board=instance.board_id).order_by('-start').first()
+    Board.objects.filter(name=instance.board_id, last_update=None).update(last_update=previous)
+
+    if instance.status == Update.COMPLETED and instance.end is not None:
+        UpdateDailyStats.recalculate(instance.end.astimezone(utc).date())
+
+    cache.invalidate_status()
+
 @receiver(pre_delete, sender=Image)
 def pre_image_delete(sender, instance, **kwargs):
     """Delete images from the HDD."""
@@ -211,53 +690,25 @@ def pre_image_delete(sender, instance, **kwargs):
 def post_image_save(sender, instance, created, **kwargs):
     """Update images."""
     if created:
-        thread = instance.post.thread
-        thread.images += 1
-        thread.save()
+        Thread.objects.add_posts(instance.post.thread_id, images=1)
+
+@receiver(post_delete, sender=Image)
+def post_image_delete(sender, instance, **kwargs):
+    """Update images."""
+    Thread.objects.add_posts(instance.post.thread_id, images=-1)
 
 @receiver(post_save, sender=Post)
 def post_post_save(sender, instance, created, **kwargs):
     """Update the replies, last_reply and first_reply."""
     if created:
-        thread = instance.thread
-
-        # Replies.
-        thread.replies += 1
-
-        # Last reply.
-        if thread.last_reply is None or instance.time > thread.last_reply:
-            thread.last_reply = instance.time
-
-        # First reply.
-        if thread.first_reply is None or instance.time < thread.first_reply:
-            thread.first_reply = instance.time
-
-        thread.save()
+        Thread.objects.add_posts(
+            instance.thread_id,
+            posts=1,
+            first_reply=instance.time,
+            last_reply=instance.time
+        )
 
 @receiver(post_delete, sender=Post)
 def post_post_delete(sender, instance, **kwargs):
-    """Update replies, images, last_reply, first_reply."""
-    thread = instance.thread
-
-    # Replies
-    thread.replies -= 1
-
-    # Images.
-    try:
-        if instance.image:
-            thread.images -= 1
-
-    except:
-        pass
-
-    # First and last reply.
-    if thread.first_reply == instance.time or thread.last_reply == instance.time:
-        thread_recount = Thread.objects.annotate(
-            min_post=Min('post__time'),
-            max_post=Max('post__time')
-        ).get(pk=instance.thread.pk)
-        
-        thread.first_reply=thread_recount.min_post
-        thread.last_reply=thread_recount.max_post
-
-    thread.save()
+    """Update replies, last_reply, first_reply. Images are updated when the related image is deleted."""
+    Thread.objects.remove_posts(instance.thread_id, posts=1)
@@ -20,8 +20,13 @@ class AppSettings:
         'CONNECTION_TIMEOUT': 10, # [seconds] Code downloading the data will stop waiting for a response after that time.
         'RECENT_POSTS_AGE': 48, # [hours] Used for selecting statistics when the board stores posts forever without deleting them. Read more in views.ajax_board_stats
         'SCRAPER_THREADS_NUMBER': 4, # Number of additional program threads running at the same time. In other words that many 4chan threads will be updated at the same time.
-        'VIEW_CACHE_AGE': 60 * 5, # [seconds] max age of the dynamic pages eg. board
+        'THREAD_CHUNK_SIZE': 100, # Number of posts rendered and sent to the client at once in the thread view.
+        'PARENT_THREAD_CACHE_SIZE': 10000, # Number of post numbers mapped to thread numbers kept in the memory of each process.
+        'PARENT_THREAD_MAX_AMOUNT': 100, # Maximum number of posts resolved by a single request.
+        'GALLERY_MAX_AMOUNT': 100, # Maximum number of images returned by the gallery API at once.
+        'VIEW_CACHE_AGE': 60 * 60 * 24, # [seconds] max age of the dynamic pages eg. board. They are invalidated when the data changes.
         'VIEW_CACHE_AGE_STATIC': 60 * 60 * 24, # [seconds] max age of the static pages eg. stats
+        'API_CLIENT_CACHE_AGE': 60, # [seconds] max-age sent with the read only API responses. Browsers and proxies reuse them without contacting the server.
         'MEDIA_URL': settings.MEDIA_URL, # You can override the URL from which the downloaded photos are served.
     }
 
@@ -22,4 +22,13 @@
  *	http://en.wikipedia.org/wiki/MIT_License
  *	http://en.wikipedia.org/wiki/GNU_General_Public_License
  */
-!function(t,e){function n(t,e,n){var r=t.children(),o=!1;t.empty();for(var i=0,d=r.length;d>i;i++){var l=r.eq(i);if(t.append(l),n&&t.append(n),a(t,e)){l.remove(),o=!0;break}n&&n.detach()}return o}function r(e,n,i,d,l){var s=!1,c="table, thead, tbody, tfoot, tr, col, colgroup, object, embed, param, ol, ul, dl, blockquote, select, optgroup, option, textarea, script, style",u="script";return e.contents().detach().each(function(){var f=this,h=t(f);if("undefined"==typeof f||3==f.nodeType&&0==t.trim(f.data).length)return!0;if(h.is(u))e.append(h);else{if(s)return!0;e.append(h),l&&e[e.is(c)?"after":"append"](l),a(i,d)&&(s=3==f.nodeType?o(h,n,i,d,l):r(h,n,i,d,l),s||(h.detach(),s=!0)),s||l&&l.detach()}}),s}function o(e,n,r,o,d){var c=e[0];if(!c)return!1;var f=s(c),h=-1!==f.indexOf(" ")?" ":"　",p="letter"==o.wrap?"":h,g=f.split(p),v=-1,w=-1,b=0,y=g.length-1;for(o.fallbackToLetter&&0==b&&0==y&&(p="",g=f.split(p),y=g.length-1);y>=b&&(0!=b||0!=y);){var m=Math.floor((b+y)/2);if(m==w)break;w=m,l(c,g.slice(0,w+1).join(p)+o.ellipsis),a(r,o)?(y=w,o.fallbackToLetter&&0==b&&0==y&&(p="",g=g[0].split(p),v=-1,w=-1,b=0,y=g.length-1)):(v=w,b=w)}if(-1==v||1==g.length&&0==g[0].length){var x=e.parent();e.detach();var T=d&&d.closest(x).length?d.length:0;x.contents().length>T?c=u(x.contents().eq(-1-T),n):(c=u(x,n,!0),T||x.detach()),c&&(f=i(s(c),o),l(c,f),T&&d&&t(c).parent().append(d))}else f=i(g.slice(0,v+1).join(p),o),l(c,f);return!0}function a(t,e){return t.innerHeight()>e.maxHeight}function i(e,n){for(;t.inArray(e.slice(-1),n.lastCharacter.remove)>-1;)e=e.slice(0,-1);return t.inArray(e.slice(-1),n.lastCharacter.noEllipsis)<0&&(e+=n.ellipsis),e}function d(t){return{width:t.innerWidth(),height:t.innerHeight()}}function l(t,e){t.innerText?t.innerText=e:t.nodeValue?t.nodeValue=e:t.textContent&&(t.textContent=e)}function s(t){return t.innerText?t.innerText:t.nodeValue?t.nodeValue:t.textContent?t.textContent:""}function c(t){do t=t.previousSibling;while(t&&1!==t.nodeType&&3!==t.nodeType);return t}function u(e,n,r){var o,a=e&&e[0];if(a){if(!r){if(3===a.nodeType)return a;if(t.trim(e.text()))return u(e.contents().last(),n)}for(o=c(a);!o;){if(e=e.parent(),e.is(n)||!e.length)return!1;o=c(e[0])}if(o)return u(t(o),n)}return!1}function f(e,n){return e?"string"==typeof e?(e=t(e,n),e.length?e:!1):e.jquery?e:!1:!1}function h(t){for(var e=t.innerHeight(),n=["paddingTop","paddingBottom"],r=0,o=n.length;o>r;r++){var a=parseInt(t.css(n[r]),10);isNaN(a)&&(a=0),e-=a}return e}if(!t.fn.dotdotdot){t.fn.dotdotdot=function(e){if(0==this.length)return t.fn.dotdotdot.debug('No element found for "'+this.selector+'".'),this;if(this.length>1)return this.each(function(){t(this).dotdotdot(e)});var o=this;o.data("dotdotdot")&&o.trigger("destroy.dot"),o.data("dotdotdot-style",o.attr("style")||""),o.css("word-wrap","break-word"),"nowrap"===o.css("white-space")&&o.css("white-space","normal"),o.bind_events=function(){return o.bind("update.dot",function(e,d){e.preventDefault(),e.stopPropagation(),l.maxHeight="number"==typeof l.height?l.height:h(o),l.maxHeight+=l.tolerance,"undefined"!=typeof d&&(("string"==typeof d||d instanceof HTMLElement)&&(d=t("<div />").append(d).contents()),d instanceof t&&(i=d)),g=o.wrapInner('<div class="dotdotdot" />').children(),g.contents().detach().end().append(i.clone(!0)).find("br").replaceWith("  <br />  ").end().css({height:"auto",width:"auto",border:"none",padding:0,margin:0});var c=!1,u=!1;return s.afterElement&&(c=s.afterElement.clone(!0),c.show(),s.afterElement.detach()),a(g,l)&&(u="children"==l.wrap?n(g,l,c):r(g,o,g,l,c)),g.replaceWith(g.contents()),g=null,t.isFunction(l.callback)&&l.callback.call(o[0],u,i),s.isTruncated=u,u}).bind("isTruncated.dot",function(t,e){return t.preventDefault(),t.stopPropagation(),"function"==typeof e&&e.call(o[0],s.isTruncated),s.isTruncated}).bind("originalContent.dot",function(t,e){return t.preventDefault(),t.stopPropagation(),"function"==typeof e&&e.call(o[0],i),i}).bind("destroy.dot",function(t){t.preventDefault(),t.stopPropagation(),o.unwatch().unbind_events().contents().detach().end().append(i).attr("style",o.data("dotdotdot-style")||"").data("dotdotdot",!1)}),o},o.unbind_events=function(){return o.unbind(".dot"),o},o.watch=function(){if(o.unwatch(),"window"==l.watch){var e=t(window),n=e.width(),r=e.height();e.bind("resize.dot"+s.dotId,function(){n==e.width()&&r==e.height()&&l.windowResizeFix||(n=e.width(),r=e.height(),u&&clearInterval(u),u=setTimeout(function(){o.trigger("update.dot")},100))})}else c=d(o),u=setInterval(function(){if(o.is(":visible")){var t=d(o);(c.width!=t.width||c.height!=t.height)&&(o.trigger("update.dot"),c=t)}},500);return o},o.unwatch=function(){return t(window).unbind("resize.dot"+s.dotId),u&&clearInterval(u),o};var i=o.contents(),l=t.extend(!0,{},t.fn.dotdotdot.defaults,e),s={},c={},u=null,g=null;return l.lastCharacter.remove instanceof Array||(l.lastCharacter.remove=t.fn.dotdotdot.defaultArrays.lastCharacter.remove),l.lastCharacter.noEllipsis instanceof Array||(l.lastCharacter.noEllipsis=t.fn.dotdotdot.defaultArrays.lastCharacter.noEllipsis),s.afterElement=f(l.after,o),s.isTruncated=!1,s.dotId=p++,o.data("dotdotdot",!0).bind_events().trigger("update.dot"),l.watch&&o.watch(),o},t.fn.dotdotdot.defaults={ellipsis:"... ",wrap:"word",fallbackToLetter:!0,lastCharacter:{},tolerance:0,callback:null,after:null,height:null,watch:!1,windowResizeFix:!0},t.fn.dotdotdot.defaultArrays={lastCharacter:{remove:[" ","　",",",";",".","!","?"],noEllipsis:[]}},t.fn.dotdotdot.debug=function(){};var p=1,g=t.fn.html;t.fn.html=function(n){return n!=e&&!t.isFunction(n)&&this.data("dotdotdot")?this.trigger("update",[n]):g.apply(this,arguments)};var v=t.fn.text;t.fn.text=function(n){return n!=e&&!t.isFunction(n)&&this.data("dotdotdot")?(n=t("<div />").text(n).html(),this.trigger("update",[n])):v.apply(this,arguments)}}}(jQuery);(function(a){"function"===typeof define&&define.amd?define(["jquery"],a):a(jQuery)})(function(c){function b(e,d){var f=function(){},f={autoSelectFirst:!1,appendTo:"body",serviceUrl:null,lookup:null,onSelect:null,width:"auto",minChars:1,maxHeight:300,deferRequestBy:0,params:{},formatResult:b.formatResult,delimiter:null,zIndex:9999,type:"GET",noCache:!1,onSearchStart:f,onSearchComplete:f,onSearchError:f,containerClass:"autocomplete-suggestions",tabDisabled:!1,dataType:"text",currentRequest:null,triggerSelectOnValidInput:!0,lookupFilter:function(h,g,i){return -1!==h.value.toLowerCase().indexOf(i)},paramName:"query",transformResult:function(g){return"string"===typeof g?c.parseJSON(g):g}};this.element=e;this.el=c(e);this.suggestions=[];this.badQueries=[];this.selectedIndex=-1;this.currentValue=this.element.value;this.intervalId=0;this.cachedResponse={};this.onChange=this.onChangeInterval=null;this.isLocal=!1;this.suggestionsContainer=null;this.options=c.extend({},f,d);this.classes={selected:"autocomplete-selected",suggestion:"autocomplete-suggestion"};this.hint=null;this.hintValue="";this.selection=null;this.initialize();this.setOptions(d)}var a=function(){return{escapeRegExChars:function(d){return d.replace(/[\-\[\]\/\{\}\(\)\*\+\?\.\\\^\$\|]/g,"\\$&")},createNode:function(e){var d=document.createElement("div");d.className=e;d.style.position="absolute";d.style.display="none";return d}}}();b.utils=a;c.Autocomplete=b;b.formatResult=function(e,d){var f="("+a.escapeRegExChars(d)+")";return e.value.replace(RegExp(f,"gi"),"<strong>$1</strong>")};b.prototype={killerFn:null,initialize:function(){var g=this,d="."+g.classes.suggestion,j=g.classes.selected,i=g.options,h;g.element.setAttribute("autocomplete","off");g.killerFn=function(e){0===c(e.target).closest("."+g.options.containerClass).length&&(g.killSuggestions(),g.disableKillerFn())};g.suggestionsContainer=b.utils.createNode(i.containerClass);h=c(g.suggestionsContainer);h.appendTo(i.appendTo);"auto"!==i.width&&h.width(i.width);h.on("mouseover.autocomplete",d,function(){g.activate(c(this).data("index"))});h.on("mouseout.autocomplete",function(){g.selectedIndex=-1;h.children("."+j).removeClass(j)});h.on("click.autocomplete",d,function(){g.select(c(this).data("index"))});g.fixPosition();g.fixPositionCapture=function(){g.visible&&g.fixPosition()};c(window).on("resize.autocomplete",g.fixPositionCapture);g.el.on("keydown.autocomplete",function(e){g.onKeyPress(e)});g.el.on("keyup.autocomplete",function(e){g.onKeyUp(e)});g.el.on("blur.autocomplete",function(){g.onBlur()});g.el.on("focus.autocomplete",function(){g.onFocus()});g.el.on("change.autocomplete",function(e){g.onKeyUp(e)})},onFocus:function(){this.fixPosition();if(this.options.minChars<=this.el.val().length){this.onValueChange()}},onBlur:function(){this.enableKillerFn()},setOptions:function(e){var d=this.options;c.extend(d,e);if(this.isLocal=c.isArray(d.lookup)){d.lookup=this.verifySuggestionsFormat(d.lookup)}c(this.suggestionsContainer).css({"max-height":d.maxHeight+"px",width:d.width+"px","z-index":d.zIndex})},clearCache:function(){this.cachedResponse={};this.badQueries=[]},clear:function(){this.clearCache();this.currentValue="";this.suggestions=[]},disable:function(){this.disabled=!0;this.currentRequest&&this.currentRequest.abort()},enable:function(){this.disabled=!1},fixPosition:function(){var d;"body"===this.options.appendTo&&(d=this.el.offset(),d={top:d.top+this.el.outerHeight()+"px",left:d.left+"px"},"auto"===this.options.width&&(d.width=this.el.outerWidth()-2+"px"),c(this.suggestionsContainer).css(d))},enableKillerFn:function(){c(document).on("click.autocomplete",this.killerFn)},disableKillerFn:function(){c(document).off("click.autocomplete",this.killerFn)},killSuggestions:function(){var d=this;d.stopKillSuggestions();d.intervalId=window.setInterval(function(){d.hide();d.stopKillSuggestions()},50)},stopKillSuggestions:function(){window.clearInterval(this.intervalId)},isCursorAtEnd:function(){var e=this.el.val().length,d=this.element.selectionStart;return"number"===typeof d?d===e:document.selection?(d=document.selection.createRange(),d.moveStart("character",-e),e===d.text.length):!0},onKeyPress:function(d){if(!this.disabled&&!this.visible&&40===d.which&&this.currentValue){this.suggest()}else{if(!this.disabled&&this.visible){switch(d.which){case 27:this.el.val(this.currentValue);this.hide();break;case 39:if(this.hint&&this.options.onHint&&this.isCursorAtEnd()){this.selectHint();break}return;case 9:if(this.hint&&this.options.onHint){this.selectHint();return}case 13:if(-1===this.selectedIndex){this.hide();return}this.select(this.selectedIndex);if(9===d.which&&!1===this.options.tabDisabled){return}break;case 38:this.moveUp();break;case 40:this.moveDown();break;default:return}d.stopImmediatePropagation();d.preventDefault()}}},onKeyUp:function(e){var d=this;if(!d.disabled){switch(e.which){case 38:case 40:return}clearInterval(d.onChangeInterval);if(d.currentValue!==d.el.val()){if(d.findBestHint(),0<d.options.deferRequestBy){d.onChangeInterval=setInterval(function(){d.onValueChange()},d.options.deferRequestBy)}else{d.onValueChange()}}}},onValueChange:function(){var e=this.options,d=this.el.val(),f=this.getQuery(d);this.selection&&(this.selection=null,(e.onInvalidateSelection||c.noop).call(this.element));clearInterval(this.onChangeInterval);this.currentValue=d;this.selectedIndex=-1;if(e.triggerSelectOnValidInput&&(d=this.findSuggestionIndex(f),-1!==d)){this.select(d);return}f.length<e.minChars?this.hide():this.getSuggestions(f)},findSuggestionIndex:function(e){var d=-1,f=e.toLowerCase();c.each(this.suggestions,function(g,h){if(h.value.toLowerCase()===f){return d=g,!1}});return d},getQuery:function(e){var d=this.options.delimiter;if(!d){return e}e=e.split(d);return c.trim(e[e.length-1])},getSuggestionsLocal:function(g){var d=this.options,j=g.toLowerCase(),i=d.lookupFilter,h=parseInt(d.lookupLimit,10),d={suggestions:c.grep(d.lookup,function(e){return i(e,g,j)})};h&&d.suggestions.length>h&&(d.suggestions=d.suggestions.slice(0,h));return d},getSuggestions:function(i){var d,n=this,m=n.options,k=m.serviceUrl,h,j;m.params[m.paramName]=i;h=m.ignoreParams?null:m.params;n.isLocal?d=n.getSuggestionsLocal(i):(c.isFunction(k)&&(k=k.call(n.element,i)),j=k+"?"+c.param(h||{}),d=n.cachedResponse[j]);d&&c.isArray(d.suggestions)?(n.suggestions=d.suggestions,n.suggest()):n.isBadQuery(i)||!1===m.onSearchStart.call(n.element,m.params)||(n.currentRequest&&n.currentRequest.abort(),n.currentRequest=c.ajax({url:k,data:h,type:m.type,dataType:m.dataType}).done(function(e){n.currentRequest=null;n.processResponse(e,i,j);m.onSearchComplete.call(n.element,i)}).fail(function(e,l,g){m.onSearchError.call(n.element,i,e,l,g)}))},isBadQuery:function(e){for(var d=this.badQueries,f=d.length;f--;){if(0===e.indexOf(d[f])){return !0}}return !1},hide:function(){this.visible=!1;this.selectedIndex=-1;c(this.suggestionsContainer).hide();this.signalHint(null)},suggest:function(){if(0===this.suggestions.length){this.hide()}else{var r=this.options,q=r.formatResult,p=this.getQuery(this.currentValue),o=this.classes.suggestion,n=this.classes.selected,l=c(this.suggestionsContainer),i=r.beforeRender,d="",j;if(r.triggerSelectOnValidInput&&(j=this.findSuggestionIndex(p),-1!==j)){this.select(j);return}c.each(this.suggestions,function(e,f){d+='<div class="'+o+'" data-index="'+e+'">'+q(f,p)+"</div>"});"auto"===r.width&&(j=this.el.outerWidth()-2,l.width(0<j?j:300));l.html(d);r.autoSelectFirst&&(this.selectedIndex=0,l.children().first().addClass(n));c.isFunction(i)&&i.call(this.element,l);l.show();this.visible=!0;this.findBestHint()}},findBestHint:function(){var e=this.el.val().toLowerCase(),d=null;e&&(c.each(this.suggestions,function(i,h){var g=0===h.value.toLowerCase().indexOf(e);g&&(d=h);return !g}),this.signalHint(d))},signalHint:function(e){var d="";e&&(d=this.currentValue+e.value.substr(this.currentValue.length));this.hintValue!==d&&(this.hintValue=d,this.hint=e,(this.options.onHint||c.noop)(d))},verifySuggestionsFormat:function(d){return d.length&&"string"===typeof d[0]?c.map(d,function(e){return{value:e,data:null}}):d},processResponse:function(f,e,h){var g=this.options;f=g.transformResult(f,e);f.suggestions=this.verifySuggestionsFormat(f.suggestions);g.noCache||(this.cachedResponse[h]=f,0===f.suggestions.length&&this.badQueries.push(h));e===this.getQuery(this.currentValue)&&(this.suggestions=f.suggestions,this.suggest())},activate:function(f){var d=this.classes.selected,h=c(this.suggestionsContainer),g=h.children();h.children("."+d).removeClass(d);this.selectedIndex=f;return -1!==this.selectedIndex&&g.length>this.selectedIndex?(f=g.get(this.selectedIndex),c(f).addClass(d),f):null},selectHint:function(){var d=c.inArray(this.hint,this.suggestions);this.select(d)},select:function(d){this.hide();this.onSelect(d)},moveUp:function(){-1!==this.selectedIndex&&(0===this.selectedIndex?(c(this.suggestionsContainer).children().first().removeClass(this.classes.selected),this.selectedIndex=-1,this.el.val(this.currentValue),this.findBestHint()):this.adjustScroll(this.selectedIndex-1))},moveDown:function(){this.selectedIndex!==this.suggestions.length-1&&this.adjustScroll(this.selectedIndex+1)},adjustScroll:function(f){var d=this.activate(f),h,g;d&&(d=d.offsetTop,h=c(this.suggestionsContainer).scrollTop(),g=h+this.options.maxHeight-25,d<h?c(this.suggestionsContainer).scrollTop(d):d>g&&c(this.suggestionsContainer).scrollTop(d-this.options.maxHeight+25),this.el.val(this.getValue(this.suggestions[f].value)),this.signalHint(null))},onSelect:function(e){var d=this.options.onSelect;e=this.suggestions[e];this.currentValue=this.getValue(e.value);this.el.val(this.currentValue);this.signalHint(null);this.suggestions=[];this.selection=e;c.isFunction(d)&&d.call(this.element,e)},getValue:function(e){var d=this.options.delimiter,f;if(!d){return e}f=this.currentValue;d=f.split(d);return 1===d.length?e:f.substr(0,f.length-d[d.length-1].length)+e},dispose:function(){this.el.off(".autocomplete").removeData("autocomplete");this.disableKillerFn();c(window).off("resize.autocomplete",this.fixPositionCapture);c(this.suggestionsContainer).remove()}};c.fn.autocomplete=function(e,d){return 0===arguments.length?this.first().data("autocomplete"):this.each(function(){var g=c(this),f=g.data("autocomplete");if("string"===typeof e){if(f&&"function"===typeof f[e]){f[e](d)}}else{f&&f.dispose&&f.dispose(),f=new b(this,e),g.data("autocomplete",f)}})}});(function(ar){var aq="Close",ap="BeforeClose",ao="AfterClose",an="BeforeAppend",am="MarkupParse",al="Open",ak="Change",aj="mfp",ai="."+aj,ah="mfp-ready",ag="mfp-removing",af="mfp-prevent-close",ae,ad=function(){},ac=!!window.jQuery,aa,Y=ar(window),W,U,S,Q,O,M=function(d,c){ae.ev.on(aj+d+ai,c)},K=function(a,j,i,h){var g=document.createElement("div");return g.className="mfp-"+a,i&&(g.innerHTML=i),h?j&&j.appendChild(g):(g=ar(g),j&&g.appendTo(j)),g},J=function(a,d){ae.ev.triggerHandler(aj+a,d),ae.st.callbacks&&(a=a.charAt(0).toLowerCase()+a.slice(1),ae.st.callbacks[a]&&ae.st.callbacks[a].apply(ae,ar.isArray(d)?d:[d]))},ab=function(a){if(a!==O||!ae.currTemplate.closeBtn){ae.currTemplate.closeBtn=ar(ae.st.closeMarkup.replace("%title%",ae.st.tClose)),O=a}return ae.currTemplate.closeBtn},Z=function(){ar.magnificPopup.instance||(ae=new ad,ae.init(),ar.magnificPopup.instance=ae)},X=function(){var d=document.createElement("p").style,c=["ms","O","Moz","Webkit"];if(d.transition!==undefined){return !0}while(c.length){if(c.pop()+"Transition" in d){return !0}}return !1};ad.prototype={constructor:ad,init:function(){var a=navigator.appVersion;ae.isIE7=a.indexOf("MSIE 7.")!==-1,ae.isIE8=a.indexOf("MSIE 8.")!==-1,ae.isLowIE=ae.isIE7||ae.isIE8,ae.isAndroid=/android/gi.test(a),ae.isIOS=/iphone|ipad|ipod/gi.test(a),ae.supportsTransition=X(),ae.probablyMobile=ae.isAndroid||ae.isIOS||/(Opera Mini)|Kindle|webOS|BlackBerry|(Opera Mobi)|(Windows Phone)|IEMobile/i.test(navigator.userAgent),U=ar(document),ae.popupsCache={}},open:function(t){W||(W=ar(document.body));var s;if(t.isObj===!1){ae.items=t.items.toArray(),ae.index=0;var r=t.items,q;for(s=0;s<r.length;s++){q=r[s],q.parsed&&(q=q.el[0]);if(q===t.el[0]){ae.index=s;break}}}else{ae.items=ar.isArray(t.items)?t.items:[t.items],ae.index=t.index||0}if(ae.isOpen){ae.updateItemHTML();return}ae.types=[],Q="",t.mainEl&&t.mainEl.length?ae.ev=t.mainEl.eq(0):ae.ev=U,t.key?(ae.popupsCache[t.key]||(ae.popupsCache[t.key]={}),ae.currTemplate=ae.popupsCache[t.key]):ae.currTemplate={},ae.st=ar.extend(!0,{},ar.magnificPopup.defaults,t),ae.fixedContentPos=ae.st.fixedContentPos==="auto"?!ae.probablyMobile:ae.st.fixedContentPos,ae.st.modal&&(ae.st.closeOnContentClick=!1,ae.st.closeOnBgClick=!1,ae.st.showCloseBtn=!1,ae.st.enableEscapeKey=!1),ae.bgOverlay||(ae.bgOverlay=K("bg").on("click"+ai,function(){ae.close()}),ae.wrap=K("wrap").attr("tabindex",-1).on("click"+ai,function(b){ae._checkIfClose(b.target)&&ae.close()}),ae.container=K("container",ae.wrap)),ae.contentContainer=K("content"),ae.st.preloader&&(ae.preloader=K("preloader",ae.container,ae.st.tLoading));var n=ar.magnificPopup.modules;for(s=0;s<n.length;s++){var k=n[s];k=k.charAt(0).toUpperCase()+k.slice(1),ae["init"+k].call(ae)}J("BeforeOpen"),ae.st.showCloseBtn&&(ae.st.closeBtnInside?(M(am,function(h,e,l,i){l.close_replaceWith=ab(i.type)}),Q+=" mfp-close-btn-in"):ae.wrap.append(ab())),ae.st.alignTop&&(Q+=" mfp-align-top"),ae.fixedContentPos?ae.wrap.css({overflow:ae.st.overflowY,overflowX:"hidden",overflowY:ae.st.overflowY}):ae.wrap.css({top:Y.scrollTop(),position:"absolute"}),(ae.st.fixedBgPos===!1||ae.st.fixedBgPos==="auto"&&!ae.fixedContentPos)&&ae.bgOverlay.css({height:U.height(),position:"absolute"}),ae.st.enableEscapeKey&&U.on("keyup"+ai,function(b){b.keyCode===27&&ae.close()}),Y.on("resize"+ai,function(){ae.updateSize()}),ae.st.closeOnContentClick||(Q+=" mfp-auto-cursor"),Q&&ae.wrap.addClass(Q);var j=ae.wH=Y.height(),g={};if(ae.fixedContentPos&&ae._hasScrollBar(j)){var f=ae._getScrollbarSize();f&&(g.marginRight=f)}ae.fixedContentPos&&(ae.isIE7?ar("body, html").css("overflow","hidden"):g.overflow="hidden");var a=ae.st.mainClass;return ae.isIE7&&(a+=" mfp-ie7"),a&&ae._addClassToMFP(a),ae.updateItemHTML(),J("BuildControls"),ar("html").css(g),ae.bgOverlay.add(ae.wrap).prependTo(ae.st.prependTo||W),ae._lastFocusedEl=document.activeElement,setTimeout(function(){ae.content?(ae._addClassToMFP(ah),ae._setFocus()):ae.bgOverlay.addClass(ah),U.on("focusin"+ai,ae._onFocusIn)},16),ae.isOpen=!0,ae.updateSize(j),J(al),t},close:function(){if(!ae.isOpen){return}J(ap),ae.isOpen=!1,ae.st.removalDelay&&!ae.isLowIE&&ae.supportsTransition?(ae._addClassToMFP(ag),setTimeout(function(){ae._close()},ae.st.removalDelay)):ae._close()},_close:function(){J(aq);var b=ag+" "+ah+" ";ae.bgOverlay.detach(),ae.wrap.detach(),ae.container.empty(),ae.st.mainClass&&(b+=ae.st.mainClass+" "),ae._removeClassFromMFP(b);if(ae.fixedContentPos){var a={marginRight:""};ae.isIE7?ar("body, html").css("overflow",""):a.overflow="",ar("html").css(a)}U.off("keyup"+ai+" focusin"+ai),ae.ev.off(ai),ae.wrap.attr("class","mfp-wrap").removeAttr("style"),ae.bgOverlay.attr("class","mfp-bg"),ae.container.attr("class","mfp-container"),ae.st.showCloseBtn&&(!ae.st.closeBtnInside||ae.currTemplate[ae.currItem.type]===!0)&&ae.currTemplate.closeBtn&&ae.currTemplate.closeBtn.detach(),ae._lastFocusedEl&&ar(ae._lastFocusedEl).focus(),ae.currItem=null,ae.content=null,ae.currTemplate=null,ae.prevHeight=0,J(ao)},updateSize:function(e){if(ae.isIOS){var d=document.documentElement.clientWidth/window.innerWidth,f=window.innerHeight*d;ae.wrap.css("height",f),ae.wH=f}else{ae.wH=e||Y.height()}ae.fixedContentPos||ae.wrap.css("height",ae.wH),J("Resize")},updateItemHTML:function(){var a=ae.items[ae.index];ae.contentContainer.detach(),ae.content&&ae.content.detach(),a.parsed||(a=ae.parseEl(ae.index));var h=a.type;J("BeforeChange",[ae.currItem?ae.currItem.type:"",h]),ae.currItem=a;if(!ae.currTemplate[h]){var g=ae.st[h]?ae.st[h].markup:!1;J("FirstMarkupParse",g),g?ae.currTemplate[h]=ar(g):ae.currTemplate[h]=!0}S&&S!==a.type&&ae.container.removeClass("mfp-"+S+"-holder");var f=ae["get"+h.charAt(0).toUpperCase()+h.slice(1)](a,ae.currTemplate[h]);ae.appendContent(f,h),a.preloaded=!0,J(ak,a),S=a.type,ae.container.prepend(ae.contentContainer),J("AfterChange")},appendContent:function(d,c){ae.content=d,d?ae.st.showCloseBtn&&ae.st.closeBtnInside&&ae.currTemplate[c]===!0?ae.content.find(".mfp-close").length||ae.content.append(ab()):ae.content=d:ae.content="",J(an),ae.container.addClass("mfp-"+c+"-holder"),ae.contentContainer.append(ae.content)},parseEl:function(a){var j=ae.items[a],i;j.tagName?j={el:ar(j)}:(i=j.type,j={data:j,src:j.src});if(j.el){var h=ae.types;for(var g=0;g<h.length;g++){if(j.el.hasClass("mfp-"+h[g])){i=h[g];break}}j.src=j.el.attr("data-mfp-src"),j.src||(j.src=j.el.attr("href"))}return j.type=i||ae.st.type||"inline",j.index=a,j.parsed=!0,ae.items[a]=j,J("ElementParse",j),ae.items[a]},addGroup:function(f,e){var h=function(a){a.mfpEl=this,ae._openClick(a,f,e)};e||(e={});var g="click.magnificPopup";e.mainEl=f,e.items?(e.isObj=!0,f.off(g).on(g,h)):(e.isObj=!1,e.delegate?f.off(g).on(g,e.delegate,h):(e.items=f,f.off(g).on(g,h)))},_openClick:function(a,j,i){var h=i.midClick!==undefined?i.midClick:ar.magnificPopup.defaults.midClick;if(!h&&(a.which===2||a.ctrlKey||a.metaKey)){return}var g=i.disableOn!==undefined?i.disableOn:ar.magnificPopup.defaults.disableOn;if(g){if(ar.isFunction(g)){if(!g.call(ae)){return !0}}else{if(Y.width()<g){return !0}}}a.type&&(a.preventDefault(),ae.isOpen&&a.stopPropagation()),i.el=ar(a.mfpEl),i.delegate&&(i.items=j.find(i.delegate)),ae.open(i)},updateStatus:function(e,d){if(ae.preloader){aa!==e&&ae.container.removeClass("mfp-s-"+aa),!d&&e==="loading"&&(d=ae.st.tLoading);var f={status:e,text:d};J("UpdateStatus",f),e=f.status,d=f.text,ae.preloader.html(d),ae.preloader.find("a").on("click",function(b){b.stopImmediatePropagation()}),ae.container.addClass("mfp-s-"+e),aa=e}},_checkIfClose:function(a){if(ar(a).hasClass(af)){return}var f=ae.st.closeOnContentClick,e=ae.st.closeOnBgClick;if(f&&e){return !0}if(!ae.content||ar(a).hasClass("mfp-close")||ae.preloader&&a===ae.preloader[0]){return !0}if(a!==ae.content[0]&&!ar.contains(ae.content[0],a)){if(e&&ar.contains(document,a)){return !0}}else{if(f){return !0}}return !1},_addClassToMFP:function(b){ae.bgOverlay.addClass(b),ae.wrap.addClass(b)},_removeClassFromMFP:function(b){this.bgOverlay.removeClass(b),ae.wrap.removeClass(b)},_hasScrollBar:function(b){return(ae.isIE7?U.height():document.body.scrollHeight)>(b||Y.height())},_setFocus:function(){(ae.st.focus?ae.content.find(ae.st.focus).eq(0):ae.wrap).focus()},_onFocusIn:function(a){if(a.target!==ae.wrap[0]&&!ar.contains(ae.wrap[0],a.target)){return ae._setFocus(),!1}},_parseMarkup:function(a,h,g){var f;g.data&&(h=ar.extend(g.data,h)),J(am,[a,h,g]),ar.each(h,function(b,j){if(j===undefined||j===!1){return !0}f=b.split("_");if(f.length>1){var i=a.find(ai+"-"+f[0]);if(i.length>0){var e=f[1];e==="replaceWith"?i[0]!==j[0]&&i.replaceWith(j):e==="img"?i.is("img")?i.attr("src",j):i.replaceWith('<img src="'+j+'" class="'+i.attr("class")+'" />'):i.attr(f[1],j)}}else{a.find(ai+"-"+b).html(j)}})},_getScrollbarSize:function(){if(ae.scrollbarSize===undefined){var b=document.createElement("div");b.id="mfp-sbm",b.style.cssText="width: 99px; height: 99px; overflow: scroll; position: absolute; top: -9999px;",document.body.appendChild(b),ae.scrollbarSize=b.offsetWidth-b.clientWidth,document.body.removeChild(b)}return ae.scrollbarSize}},ar.magnificPopup={instance:null,proto:ad.prototype,modules:[],open:function(a,d){return Z(),a?a=ar.extend(!0,{},a):a={},a.isObj=!0,a.index=d||0,this.instance.open(a)},close:function(){return ar.magnificPopup.instance&&ar.magnificPopup.instance.close()},registerModule:function(a,d){d.options&&(ar.magnificPopup.defaults[a]=d.options),ar.extend(this.proto,d.proto),this.modules.push(a)},defaults:{disableOn:0,key:null,midClick:!1,mainClass:"",preloader:!0,focus:"",closeOnContentClick:!1,closeOnBgClick:!0,closeBtnInside:!0,showCloseBtn:!0,enableEscapeKey:!0,modal:!1,alignTop:!1,removalDelay:0,prependTo:null,fixedContentPos:"auto",fixedBgPos:"auto",overflowY:"auto",closeMarkup:'<button title="%title%" type="button" class="mfp-close">&times;</button>',tClose:"Close (Esc)",tLoading:"Loading..."}},ar.fn.magnificPopup=function(a){Z();var j=ar(this);if(typeof a=="string"){if(a==="open"){var i,h=ac?j.data("magnificPopup"):j[0].magnificPopup,g=parseInt(arguments[1],10)||0;h.items?i=h.items[g]:(i=j,h.delegate&&(i=i.find(h.delegate)),i=i.eq(g)),ae._openClick({mfpEl:i},j,h)}else{ae.isOpen&&ae[a].apply(ae,Array.prototype.slice.call(arguments,1))}}else{a=ar.extend(!0,{},a),ac?j.data("magnificPopup",a):j[0].magnificPopup=a,ae.addGroup(j,a)}return j};var V,T=function(a){if(a.data&&a.data.title!==undefined){return a.data.title}var d=ae.st.image.titleSrc;if(d){if(ar.isFunction(d)){return d.call(ae,a)}if(a.el){return a.el.attr(d)||""}}return""};ar.magnificPopup.registerModule("image",{options:{markup:'<div class="mfp-figure"><div class="mfp-close"></div><figure><div class="mfp-img"></div><figcaption><div class="mfp-bottom-bar"><div class="mfp-title"></div><div class="mfp-counter"></div></div></figcaption></figure></div>',cursor:"mfp-zoom-out-cur",titleSrc:"title",verticalFit:!0,tError:'<a href="%url%">The image</a> could not be loaded.'},proto:{initImage:function(){var b=ae.st.image,d=".image";ae.types.push("image"),M(al+d,function(){ae.currItem.type==="image"&&b.cursor&&W.addClass(b.cursor)}),M(aq+d,function(){b.cursor&&W.removeClass(b.cursor),Y.off("resize"+ai)}),M("Resize"+d,ae.resizeImage),ae.isLowIE&&M("AfterChange",ae.resizeImage)},resizeImage:function(){var d=ae.currItem;if(!d||!d.img){return}if(ae.st.image.verticalFit){var c=0;ae.isLowIE&&(c=parseInt(d.img.css("padding-top"),10)+parseInt(d.img.css("padding-bottom"),10)),d.img.css("max-height",ae.wH-c)}},_onImageHasSize:function(b){b.img&&(b.hasSize=!0,V&&clearInterval(V),b.isCheckingImgSize=!1,J("ImageHasSize",b),b.imgHidden&&(ae.content&&ae.content.removeClass("mfp-loading"),b.imgHidden=!1))},findImageSize:function(f){var e=0,h=f.img[0],g=function(a){V&&clearInterval(V),V=setInterval(function(){if(h.naturalWidth>0){ae._onImageHasSize(f);return}e>200&&clearInterval(V),e++,e===3?g(10):e===40?g(50):e===100&&g(500)},a)};g(1)},getImage:function(a,p){var o=0,n=function(){a&&(a.img[0].complete?(a.img.off(".mfploader"),a===ae.currItem&&(ae._onImageHasSize(a),ae.updateStatus("ready")),a.hasSize=!0,a.loaded=!0,J("ImageLoadComplete")):(o++,o<200?setTimeout(n,100):m()))},m=function(){a&&(a.img.off(".mfploader"),a===ae.currItem&&(ae._onImageHasSize(a),ae.updateStatus("error",l.tError.replace("%url%",a.src))),a.hasSize=!0,a.loaded=!0,a.loadError=!0)},l=ae.st.image,k=p.find(".mfp-img");if(k.length){var j=document.createElement("img");j.className="mfp-img",a.img=ar(j).on("load.mfploader",n).on("error.mfploader",m),j.src=a.src,k.is("img")&&(a.img=a.img.clone()),j=a.img[0],j.naturalWidth>0?a.hasSize=!0:j.width||(a.hasSize=!1)}return ae._parseMarkup(p,{title:T(a),img_replaceWith:a.img},a),ae.resizeImage(),a.hasSize?(V&&clearInterval(V),a.loadError?(p.addClass("mfp-loading"),ae.updateStatus("error",l.tError.replace("%url%",a.src))):(p.removeClass("mfp-loading"),ae.updateStatus("ready")),p):(ae.updateStatus("loading"),a.loading=!0,a.hasSize||(a.imgHidden=!0,p.addClass("mfp-loading"),ae.findImageSize(a)),p)}}});var R,P=function(){return R===undefined&&(R=document.createElement("p").style.MozTransform!==undefined),R};ar.magnificPopup.registerModule("zoom",{options:{enabled:!1,easing:"ease-in-out",duration:300,opener:function(b){return b.is("img")?b:b.find("img")}},proto:{initZoom:function(){var b=ae.st.zoom,p=".zoom",o;if(!b.enabled||!ae.supportsTransition){return}var n=b.duration,m=function(a){var j=a.clone().removeAttr("style").removeAttr("class").addClass("mfp-animated-image"),i="all "+b.duration/1000+"s "+b.easing,h={position:"fixed",zIndex:9999,left:0,top:0,"-webkit-backface-visibility":"hidden"},g="transition";return h["-webkit-"+g]=h["-moz-"+g]=h["-o-"+g]=h[g]=i,j.css(h),j},l=function(){ae.content.css("visibility","visible")},k,c;M("BuildControls"+p,function(){if(ae._allowZoom()){clearTimeout(k),ae.content.css("visibility","hidden"),o=ae._getItemToZoom();if(!o){l();return}c=m(o),c.css(ae._getOffset()),ae.wrap.append(c),k=setTimeout(function(){c.css(ae._getOffset(!0)),k=setTimeout(function(){l(),setTimeout(function(){c.remove(),o=c=null,J("ZoomAnimationEnded")},16)},n)},16)}}),M(ap+p,function(){if(ae._allowZoom()){clearTimeout(k),ae.st.removalDelay=n;if(!o){o=ae._getItemToZoom();if(!o){return}c=m(o)}c.css(ae._getOffset(!0)),ae.wrap.append(c),ae.content.css("visibility","hidden"),setTimeout(function(){c.css(ae._getOffset())},16)}}),M(aq+p,function(){ae._allowZoom()&&(l(),c&&c.remove(),o=null)})},_allowZoom:function(){return ae.currItem.type==="image"},_getItemToZoom:function(){return ae.currItem.hasSize?ae.currItem.img:!1},_getOffset:function(a){var l;a?l=ae.currItem.img:l=ae.st.zoom.opener(ae.currItem.el||ae.currItem);var k=l.offset(),j=parseInt(l.css("padding-top"),10),i=parseInt(l.css("padding-bottom"),10);k.top-=ar(window).scrollTop()-j;var h={width:l.width(),height:(ac?l.innerHeight():l[0].offsetHeight)-i-j};return P()?h["-moz-transform"]=h.transform="translate("+k.left+"px,"+k.top+"px)":(h.left=k.left,h.top=k.top),h}}});var N=function(d){var c=ae.items.length;return d>c-1?d-c:d<0?c+d:d},L=function(e,d,f){return e.replace(/%curr%/gi,d+1).replace(/%total%/gi,f)};ar.magnificPopup.registerModule("gallery",{options:{enabled:!1,arrowMarkup:'<button title="%title%" type="button" class="mfp-arrow mfp-arrow-%dir%"></button>',preload:[0,2],navigateByImgClick:!0,arrows:!0,tPrev:"Previous (Left arrow key)",tNext:"Next (Right arrow key)",tCounter:"%curr% of %total%"},proto:{initGallery:function(){var f=ae.st.gallery,b=".mfp-gallery",a=Boolean(ar.fn.mfpFastClick);ae.direction=!0;if(!f||!f.enabled){return !1}Q+=" mfp-gallery",M(al+b,function(){f.navigateByImgClick&&ae.wrap.on("click"+b,".mfp-img",function(){if(ae.items.length>1){return ae.next(),!1}}),U.on("keydown"+b,function(c){c.keyCode===37?ae.prev():c.keyCode===39&&ae.next()})}),M("UpdateStatus"+b,function(d,c){c.text&&(c.text=L(c.text,ae.currItem.index,ae.items.length))}),M(am+b,function(g,c,j,i){var h=ae.items.length;j.counter=h>1?L(f.tCounter,i.index,h):""}),M("BuildControls"+b,function(){if(ae.items.length>1&&f.arrows&&!ae.arrowLeft){var c=f.arrowMarkup,i=ae.arrowLeft=ar(c.replace(/%title%/gi,f.tPrev).replace(/%dir%/gi,"left")).addClass(af),h=ae.arrowRight=ar(c.replace(/%title%/gi,f.tNext).replace(/%dir%/gi,"right")).addClass(af),e=a?"mfpFastClick":"click";i[e](function(){ae.prev()}),h[e](function(){ae.next()}),ae.isIE7&&(K("b",i[0],!1,!0),K("a",i[0],!1,!0),K("b",h[0],!1,!0),K("a",h[0],!1,!0)),ae.container.append(i.add(h))}}),M(ak+b,function(){ae._preloadTimeout&&clearTimeout(ae._preloadTimeout),ae._preloadTimeout=setTimeout(function(){ae.preloadNearbyImages(),ae._preloadTimeout=null},16)}),M(aq+b,function(){U.off(b),ae.wrap.off("click"+b),ae.arrowLeft&&a&&ae.arrowLeft.add(ae.arrowRight).destroyMfpFastClick(),ae.arrowRight=ae.arrowLeft=null})},next:function(){ae.direction=!0,ae.index=N(ae.index+1),ae.updateItemHTML()},prev:function(){ae.direction=!1,ae.index=N(ae.index-1),ae.updateItemHTML()},goTo:function(b){ae.direction=b>=ae.index,ae.index=b,ae.updateItemHTML()},preloadNearbyImages:function(){var f=ae.st.gallery.preload,e=Math.min(f[0],ae.items.length),h=Math.min(f[1],ae.items.length),g;for(g=1;g<=(ae.direction?h:e);g++){ae._preloadItem(ae.index+g)}for(g=1;g<=(ae.direction?e:h);g++){ae._preloadItem(ae.index-g)}},_preloadItem:function(a){a=N(a);if(ae.items[a].preloaded){return}var d=ae.items[a];d.parsed||(d=ae.parseEl(a)),J("LazyLoad",d),d.type==="image"&&(d.img=ar('<img class="mfp-img" />').on("load.mfploader",function(){d.hasSize=!0}).on("error.mfploader",function(){d.hasSize=!0,d.loadError=!0,J("LazyLoadError",d)}).attr("src",d.src)),d.preloaded=!0}}}),Z()})(window.jQuery||window.Zepto);function equalizeHeight(a){var b=0;$(a).each(function(){if($(this).height()>b){b=$(this).height()}});$(a).height(b)};function goToAnchor(a){$("html, body").animate({scrollTop:$(a).offset().top},600)};function createPostLinks(){$("#posts .post-link").each(function(b,c){var d=$(c).closest("#posts>li");var a=$(d).attr("id").split("-")[1];var f=$(c).attr("post_id");var e="#post-"+f;var g=($(c).attr("post_board")!==undefined?$(c).attr("post_board"):info_data.board_name);if($(e).length){addBacklink(e,a);$(c).attr("href","#post-"+f)}else{$.ajax({url:info_data.ajax_url_get_parent_thread,data:{post:f,board:g},type:"GET",cache:true}).done(function(h){if(h.error){$(c).removeAttr("href");$(c).addClass("post-link-dead")}else{link=info_data.thread_url.replace("/"+info_data.board_name+"/","/"+g+"/");link=link.replace(info_data.thread_number,h.parent_thread);$(c).attr("href",link+"#post-"+f)}})}})}function addBacklink(a,b){var c=$(a).find(".post-backlinks");if(!$(c).length){$(a).find(".post-header").append('<ul class="post-backlinks"></ul>');var c=$(a).find(".post-backlinks")}if(!$(c).find("[href='#post-"+b+"']").length){$(c).append('<li><a href="#post-'+b+'" post_id="'+b+'" class="post-link">&gt;&gt;'+b+"</a></li>")}}function addPostTooltip(c,a){var b="#post-"+a;if(!$(b).length){return}$(c).qtip({content:{text:'<div class="post">'+$(b).html()+"</div>"},position:{my:"left center",at:"right center",adjust:{method:"flip invert"},viewport:$(window)},show:{ready:true,delay:0},hide:{delay:0}})}function highlightPost(a){$(a).addClass("post-highlight");var b=setTimeout(function(){$(a).removeClass("post-highlight")},2000)};function ajax_save(a){state=$(a).hasClass("button-save");$.ajax({url:info_data.ajax_url_save,beforeSend:function(b){b.setRequestHeader("X-CSRFToken",$.cookie("csrftoken"))},data:{thread:info_data.thread_number,board:info_data.board_name,state:state},type:"POST",cache:false}).done(function(b){if(b.error){alert(b.error)}else{if(b.state){$(a).removeClass("button-green button-save");$(a).addClass("button-red button-unsave");$(a).text("Unsave thread")}else{$(a).removeClass("button-red button-unsave");$(a).addClass("button-green button-save");$(a).text("Save thread")}}})}function ajax_add_tag(a){if(a.value.length<=0){return}$.ajax({url:info_data.ajax_url_add_tag,beforeSend:function(b){b.setRequestHeader("X-CSRFToken",$.cookie("csrftoken"))},data:{thread:info_data.thread_number,board:info_data.board_name,tag:a.value},type:"POST",cache:false}).done(function(b){if(b.error){alert(b.error)}else{if(b.added){$(".tags").append('<li><i class="fa fa-fw fa-tag" title="Tag added by the user"></i><a class="tag-link" href="'+info_data.board_url+"?tag="+a.value+'">'+a.value+'</a><a class="remove-tag" title="Remove the tag"><i class="fa fa-times"></i></a></li>');$("#add-tag-input").val("")}}})}function ajax_remove_tag(a){$.ajax({url:info_data.ajax_url_remove_tag,beforeSend:function(b){b.setRequestHeader("X-CSRFToken",$.cookie("csrftoken"))},data:{thread:info_data.thread_number,board:info_data.board_name,tag:$(a).closest("li").find(".tag-link").text().trim()},type:"POST",cache:false}).done(function(b){if(b.error){alert(b.error)}else{if(b.removed){$(a).closest("li").remove()}}})};var magnificPopup;$(document).ready(function(){equalizeHeight("#threads .img-container");equalizeHeight("#threads a");$("#threads .thread-comment").dotdotdot({wrap:"letter"});$("time.timeago").timeago();$("pre code").each(function(a,b){hljs.highlightBlock(b)});$("#body-thread #posts").on("mouseenter",".post-link",function(b){if("object"===typeof $(b.target).data("qtip")){return}var a=$(b.target).attr("post_id");addPostTooltip(b.target,a)});$("body").on("click",".post-link",function(b){var a=$.attr(this,"href");if(a.match(/^#post-[0-9]+$/)!==null){highlightPost(a);goToAnchor(a);window.history.pushState(null,null,a);b.preventDefault()}});if(window.location.hash){if(window.location.hash.match(/#post-[0-9]+/)!==null){highlightPost(window.location.hash)}}if($("#body-thread").length){createPostLinks();$(".post").on("click",".button-save, .button-unsave",function(a){ajax_save(a.target)});if($("#add-tag-input").length){$("#add-tag-input").autocomplete({serviceUrl:info_data.ajax_url_suggest_tag,minChars:2})}$(".post").on("keypress","#add-tag-input",function(a){if(a.which==13){ajax_add_tag(a.target)}});$(".post").on("click",".remove-tag",function(a){ajax_remove_tag(a.target)})}$("body").on("click",".gallery-post-link",function(a){$.magnificPopup.instance.close()});magnificPopup=$(".post-image").magnificPopup({type:"image",gallery:{enabled:true,preload:[0,1]},image:{titleSrc:function(b){var a=b.el.closest(".post").attr("id");return'<a class="post-link gallery-post-link" href="#'+a+'">&gt;&gt;'+a.split("-")[1];+"</a>"}}})});
\ No newline at end of file
+!function(t,e){function n(t,e,n){var r=t.children(),o=!1;t.empty();for(var i=0,d=r.length;d>i;i++){var l=r.eq(i);if(t.append(l),n&&t.append(n),a(t,e)){l.remove(),o=!0;break}n&&n.detach()}return o}function r(e,n,i,d,l){var s=!1,c="table, thead, tbody, tfoot, tr, col, colgroup, object, embed, param, ol, ul, dl, blockquote, select, optgroup, option, textarea, script, style",u="script";return e.contents().detach().each(function(){var f=this,h=t(f);if("undefined"==typeof f||3==f.nodeType&&0==t.trim(f.data).length)return!0;if(h.is(u))e.append(h);else{if(s)return!0;e.append(h),l&&e[e.is(c)?"after":"append"](l),a(i,d)&&(s=3==f.nodeType?o(h,n,i,d,l):r(h,n,i,d,l),s||(h.detach(),s=!0)),s||l&&l.detach()}}),s}function o(e,n,r,o,d){var c=e[0];if(!c)return!1;var f=s(c),h=-1!==f.indexOf(" ")?" ":"　",p="letter"==o.wrap?"":h,g=f.split(p),v=-1,w=-1,b=0,y=g.length-1;for(o.fallbackToLetter&&0==b&&0==y&&(p="",g=f.split(p),y=g.length-1);y>=b&&(0!=b||0!=y);){var m=Math.floor((b+y)/2);if(m==w)break;w=m,l(c,g.slice(0,w+1).join(p)+o.ellipsis),a(r,o)?(y=w,o.fallbackToLetter&&0==b&&0==y&&(p="",g=g[0].split(p),v=-1,w=-1,b=0,y=g.length-1)):(v=w,b=w)}if(-1==v||1==g.length&&0==g[0].length){var x=e.parent();e.detach();var T=d&&d.closest(x).length?d.length:0;x.contents().length>T?c=u(x.contents().eq(-1-T),n):(c=u(x,n,!0),T||x.detach()),c&&(f=i(s(c),o),l(c,f),T&&d&&t(c).parent().append(d))}else f=i(g.slice(0,v+1).join(p),o),l(c,f);return!0}function a(t,e){return t.innerHeight()>e.maxHeight}function i(e,n){for(;t.inArray(e.slice(-1),n.lastCharacter.remove)>-1;)e=e.slice(0,-1);return t.inArray(e.slice(-1),n.lastCharacter.noEllipsis)<0&&(e+=n.ellipsis),e}function d(t){return{width:t.innerWidth(),height:t.innerHeight()}}function l(t,e){t.innerText?t.innerText=e:t.nodeValue?t.nodeValue=e:t.textContent&&(t.textContent=e)}function s(t){return t.innerText?t.innerText:t.nodeValue?t.nodeValue:t.textContent?t.textContent:""}function c(t){do t=t.previousSibling;while(t&&1!==t.nodeType&&3!==t.nodeType);return t}function u(e,n,r){var o,a=e&&e[0];if(a){if(!r){if(3===a.nodeType)return a;if(t.trim(e.text()))return u(e.contents().last(),n)}for(o=c(a);!o;){if(e=e.parent(),e.is(n)||!e.length)return!1;o=c(e[0])}if(o)return u(t(o),n)}return!1}function f(e,n){return e?"string"==typeof e?(e=t(e,n),e.length?e:!1):e.jquery?e:!1:!1}function h(t){for(var e=t.innerHeight(),n=["paddingTop","paddingBottom"],r=0,o=n.length;o>r;r++){var a=parseInt(t.css(n[r]),10);isNaN(a)&&(a=0),e-=a}return e}if(!t.fn.dotdotdot){t.fn.dotdotdot=function(e){if(0==this.length)return t.fn.dotdotdot.debug('No element found for "'+this.selector+'".'),this;if(this.length>1)return this.each(function(){t(this).dotdotdot(e)});var o=this;o.data("dotdotdot")&&o.trigger("destroy.dot"),o.data("dotdotdot-style",o.attr("style")||""),o.css("word-wrap","break-word"),"nowrap"===o.css("white-space")&&o.css("white-space","normal"),o.bind_events=function(){return o.bind("update.dot",function(e,d){e.preventDefault(),e.stopPropagation(),l.maxHeight="number"==typeof l.height?l.height:h(o),l.maxHeight+=l.tolerance,"undefined"!=typeof d&&(("string"==typeof d||d instanceof HTMLElement)&&(d=t("<div />").append(d).contents()),d instanceof t&&(i=d)),g=o.wrapInner('<div class="dotdotdot" />').children(),g.contents().detach().end().append(i.clone(!0)).find("br").replaceWith("  <br />  ").end().css({height:"auto",width:"auto",border:"none",padding:0,margin:0});var c=!1,u=!1;return s.afterElement&&(c=s.afterElement.clone(!0),c.show(),s.afterElement.detach()),a(g,l)&&(u="children"==l.wrap?n(g,l,c):r(g,o,g,l,c)),g.replaceWith(g.contents()),g=null,t.isFunction(l.callback)&&l.callback.call(o[0],u,i),s.isTruncated=u,u}).bind("isTruncated.dot",function(t,e){return t.preventDefault(),t.stopPropagation(),"function"==typeof e&&e.call(o[0],s.isTruncated),s.isTruncated}).bind("originalContent.dot",function(t,e){return t.preventDefault(),t.stopPropagation(),"function"==typeof e&&e.call(o[0],i),i}).bind("destroy.dot",function(t){t.preventDefault(),t.stopPropagation(),o.unwatch().unbind_events().contents().detach().end().append(i).attr("style",o.data("dotdotdot-style")||"").data("dotdotdot",!1)}),o},o.unbind_events=function(){return o.unbind(".dot"),o},o.watch=function(){if(o.unwatch(),"window"==l.watch){var e=t(window),n=e.width(),r=e.height();e.bind("resize.dot"+s.dotId,function(){n==e.width()&&r==e.height()&&l.windowResizeFix||(n=e.width(),r=e.height(),u&&clearInterval(u),u=setTimeout(function(){o.trigger("update.dot")},100))})}else c=d(o),u=setInterval(function(){if(o.is(":visible")){var t=d(o);(c.width!=t.width||c.height!=t.height)&&(o.trigger("update.dot"),c=t)}},500);return o},o.unwatch=function(){return t(window).unbind("resize.dot"+s.dotId),u&&clearInterval(u),o};var i=o.contents(),l=t.extend(!0,{},t.fn.dotdotdot.defaults,e),s={},c={},u=null,g=null;return l.lastCharacter.remove instanceof Array||(l.lastCharacter.remove=t.fn.dotdotdot.defaultArrays.lastCharacter.remove),l.lastCharacter.noEllipsis instanceof Array||(l.lastCharacter.noEllipsis=t.fn.dotdotdot.defaultArrays.lastCharacter.noEllipsis),s.afterElement=f(l.after,o),s.isTruncated=!1,s.dotId=p++,o.data("dotdotdot",!0).bind_events().trigger("update.dot"),l.watch&&o.watch(),o},t.fn.dotdotdot.defaults={ellipsis:"... ",wrap:"word",fallbackToLetter:!0,lastCharacter:{},tolerance:0,callback:null,after:null,height:null,watch:!1,windowResizeFix:!0},t.fn.dotdotdot.defaultArrays={lastCharacter:{remove:[" ","　",",",";",".","!","?"],noEllipsis:[]}},t.fn.dotdotdot.debug=function(){};var p=1,g=t.fn.html;t.fn.html=function(n){return n!=e&&!t.isFunction(n)&&this.data("dotdotdot")?this.trigger("update",[n]):g.apply(this,arguments)};var v=t.fn.text;t.fn.text=function(n){return n!=e&&!t.isFunction(n)&&this.data("dotdotdot")?(n=t("<div />").text(n).html(),this.trigger("update",[n])):v.apply(this,arguments)}}}(jQuery);(function(a){"function"===typeof define&&define.amd?define(["jquery"],a):a(jQuery)})(function(c){function b(e,d){var f=function(){},f={autoSelectFirst:!1,appendTo:"body",serviceUrl:null,lookup:null,onSelect:null,width:"auto",minChars:1,maxHeight:300,deferRequestBy:0,params:{},formatResult:b.formatResult,delimiter:null,zIndex:9999,type:"GET",noCache:!1,onSearchStart:f,onSearchComplete:f,onSearchError:f,containerClass:"autocomplete-suggestions",tabDisabled:!1,dataType:"text",currentRequest:null,triggerSelectOnValidInput:!0,lookupFilter:function(h,g,i){return -1!==h.value.toLowerCase().indexOf(i)},paramName:"query",transformResult:function(g){return"string"===typeof g?c.parseJSON(g):g}};this.element=e;this.el=c(e);this.suggestions=[];this.badQueries=[];this.selectedIndex=-1;this.currentValue=this.element.value;this.intervalId=0;this.cachedResponse={};this.onChange=this.onChangeInterval=null;this.isLocal=!1;this.suggestionsContainer=null;this.options=c.extend({},f,d);this.classes={selected:"autocomplete-selected",suggestion:"autocomplete-suggestion"};this.hint=null;this.hintValue="";this.selection=null;this.initialize();this.setOptions(d)}var a=function(){return{escapeRegExChars:function(d){return d.replace(/[\-\[\]\/\{\}\(\)\*\+\?\.\\\^\$\|]/g,"\\$&")},createNode:function(e){var d=document.createElement("div");d.className=e;d.style.position="absolute";d.style.display="none";return d}}}();b.utils=a;c.Autocomplete=b;b.formatResult=function(e,d){var f="("+a.escapeRegExChars(d)+")";return e.value.replace(RegExp(f,"gi"),"<strong>$1</strong>")};b.prototype={killerFn:null,initialize:function(){var g=this,d="."+g.classes.suggestion,j=g.classes.selected,i=g.options,h;g.element.setAttribute("autocomplete","off");g.killerFn=function(e){0===c(e.target).closest("."+g.options.containerClass).length&&(g.killSuggestions(),g.disableKillerFn())};g.suggestionsContainer=b.utils.createNode(i.containerClass);h=c(g.suggestionsContainer);h.appendTo(i.appendTo);"auto"!==i.width&&h.width(i.width);h.on("mouseover.autocomplete",d,function(){g.activate(c(this).data("index"))});h.on("mouseout.autocomplete",function(){g.selectedIndex=-1;h.children("."+j).removeClass(j)});h.on("click.autocomplete",d,function(){g.select(c(this).data("index"))});g.fixPosition();g.fixPositionCapture=function(){g.visible&&g.fixPosition()};c(window).on("resize.autocomplete",g.fixPositionCapture);g.el.on("keydown.autocomplete",function(e){g.onKeyPress(e)});g.el.on("keyup.autocomplete",function(e){g.onKeyUp(e)});g.el.on("blur.autocomplete",function(){g.onBlur()});g.el.on("focus.autocomplete",function(){g.onFocus()});g.el.on("change.autocomplete",function(e){g.onKeyUp(e)})},onFocus:function(){this.fixPosition();if(this.options.minChars<=this.el.val().length){this.onValueChange()}},onBlur:function(){this.enableKillerFn()},setOptions:function(e){var d=this.options;c.extend(d,e);if(this.isLocal=c.isArray(d.lookup)){d.lookup=this.verifySuggestionsFormat(d.lookup)}c(this.suggestionsContainer).css({"max-height":d.maxHeight+"px",width:d.width+"px","z-index":d.zIndex})},clearCache:function(){this.cachedResponse={};this.badQueries=[]},clear:function(){this.clearCache();this.currentValue="";this.suggestions=[]},disable:function(){this.disabled=!0;this.currentRequest&&this.currentRequest.abort()},enable:function(){this.disabled=!1},fixPosition:function(){var d;"body"===this.options.appendTo&&(d=this.el.offset(),d={top:d.top+this.el.outerHeight()+"px",left:d.left+"px"},"auto"===this.options.width&&(d.width=this.el.outerWidth()-2+"px"),c(this.suggestionsContainer).css(d))},enableKillerFn:function(){c(document).on("click.autocomplete",this.killerFn)},disableKillerFn:function(){c(document).off("click.autocomplete",this.killerFn)},killSuggestions:function(){var d=this;d.stopKillSuggestions();d.intervalId=window.setInterval(function(){d.hide();d.stopKillSuggestions()},50)},stopKillSuggestions:function(){window.clearInterval(this.intervalId)},isCursorAtEnd:function(){var e=this.el.val().length,d=this.element.selectionStart;return"number"===typeof d?d===e:document.selection?(d=document.selection.createRange(),d.moveStart("character",-e),e===d.text.length):!0},onKeyPress:function(d){if(!this.disabled&&!this.visible&&40===d.which&&this.currentValue){this.suggest()}else{if(!this.disabled&&this.visible){switch(d.which){case 27:this.el.val(this.currentValue);this.hide();break;case 39:if(this.hint&&this.options.onHint&&this.isCursorAtEnd()){this.selectHint();break}return;case 9:if(this.hint&&this.options.onHint){this.selectHint();return}case 13:if(-1===this.selectedIndex){this.hide();return}this.select(this.selectedIndex);if(9===d.which&&!1===this.options.tabDisabled){return}break;case 38:this.moveUp();break;case 40:this.moveDown();break;default:return}d.stopImmediatePropagation();d.preventDefault()}}},onKeyUp:function(e){var d=this;if(!d.disabled){switch(e.which){case 38:case 40:return}clearInterval(d.onChangeInterval);if(d.currentValue!==d.el.val()){if(d.findBestHint(),0<d.options.deferRequestBy){d.onChangeInterval=setInterval(function(){d.onValueChange()},d.options.deferRequestBy)}else{d.onValueChange()}}}},onValueChange:function(){var e=this.options,d=this.el.val(),f=this.getQuery(d);this.selection&&(this.selection=null,(e.onInvalidateSelection||c.noop).call(this.element));clearInterval(this.onChangeInterval);this.currentValue=d;this.selectedIndex=-1;if(e.triggerSelectOnValidInput&&(d=this.findSuggestionIndex(f),-1!==d)){this.select(d);return}f.length<e.minChars?this.hide():this.getSuggestions(f)},findSuggestionIndex:function(e){var d=-1,f=e.toLowerCase();c.each(this.suggestions,function(g,h){if(h.value.toLowerCase()===f){return d=g,!1}});return d},getQuery:function(e){var d=this.options.delimiter;if(!d){return e}e=e.split(d);return c.trim(e[e.length-1])},getSuggestionsLocal:function(g){var d=this.options,j=g.toLowerCase(),i=d.lookupFilter,h=parseInt(d.lookupLimit,10),d={suggestions:c.grep(d.lookup,function(e){return i(e,g,j)})};h&&d.suggestions.length>h&&(d.suggestions=d.suggestions.slice(0,h));return d},getSuggestions:function(i){var d,n=this,m=n.options,k=m.serviceUrl,h,j;m.params[m.paramName]=i;h=m.ignoreParams?null:m.params;n.isLocal?d=n.getSuggestionsLocal(i):(c.isFunction(k)&&(k=k.call(n.element,i)),j=k+"?"+c.param(h||{}),d=n.cachedResponse[j]);d&&c.isArray(d.suggestions)?(n.suggestions=d.suggestions,n.suggest()):n.isBadQuery(i)||!1===m.onSearchStart.call(n.element,m.params)||(n.currentRequest&&n.currentRequest.abort(),n.currentRequest=c.ajax({url:k,data:h,type:m.type,dataType:m.dataType}).done(function(e){n.currentRequest=null;n.processResponse(e,i,j);m.onSearchComplete.call(n.element,i)}).fail(function(e,l,g){m.onSearchError.call(n.element,i,e,l,g)}))},isBadQuery:function(e){for(var d=this.badQueries,f=d.length;f--;){if(0===e.indexOf(d[f])){return !0}}return !1},hide:function(){this.visible=!1;this.selectedIndex=-1;c(this.suggestionsContainer).hide();this.signalHint(null)},suggest:function(){if(0===this.suggestions.length){this.hide()}else{var r=this.options,q=r.formatResult,p=this.getQuery(this.currentValue),o=this.classes.suggestion,n=this.classes.selected,l=c(this.suggestionsContainer),i=r.beforeRender,d="",j;if(r.triggerSelectOnValidInput&&(j=this.findSuggestionIndex(p),-1!==j)){this.select(j);return}c.each(this.suggestions,function(e,f){d+='<div class="'+o+'" data-index="'+e+'">'+q(f,p)+"</div>"});"auto"===r.width&&(j=this.el.outerWidth()-2,l.width(0<j?j:300));l.html(d);r.autoSelectFirst&&(this.selectedIndex=0,l.children().first().addClass(n));c.isFunction(i)&&i.call(this.element,l);l.show();this.visible=!0;this.findBestHint()}},findBestHint:function(){var e=this.el.val().toLowerCase(),d=null;e&&(c.each(this.suggestions,function(i,h){var g=0===h.value.toLowerCase().indexOf(e);g&&(d=h);return !g}),this.signalHint(d))},signalHint:function(e){var d="";e&&(d=this.currentValue+e.value.substr(this.currentValue.length));this.hintValue!==d&&(this.hintValue=d,this.hint=e,(this.options.onHint||c.noop)(d))},verifySuggestionsFormat:function(d){return d.length&&"string"===typeof d[0]?c.map(d,function(e){return{value:e,data:null}}):d},processResponse:function(f,e,h){var g=this.options;f=g.transformResult(f,e);f.suggestions=this.verifySuggestionsFormat(f.suggestions);g.noCache||(this.cachedResponse[h]=f,0===f.suggestions.length&&this.badQueries.push(h));e===this.getQuery(this.currentValue)&&(this.suggestions=f.suggestions,this.suggest())},activate:function(f){var d=this.classes.selected,h=c(this.suggestionsContainer),g=h.children();h.children("."+d).removeClass(d);this.selectedIndex=f;return -1!==this.selectedIndex&&g.length>this.selectedIndex?(f=g.get(this.selectedIndex),c(f).addClass(d),f):null},selectHint:function(){var d=c.inArray(this.hint,this.suggestions);this.select(d)},select:function(d){this.hide();this.onSelect(d)},moveUp:function(){-1!==this.selectedIndex&&(0===this.selectedIndex?(c(this.suggestionsContainer).children().first().removeClass(this.classes.selected),this.selectedIndex=-1,this.el.val(this.currentValue),this.findBestHint()):this.adjustScroll(this.selectedIndex-1))},moveDown:function(){this.selectedIndex!==this.suggestions.length-1&&this.adjustScroll(this.selectedIndex+1)},adjustScroll:function(f){var d=this.activate(f),h,g;d&&(d=d.offsetTop,h=c(this.suggestionsContainer).scrollTop(),g=h+this.options.maxHeight-25,d<h?c(this.suggestionsContainer).scrollTop(d):d>g&&c(this.suggestionsContainer).scrollTop(d-this.options.maxHeight+25),this.el.val(this.getValue(this.suggestions[f].value)),this.signalHint(null))},onSelect:function(e){var d=this.options.onSelect;e=this.suggestions[e];this.currentValue=this.getValue(e.value);this.el.val(this.currentValue);this.signalHint(null);this.suggestions=[];this.selection=e;c.isFunction(d)&&d.call(this.element,e)},getValue:function(e){var d=this.options.delimiter,f;if(!d){return e}f=this.currentValue;d=f.split(d);return 1===d.length?e:f.substr(0,f.length-d[d.length-1].length)+e},dispose:function(){this.el.off(".autocomplete").removeData("autocomplete");this.disableKillerFn();c(window).off("resize.autocomplete",this.fixPositionCapture);c(this.suggestionsContainer).remove()}};c.fn.autocomplete=function(e,d){return 0===arguments.length?this.first().data("autocomplete"):this.each(function(){var g=c(this),f=g.data("autocomplete");if("string"===typeof e){if(f&&"function"===typeof f[e]){f[e](d)}}else{f&&f.dispose&&f.dispose(),f=new b(this,e),g.data("autocomplete",f)}})}});(function(ar){var aq="Close",ap="BeforeClose",ao="AfterClose",an="BeforeAppend",am="MarkupParse",al="Open",ak="Change",aj="mfp",ai="."+aj,ah="mfp-ready",ag="mfp-removing",af="mfp-prevent-close",ae,ad=function(){},ac=!!window.jQuery,aa,Y=ar(window),W,U,S,Q,O,M=function(d,c){ae.ev.on(aj+d+ai,c)},K=function(a,j,i,h){var g=document.createElement("div");return g.className="mfp-"+a,i&&(g.innerHTML=i),h?j&&j.appendChild(g):(g=ar(g),j&&g.appendTo(j)),g},J=function(a,d){ae.ev.triggerHandler(aj+a,d),ae.st.callbacks&&(a=a.charAt(0).toLowerCase()+a.slice(1),ae.st.callbacks[a]&&ae.st.callbacks[a].apply(ae,ar.isArray(d)?d:[d]))},ab=function(a){if(a!==O||!ae.currTemplate.closeBtn){ae.currTemplate.closeBtn=ar(ae.st.closeMarkup.replace("%title%",ae.st.tClose)),O=a}return ae.currTemplate.closeBtn},Z=function(){ar.magnificPopup.instance||(ae=new ad,ae.init(),ar.magnificPopup.instance=ae)},X=function(){var d=document.createElement("p").style,c=["ms","O","Moz","Webkit"];if(d.transition!==undefined){return !0}while(c.length){if(c.pop()+"Transition" in d){return !0}}return !1};ad.prototype={constructor:ad,init:function(){var a=navigator.appVersion;ae.isIE7=a.indexOf("MSIE 7.")!==-1,ae.isIE8=a.indexOf("MSIE 8.")!==-1,ae.isLowIE=ae.isIE7||ae.isIE8,ae.isAndroid=/android/gi.test(a),ae.isIOS=/iphone|ipad|ipod/gi.test(a),ae.supportsTransition=X(),ae.probablyMobile=ae.isAndroid||ae.isIOS||/(Opera Mini)|Kindle|webOS|BlackBerry|(Opera Mobi)|(Windows Phone)|IEMobile/i.test(navigator.userAgent),U=ar(document),ae.popupsCache={}},open:function(t){W||(W=ar(document.body));var s;if(t.isObj===!1){ae.items=t.items.toArray(),ae.index=0;var r=t.items,q;for(s=0;s<r.length;s++){q=r[s],q.parsed&&(q=q.el[0]);if(q===t.el[0]){ae.index=s;break}}}else{ae.items=ar.isArray(t.items)?t.items:[t.items],ae.index=t.index||0}if(ae.isOpen){ae.updateItemHTML();return}ae.types=[],Q="",t.mainEl&&t.mainEl.length?ae.ev=t.mainEl.eq(0):ae.ev=U,t.key?(ae.popupsCache[t.key]||(ae.popupsCache[t.key]={}),ae.currTemplate=ae.popupsCache[t.key]):ae.currTemplate={},ae.st=ar.extend(!0,{},ar.magnificPopup.defaults,t),ae.fixedContentPos=ae.st.fixedContentPos==="auto"?!ae.probablyMobile:ae.st.fixedContentPos,ae.st.modal&&(ae.st.closeOnContentClick=!1,ae.st.closeOnBgClick=!1,ae.st.showCloseBtn=!1,ae.st.enableEscapeKey=!1),ae.bgOverlay||(ae.bgOverlay=K("bg").on("click"+ai,function(){ae.close()}),ae.wrap=K("wrap").attr("tabindex",-1).on("click"+ai,function(b){ae._checkIfClose(b.target)&&ae.close()}),ae.container=K("container",ae.wrap)),ae.contentContainer=K("content"),ae.st.preloader&&(ae.preloader=K("preloader",ae.container,ae.st.tLoading));var n=ar.magnificPopup.modules;for(s=0;s<n.length;s++){var k=n[s];k=k.charAt(0).toUpperCase()+k.slice(1),ae["init"+k].call(ae)}J("BeforeOpen"),ae.st.showCloseBtn&&(ae.st.closeBtnInside?(M(am,function(h,e,l,i){l.close_replaceWith=ab(i.type)}),Q+=" mfp-close-btn-in"):ae.wrap.append(ab())),ae.st.alignTop&&(Q+=" mfp-align-top"),ae.fixedContentPos?ae.wrap.css({overflow:ae.st.overflowY,overflowX:"hidden",overflowY:ae.st.overflowY}):ae.wrap.css({top:Y.scrollTop(),position:"absolute"}),(ae.st.fixedBgPos===!1||ae.st.fixedBgPos==="auto"&&!ae.fixedContentPos)&&ae.bgOverlay.css({height:U.height(),position:"absolute"}),ae.st.enableEscapeKey&&U.on("keyup"+ai,function(b){b.keyCode===27&&ae.close()}),Y.on("resize"+ai,function(){ae.updateSize()}),ae.st.closeOnContentClick||(Q+=" mfp-auto-cursor"),Q&&ae.wrap.addClass(Q);var j=ae.wH=Y.height(),g={};if(ae.fixedContentPos&&ae._hasScrollBar(j)){var f=ae._getScrollbarSize();f&&(g.marginRight=f)}ae.fixedContentPos&&(ae.isIE7?ar("body, html").css("overflow","hidden"):g.overflow="hidden");var a=ae.st.mainClass;return ae.isIE7&&(a+=" mfp-ie7"),a&&ae._addClassToMFP(a),ae.updateItemHTML(),J("BuildControls"),ar("html").css(g),ae.bgOverlay.add(ae.wrap).prependTo(ae.st.prependTo||W),ae._lastFocusedEl=document.activeElement,setTimeout(function(){ae.content?(ae._addClassToMFP(ah),ae._setFocus()):ae.bgOverlay.addClass(ah),U.on("focusin"+ai,ae._onFocusIn)},16),ae.isOpen=!0,ae.updateSize(j),J(al),t},close:function(){if(!ae.isOpen){return}J(ap),ae.isOpen=!1,ae.st.removalDelay&&!ae.isLowIE&&ae.supportsTransition?(ae._addClassToMFP(ag),setTimeout(function(){ae._close()},ae.st.removalDelay)):ae._close()},_close:function(){J(aq);var b=ag+" "+ah+" ";ae.bgOverlay.detach(),ae.wrap.detach(),ae.container.empty(),ae.st.mainClass&&(b+=ae.st.mainClass+" "),ae._removeClassFromMFP(b);if(ae.fixedContentPos){var a={marginRight:""};ae.isIE7?ar("body, html").css("overflow",""):a.overflow="",ar("html").css(a)}U.off("keyup"+ai+" focusin"+ai),ae.ev.off(ai),ae.wrap.attr("class","mfp-wrap").removeAttr("style"),ae.bgOverlay.attr("class","mfp-bg"),ae.container.attr("class","mfp-container"),ae.st.showCloseBtn&&(!ae.st.closeBtnInside||ae.currTemplate[ae.currItem.type]===!0)&&ae.currTemplate.closeBtn&&ae.currTemplate.closeBtn.detach(),ae._lastFocusedEl&&ar(ae._lastFocusedEl).focus(),ae.currItem=null,ae.content=null,ae.currTemplate=null,ae.prevHeight=0,J(ao)},updateSize:function(e){if(ae.isIOS){var d=document.documentElement.clientWidth/window.innerWidth,f=window.innerHeight*d;ae.wrap.css("height",f),ae.wH=f}else{ae.wH=e||Y.height()}ae.fixedContentPos||ae.wrap.css("height",ae.wH),J("Resize")},updateItemHTML:function(){var a=ae.items[ae.index];ae.contentContainer.detach(),ae.content&&ae.content.detach(),a.parsed||(a=ae.parseEl(ae.index));var h=a.type;J("BeforeChange",[ae.currItem?ae.currItem.type:"",h]),ae.currItem=a;if(!ae.currTemplate[h]){var g=ae.st[h]?ae.st[h].markup:!1;J("FirstMarkupParse",g),g?ae.currTemplate[h]=ar(g):ae.currTemplate[h]=!0}S&&S!==a.type&&ae.container.removeClass("mfp-"+S+"-holder");var f=ae["get"+h.charAt(0).toUpperCase()+h.slice(1)](a,ae.currTemplate[h]);ae.appendContent(f,h),a.preloaded=!0,J(ak,a),S=a.type,ae.container.prepend(ae.contentContainer),J("AfterChange")},appendContent:function(d,c){ae.content=d,d?ae.st.showCloseBtn&&ae.st.closeBtnInside&&ae.currTemplate[c]===!0?ae.content.find(".mfp-close").length||ae.content.append(ab()):ae.content=d:ae.content="",J(an),ae.container.addClass("mfp-"+c+"-holder"),ae.contentContainer.append(ae.content)},parseEl:function(a){var j=ae.items[a],i;j.tagName?j={el:ar(j)}:(i=j.type,j={data:j,src:j.src});if(j.el){var h=ae.types;for(var g=0;g<h.length;g++){if(j.el.hasClass("mfp-"+h[g])){i=h[g];break}}j.src=j.el.attr("data-mfp-src"),j.src||(j.src=j.el.attr("href"))}return j.type=i||ae.st.type||"inline",j.index=a,j.parsed=!0,ae.items[a]=j,J("ElementParse",j),ae.items[a]},addGroup:function(f,e){var h=function(a){a.mfpEl=this,ae._openClick(a,f,e)};e||(e={});var g="click.magnificPopup";e.mainEl=f,e.items?(e.isObj=!0,f.off(g).on(g,h)):(e.isObj=!1,e.delegate?f.off(g).on(g,e.delegate,h):(e.items=f,f.off(g).on(g,h)))},_openClick:function(a,j,i){var h=i.midClick!==undefined?i.midClick:ar.magnificPopup.defaults.midClick;if(!h&&(a.which===2||a.ctrlKey||a.metaKey)){return}var g=i.disableOn!==undefined?i.disableOn:ar.magnificPopup.defaults.disableOn;if(g){if(ar.isFunction(g)){if(!g.call(ae)){return !0}}else{if(Y.width()<g){return !0}}}a.type&&(a.preventDefault(),ae.isOpen&&a.stopPropagation()),i.el=ar(a.mfpEl),i.delegate&&(i.items=j.find(i.delegate)),ae.open(i)},updateStatus:function(e,d){if(ae.preloader){aa!==e&&ae.container.removeClass("mfp-s-"+aa),!d&&e==="loading"&&(d=ae.st.tLoading);var f={status:e,text:d};J("UpdateStatus",f),e=f.status,d=f.text,ae.preloader.html(d),ae.preloader.find("a").on("click",function(b){b.stopImmediatePropagation()}),ae.container.addClass("mfp-s-"+e),aa=e}},_checkIfClose:function(a){if(ar(a).hasClass(af)){return}var f=ae.st.closeOnContentClick,e=ae.st.closeOnBgClick;if(f&&e){return !0}if(!ae.content||ar(a).hasClass("mfp-close")||ae.preloader&&a===ae.preloader[0]){return !0}if(a!==ae.content[0]&&!ar.contains(ae.content[0],a)){if(e&&ar.contains(document,a)){return !0}}else{if(f){return !0}}return !1},_addClassToMFP:function(b){ae.bgOverlay.addClass(b),ae.wrap.addClass(b)},_removeClassFromMFP:function(b){this.bgOverlay.removeClass(b),ae.wrap.removeClass(b)},_hasScrollBar:function(b){return(ae.isIE7?U.height():document.body.scrollHeight)>(b||Y.height())},_setFocus:function(){(ae.st.focus?ae.content.find(ae.st.focus).eq(0):ae.wrap).focus()},_onFocusIn:function(a){if(a.target!==ae.wrap[0]&&!ar.contains(ae.wrap[0],a.target)){return ae._setFocus(),!1}},_parseMarkup:function(a,h,g){var f;g.data&&(h=ar.extend(g.data,h)),J(am,[a,h,g]),ar.each(h,function(b,j){if(j===undefined||j===!1){return !0}f=b.split("_");if(f.length>1){var i=a.find(ai+"-"+f[0]);if(i.length>0){var e=f[1];e==="replaceWith"?i[0]!==j[0]&&i.replaceWith(j):e==="img"?i.is("img")?i.attr("src",j):i.replaceWith('<img src="'+j+'" class="'+i.attr("class")+'" />'):i.attr(f[1],j)}}else{a.find(ai+"-"+b).html(j)}})},_getScrollbarSize:function(){if(ae.scrollbarSize===undefined){var b=document.createElement("div");b.id="mfp-sbm",b.style.cssText="width: 99px; height: 99px; overflow: scroll; position: absolute; top: -9999px;",document.body.appendChild(b),ae.scrollbarSize=b.offsetWidth-b.clientWidth,document.body.removeChild(b)}return ae.scrollbarSize}},ar.magnificPopup={instance:null,proto:ad.prototype,modules:[],open:function(a,d){return Z(),a?a=ar.extend(!0,{},a):a={},a.isObj=!0,a.index=d||0,this.instance.open(a)},close:function(){return ar.magnificPopup.instance&&ar.magnificPopup.instance.close()},registerModule:function(a,d){d.options&&(ar.magnificPopup.defaults[a]=d.options),ar.extend(this.proto,d.proto),this.modules.push(a)},defaults:{disableOn:0,key:null,midClick:!1,mainClass:"",preloader:!0,focus:"",closeOnContentClick:!1,closeOnBgClick:!0,closeBtnInside:!0,showCloseBtn:!0,enableEscapeKey:!0,modal:!1,alignTop:!1,removalDelay:0,prependTo:null,fixedContentPos:"auto",fixedBgPos:"auto",overflowY:"auto",closeMarkup:'<button title="%title%" type="button" class="mfp-close">&times;</button>',tClose:"Close (Esc)",tLoading:"Loading..."}},ar.fn.magnificPopup=function(a){Z();var j=ar(this);if(typeof a=="string"){if(a==="open"){var i,h=ac?j.data("magnificPopup"):j[0].magnificPopup,g=parseInt(arguments[1],10)||0;h.items?i=h.items[g]:(i=j,h.delegate&&(i=i.find(h.delegate)),i=i.eq(g)),ae._openClick({mfpEl:i},j,h)}else{ae.isOpen&&ae[a].apply(ae,Array.prototype.slice.call(arguments,1))}}else{a=ar.extend(!0,{},a),ac?j.data("magnificPopup",a):j[0].magnificPopup=a,ae.addGroup(j,a)}return j};var V,T=function(a){if(a.data&&a.data.title!==undefined){return a.data.title}var d=ae.st.image.titleSrc;if(d){if(ar.isFunction(d)){return d.call(ae,a)}if(a.el){return a.el.attr(d)||""}}return""};ar.magnificPopup.registerModule("image",{options:{markup:'<div class="mfp-figure"><div class="mfp-close"></div><figure><div class="mfp-img"></div><figcaption><div class="mfp-bottom-bar"><div class="mfp-title"></div><div class="mfp-counter"></div></div></figcaption></figure></div>',cursor:"mfp-zoom-out-cur",titleSrc:"title",verticalFit:!0,tError:'<a href="%url%">The image</a> could not be loaded.'},proto:{initImage:function(){var b=ae.st.image,d=".image";ae.types.push("image"),M(al+d,function(){ae.currItem.type==="image"&&b.cursor&&W.addClass(b.cursor)}),M(aq+d,function(){b.cursor&&W.removeClass(b.cursor),Y.off("resize"+ai)}),M("Resize"+d,ae.resizeImage),ae.isLowIE&&M("AfterChange",ae.resizeImage)},resizeImage:function(){var d=ae.currItem;if(!d||!d.img){return}if(ae.st.image.verticalFit){var c=0;ae.isLowIE&&(c=parseInt(d.img.css("padding-top"),10)+parseInt(d.img.css("padding-bottom"),10)),d.img.css("max-height",ae.wH-c)}},_onImageHasSize:function(b){b.img&&(b.hasSize=!0,V&&clearInterval(V),b.isCheckingImgSize=!1,J("ImageHasSize",b),b.imgHidden&&(ae.content&&ae.content.removeClass("mfp-loading"),b.imgHidden=!1))},findImageSize:function(f){var e=0,h=f.img[0],g=function(a){V&&clearInterval(V),V=setInterval(function(){if(h.naturalWidth>0){ae._onImageHasSize(f);return}e>200&&clearInterval(V),e++,e===3?g(10):e===40?g(50):e===100&&g(500)},a)};g(1)},getImage:function(a,p){var o=0,n=function(){a&&(a.img[0].complete?(a.img.off(".mfploader"),a===ae.currItem&&(ae._onImageHasSize(a),ae.updateStatus("ready")),a.hasSize=!0,a.loaded=!0,J("ImageLoadComplete")):(o++,o<200?setTimeout(n,100):m()))},m=function(){a&&(a.img.off(".mfploader"),a===ae.currItem&&(ae._onImageHasSize(a),ae.updateStatus("error",l.tError.replace("%url%",a.src))),a.hasSize=!0,a.loaded=!0,a.loadError=!0)},l=ae.st.image,k=p.find(".mfp-img");if(k.length){var j=document.createElement("img");j.className="mfp-img",a.img=ar(j).on("load.mfploader",n).on("error.mfploader",m),j.src=a.src,k.is("img")&&(a.img=a.img.clone()),j=a.img[0],j.naturalWidth>0?a.hasSize=!0:j.width||(a.hasSize=!1)}return ae._parseMarkup(p,{title:T(a),img_replaceWith:a.img},a),ae.resizeImage(),a.hasSize?(V&&clearInterval(V),a.loadError?(p.addClass("mfp-loading"),ae.updateStatus("error",l.tError.replace("%url%",a.src))):(p.removeClass("mfp-loading"),ae.updateStatus("ready")),p):(ae.updateStatus("loading"),a.loading=!0,a.hasSize||(a.imgHidden=!0,p.addClass("mfp-loading"),ae.findImageSize(a)),p)}}});var R,P=function(){return R===undefined&&(R=document.createElement("p").style.MozTransform!==undefined),R};ar.magnificPopup.registerModule("zoom",{options:{enabled:!1,easing:"ease-in-out",duration:300,opener:function(b){return b.is("img")?b:b.find("img")}},proto:{initZoom:function(){var b=ae.st.zoom,p=".zoom",o;if(!b.enabled||!ae.supportsTransition){return}var n=b.duration,m=function(a){var j=a.clone().removeAttr("style").removeAttr("class").addClass("mfp-animated-image"),i="all "+b.duration/1000+"s "+b.easing,h={position:"fixed",zIndex:9999,left:0,top:0,"-webkit-backface-visibility":"hidden"},g="transition";return h["-webkit-"+g]=h["-moz-"+g]=h["-o-"+g]=h[g]=i,j.css(h),j},l=function(){ae.content.css("visibility","visible")},k,c;M("BuildControls"+p,function(){if(ae._allowZoom()){clearTimeout(k),ae.content.css("visibility","hidden"),o=ae._getItemToZoom();if(!o){l();return}c=m(o),c.css(ae._getOffset()),ae.wrap.append(c),k=setTimeout(function(){c.css(ae._getOffset(!0)),k=setTimeout(function(){l(),setTimeout(function(){c.remove(),o=c=null,J("ZoomAnimationEnded")},16)},n)},16)}}),M(ap+p,function(){if(ae._allowZoom()){clearTimeout(k),ae.st.removalDelay=n;if(!o){o=ae._getItemToZoom();if(!o){return}c=m(o)}c.css(ae._getOffset(!0)),ae.wrap.append(c),ae.content.css("visibility","hidden"),setTimeout(function(){c.css(ae._getOffset())},16)}}),M(aq+p,function(){ae._allowZoom()&&(l(),c&&c.remove(),o=null)})},_allowZoom:function(){return ae.currItem.type==="image"},_getItemToZoom:function(){return ae.currItem.hasSize?ae.currItem.img:!1},_getOffset:function(a){var l;a?l=ae.currItem.img:l=ae.st.zoom.opener(ae.currItem.el||ae.currItem);var k=l.offset(),j=parseInt(l.css("padding-top"),10),i=parseInt(l.css("padding-bottom"),10);k.top-=ar(window).scrollTop()-j;var h={width:l.width(),height:(ac?l.innerHeight():l[0].offsetHeight)-i-j};return P()?h["-moz-transform"]=h.transform="translate("+k.left+"px,"+k.top+"px)":(h.left=k.left,h.top=k.top),h}}});var N=function(d){var c=ae.items.length;return d>c-1?d-c:d<0?c+d:d},L=function(e,d,f){return e.replace(/%curr%/gi,d+1).replace(/%total%/gi,f)};ar.magnificPopup.registerModule("gallery",{options:{enabled:!1,arrowMarkup:'<button title="%title%" type="button" class="mfp-arrow mfp-arrow-%dir%"></button>',preload:[0,2],navigateByImgClick:!0,arrows:!0,tPrev:"Previous (Left arrow key)",tNext:"Next (Right arrow key)",tCounter:"%curr% of %total%"},proto:{initGallery:function(){var f=ae.st.gallery,b=".mfp-gallery",a=Boolean(ar.fn.mfpFastClick);ae.direction=!0;if(!f||!f.enabled){return !1}Q+=" mfp-gallery",M(al+b,function(){f.navigateByImgClick&&ae.wrap.on("click"+b,".mfp-img",function(){if(ae.items.length>1){return ae.next(),!1}}),U.on("keydown"+b,function(c){c.keyCode===37?ae.prev():c.keyCode===39&&ae.next()})}),M("UpdateStatus"+b,function(d,c){c.text&&(c.text=L(c.text,ae.currItem.index,ae.items.length))}),M(am+b,function(g,c,j,i){var h=ae.items.length;j.counter=h>1?L(f.tCounter,i.index,h):""}),M("BuildControls"+b,function(){if(ae.items.length>1&&f.arrows&&!ae.arrowLeft){var c=f.arrowMarkup,i=ae.arrowLeft=ar(c.replace(/%title%/gi,f.tPrev).replace(/%dir%/gi,"left")).addClass(af),h=ae.arrowRight=ar(c.replace(/%title%/gi,f.tNext).replace(/%dir%/gi,"right")).addClass(af),e=a?"mfpFastClick":"click";i[e](function(){ae.prev()}),h[e](function(){ae.next()}),ae.isIE7&&(K("b",i[0],!1,!0),K("a",i[0],!1,!0),K("b",h[0],!1,!0),K("a",h[0],!1,!0)),ae.container.append(i.add(h))}}),M(ak+b,function(){ae._preloadTimeout&&clearTimeout(ae._preloadTimeout),ae._preloadTimeout=setTimeout(function(){ae.preloadNearbyImages(),ae._preloadTimeout=null},16)}),M(aq+b,function(){U.off(b),ae.wrap.off("click"+b),ae.arrowLeft&&a&&ae.arrowLeft.add(ae.arrowRight).destroyMfpFastClick(),ae.arrowRight=ae.arrowLeft=null})},next:function(){ae.direction=!0,ae.index=N(ae.index+1),ae.updateItemHTML()},prev:function(){ae.direction=!1,ae.index=N(ae.index-1),ae.updateItemHTML()},goTo:function(b){ae.direction=b>=ae.index,ae.index=b,ae.updateItemHTML()},preloadNearbyImages:function(){var f=ae.st.gallery.preload,e=Math.min(f[0],ae.items.length),h=Math.min(f[1],ae.items.length),g;for(g=1;g<=(ae.direction?h:e);g++){ae._preloadItem(ae.index+g)}for(g=1;g<=(ae.direction?e:h);g++){ae._preloadItem(ae.index-g)}},_preloadItem:function(a){a=N(a);if(ae.items[a].preloaded){return}var d=ae.items[a];d.parsed||(d=ae.parseEl(a)),J("LazyLoad",d),d.type==="image"&&(d.img=ar('<img class="mfp-img" />').on("load.mfploader",function(){d.hasSize=!0}).on("error.mfploader",function(){d.hasSize=!0,d.loadError=!0,J("LazyLoadError",d)}).attr("src",d.src)),d.preloaded=!0}}}),Z()})(window.jQuery||window.Zepto);function equalizeHeight(a){var b=0;$(a).each(function(){if($(this).height()>b){b=$(this).height()}});$(a).height(b)};function goToAnchor(a){$("html, body").animate({scrollTop:$(a).offset().top},600)};function createPostLinks(){var unresolved={};$('#posts .post-link').each(function(index,element){var ownerPost=$(element).closest("#posts>li");var ownerPostId=$(ownerPost).attr("id").split("-")[1];var linkedPostId=$(element).attr("post_id");var linkedPost='#post-'+linkedPostId;var linkedPostBoard=($(element).attr("post_board")!==undefined?$(element).attr("post_board"):info_data.board_name);if($(linkedPost).length){addBacklink(linkedPost,ownerPostId);$(element).attr('href','#post-'+linkedPostId);}
+else{if(!unresolved[linkedPostBoard]){unresolved[linkedPostBoard]={};}
+if(!unresolved[linkedPostBoard][linkedPostId]){unresolved[linkedPostBoard][linkedPostId]=[];}
+unresolved[linkedPostBoard][linkedPostId].push(element);}});for(var board in unresolved){var postIds=Object.keys(unresolved[board]);for(var i=0;i<postIds.length;i+=100){resolvePostLinks(board,unresolved[board],postIds.slice(i,i+100));}}}
+function resolvePostLinks(board,elements,postIds){$.ajax({url:info_data.ajax_url_get_parent_threads,data:{posts:postIds.join(','),board:board},type:'GET',cache:true}).done(function(response){for(var i=0;i<postIds.length;i++){var postId=postIds[i];var threadNumber=(response['parent_threads']?response['parent_threads'][postId]:undefined);$(elements[postId]).each(function(index,element){if(threadNumber===undefined){$(element).removeAttr('href');$(element).addClass('post-link-dead');}else{var link=info_data.thread_url.replace('/'+info_data.board_name+'/','/'+board+'/');link=link.replace(info_data.thread_number,threadNumber);$(element).attr('href',link+'#post-'+postId);}});}});}
+function addBacklink(toPost,backlinkTarget){var backlinks=$(toPost).find('.post-backlinks');if(!$(backlinks).length){$(toPost).find(".post-header").append('<ul class="post-backlinks"></ul>');var backlinks=$(toPost).find('.post-backlinks');}
+if(!$(backlinks).find("[href='#post-"+backlinkTarget+"']").length){$(backlinks).append('<li><a href="#post-'+backlinkTarget+'" post_id="'+backlinkTarget+'" class="post-link">&gt;&gt;'+backlinkTarget+'</a></li>');}}
+function addPostTooltip(element,postId){var sourcePost='#post-'+postId;if(!$(sourcePost).length){return;}
+$(element).qtip({content:{text:'<div class="post">'+$(sourcePost).html()+'</div>'},position:{my:'left center',at:'right center',adjust:{method:'flip invert'},viewport:$(window)},show:{ready:true,delay:0},hide:{delay:0}});}
+function highlightPost(selector){$(selector).addClass('post-highlight');var delay=setTimeout(function(){$(selector).removeClass('post-highlight')},2000);};function ajax_save(a){state=$(a).hasClass("button-save");$.ajax({url:info_data.ajax_url_save,beforeSend:function(b){b.setRequestHeader("X-CSRFToken",$.cookie("csrftoken"))},data:{thread:info_data.thread_number,board:info_data.board_name,state:state},type:"POST",cache:false}).done(function(b){if(b.error){alert(b.error)}else{if(b.state){$(a).removeClass("button-green button-save");$(a).addClass("button-red button-unsave");$(a).text("Unsave thread")}else{$(a).removeClass("button-red button-unsave");$(a).addClass("button-green button-save");$(a).text("Save thread")}}})}function ajax_add_tag(a){if(a.value.length<=0){return}$.ajax({url:info_data.ajax_url_add_tag,beforeSend:function(b){b.setRequestHeader("X-CSRFToken",$.cookie("csrftoken"))},data:{thread:info_data.thread_number,board:info_data.board_name,tag:a.value},type:"POST",cache:false}).done(function(b){if(b.error){alert(b.error)}else{if(b.added){$(".tags").append('<li><i class="fa fa-fw fa-tag" title="Tag added by the user"></i><a class="tag-link" href="'+info_data.board_url+"?tag="+a.value+'">'+a.value+'</a><a class="remove-tag" title="Remove the tag"><i class="fa fa-times"></i></a></li>');$("#add-tag-input").val("")}}})}function ajax_remove_tag(a){$.ajax({url:info_data.ajax_url_remove_tag,beforeSend:function(b){b.setRequestHeader("X-CSRFToken",$.cookie("csrftoken"))},data:{thread:info_data.thread_number,board:info_data.board_name,tag:$(a).closest("li").find(".tag-link").text().trim()},type:"POST",cache:false}).done(function(b){if(b.error){alert(b.error)}else{if(b.removed){$(a).closest("li").remove()}}})};var magnificPopup;$(document).ready(function(){equalizeHeight("#threads .img-container");equalizeHeight("#threads a");$("#threads .thread-comment").dotdotdot({wrap:"letter"});$("time.timeago").timeago();$("pre code").each(function(a,b){hljs.highlightBlock(b)});$("#body-thread #posts").on("mouseenter",".post-link",function(b){if("object"===typeof $(b.target).data("qtip")){return}var a=$(b.target).attr("post_id");addPostTooltip(b.target,a)});$("body").on("click",".post-link",function(b){var a=$.attr(this,"href");if(a.match(/^#post-[0-9]+$/)!==null){highlightPost(a);goToAnchor(a);window.history.pushState(null,null,a);b.preventDefault()}});if(window.location.hash){if(window.location.hash.match(/#post-[0-9]+/)!==null){highlightPost(window.location.hash)}}if($("#body-thread").length){createPostLinks();$(".post").on("click",".button-save, .button-unsave",function(a){ajax_save(a.target)});if($("#add-tag-input").length){$("#add-tag-input").autocomplete({serviceUrl:info_data.ajax_url_suggest_tag,minChars:2})}$(".post").on("keypress","#add-tag-input",function(a){if(a.which==13){ajax_add_tag(a.target)}});$(".post").on("click",".remove-tag",function(a){ajax_remove_tag(a.target)})}$("body").on("click",".gallery-post-link",function(a){$.magnificPopup.instance.close()});magnificPopup=$(".post-image").magnificPopup({type:"image",gallery:{enabled:true,preload:[0,1]},image:{titleSrc:function(b){var a=b.el.closest(".post").attr("id");return'<a class="post-link gallery-post-link" href="#'+a+'">&gt;&gt;'+a.split("-")[1];+"</a>"}}})});
\ No newline at end of file
@@ -3,6 +3,9 @@
 
 // Call this on load to generate links to the comments in the thread view (>>1234).
 function createPostLinks(){
+    // Links to the posts in other threads grouped by board: {board: {postId: [elements]}}.
+    var unresolved = {};
+
     $('#posts .post-link').each(function(index, element){
         var ownerPost = $(element).closest("#posts>li");
         var ownerPostId = $(ownerPost).attr("id").split("-")[1];
@@ -16,22 +19,52 @@ function createPostLinks(){
             $(element).attr('href', '#post-' + linkedPostId);
         }
         else{ // It is necessary to create a link to different page.
-            $.ajax({
-                url: info_data.ajax_url_get_parent_thread,
-                data: {
-                    post: linkedPostId,
-                    board: linkedPostBoard
-                },
-                type: 'GET',
-                cache: true
-            }).done(function(response){
-                if (response['error']){
+            if (!unresolved[linkedPostBoard]){
+                unresolved[linkedPostBoard] = {};
+            }
+
+            if (!unresolved[linkedPostBoard][linkedPostId]){
+                unresolved[linkedPostBoard][linkedPostId] = [];
+            }
+
+            unresolved[linkedPostBoard][linkedPostId].push(element);
+        }
+    });
+
+    // Resolve the links with one request per board and 100 posts.
+    for (var board in unresolved){
+        var postIds = Object.keys(unresolved[board]);
+
+        for (var i = 0; i < postIds.length; i += 100){
+            resolvePostLinks(board, unresolved[board], postIds.slice(i, i + 100));
+        }
+    }
+}
+
+// Sets the addresses of the links to the posts in other threads.
+// string board, object elements {postId: [elements]}, array postIds
+function resolvePostLinks(board, elements, postIds){
+    $.ajax({
+        url: info_data.ajax_url_get_parent_threads,
+        data: {
+            posts: postIds.join(','),
+            board: board
+        },
+        type: 'GET',
+        cache: true
+    }).done(function(response){
+        for (var i = 0; i < postIds.length; i++){
+            var postId = postIds[i];
+            var threadNumber = (response['parent_threads'] ? response['parent_threads'][postId] : undefined);
+
+            $(elements[postId]).each(function(index, element){
+                if (threadNumber === undefined){
                     $(element).removeAttr('href');
                     $(element).addClass('post-link-dead');
                 }else{
-                    link = info_data.thread_url.replace('/' + info_data.board_name + '/', '/' + linkedPostBoard + '/')
-                    link = link.replace(info_data.thread_number, response['parent_thread']);
-                    $(element).attr('href', link + '#post-' + linkedPostId);
+                    var link = info_data.thread_url.replace('/' + info_data.board_name + '/', '/' + board + '/');
+                    link = link.replace(info_data.thread_number, threadNumber);
+                    $(element).attr('href', link + '#post-' + postId);
                 }
             });
         }
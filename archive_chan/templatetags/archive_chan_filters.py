@@ -1,51 +1,59 @@
-import re, copy, urllib
+import copy, urllib, os, json
 from django import template
+from django.conf import settings
+from django.contrib.staticfiles.templatetags.staticfiles import static
+from django.utils.safestring import mark_safe
+
+import archive_chan.lib.formatting as formatting
 
 register = template.Library()
 
+# Created by tools/make.py, maps the paths of the static files to the bundles.
+manifest_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'archive_chan', 'manifest.json')
+manifest = None
+
+
+def get_manifest():
+    """Loaded once per process, in the debug mode every time to pick up the rebuilt files."""
+    global manifest
+
+    if manifest is None or settings.DEBUG:
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+    return manifest
+
 
 @register.filter
 def formatpost(text):
-    """This filter formats a post comment before displaying it in the template."""
-
-    # >>quote
-    text = re.sub(
-        r'(?P<text>&gt;&gt;(?P<post_id>[0-9]+))',
-        r'<a class="post-link" post_id="\g<post_id>">\g<text></a>',
-        text
-    )
-
-    # >le meme arrows
-    text = re.sub(
-        r'^(&gt;.*)$',
-        r'<span class="greentext">\1</span>',
-        text,
-        flags=re.MULTILINE
-    )
-
-    # [code]i++;[/code]
-    text = re.sub(
-        r'\[code\](.*?)\[\/code\]',
-        r'<pre><code>\1</code></pre>',
-        text,
-        flags=re.MULTILINE|re.DOTALL
-    )
-
-    return text
+    """This filter formats a post comment before displaying it in the template.
+    Posts in the thread view use the comment rendered and stored by the scraper instead.
+    """
+    return formatting.format_post(text)
 
 
 @register.filter
 def highlight(text, phrase):
-    """This filter higlights the specified phrase in the text."""
+    """This filter higlights the specified phrase in the escaped text."""
+    return formatting.highlight(text, phrase)
+
 
-    text = re.sub(
-        r'(' + phrase + ')',
-        r'<span class="highlight">\1</span>',
-        text,
-        flags=re.IGNORECASE
-    )
+@register.filter
+def rendercomment(text, phrase=None):
+    """This filter escapes, formats and optionally highlights the phrase in a raw post comment in one pass."""
+    return mark_safe(formatting.render_comment(text, phrase))
 
-    return text
+
+@register.simple_tag
+def static_bundle(path):
+    """Works like the static tag but returns the URL of the bundle with a hash of the content
+    in the name. Bundles can be cached by the browsers forever. The original file is used if
+    the bundle is not listed in the manifest.
+    """
+    return static(get_manifest().get(path, path))
 
 
 @register.assignment_tag(takes_context=True)
@@ -1,14 +1,31 @@
-import datetime, json
+import datetime, json, os, tempfile, shutil, gzip, time
+from concurrent.futures import ThreadPoolExecutor
 
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.storage import FileSystemStorage
 from django.core.urlresolvers import reverse
-from django.db import connection
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import override_settings, CaptureQueriesContext
 from django.test.client import Client
 from django.utils.timezone import utc
 
 import archive_chan.lib.modifiers as modifiers
 import archive_chan.models as models
 import archive_chan.lib.scraper as scraper
+import archive_chan.lib.cache as cache
+import archive_chan.lib.stats as stats
+import archive_chan.lib.formatting as formatting
+import archive_chan.lib.tags as tags
+import archive_chan.lib.moderation as moderation
+import archive_chan.management.commands.archive_chan_benchmark_formatting as benchmark_formatting
+import archive_chan.management.commands.archive_chan_remove_orphaned_files as remove_orphaned_files
+import archive_chan.management.commands.archive_chan_shard_media as shard_media
+import archive_chan.management.commands.archive_chan_import_json as import_json
+import archive_chan.management.commands.archive_chan_import_log as import_log
+import archive_chan.management.commands.archive_chan_export as export
+import archive_chan.management.commands.archive_chan_partition_posts as partition_posts
 
 now = datetime.datetime(2014, 4, 23, 15, 0, 0, 0, utc)
 
@@ -143,6 +160,657 @@ class ViewsTest(TestCase):
         test_list(self.views)
 
 
+class ThreadViewTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+
+        board = models.Board.objects.create(name='a')
+        self.thread = models.Thread.objects.create(board=board, number=1, first_reply=now, last_reply=now)
+
+        for number in range(1, 6):
+            models.Post.objects.create(thread=self.thread, number=number, time=now)
+
+    @override_settings(ARCHIVE_CHAN_THREAD_CHUNK_SIZE=2)
+    def test_chunks(self):
+        """All posts should be rendered in the right order regardless of the chunk size."""
+        response = self.client.get(reverse('archive_chan:thread', args=('a', 1)))
+        self.assertEqual(response.status_code, 200)
+
+        content = b''.join(response.streaming_content).decode()
+        positions = [content.find('id="post-%s"' % number) for number in range(1, 6)]
+
+        self.assertNotIn(-1, positions)
+        self.assertEqual(positions, sorted(positions))
+
+    @override_settings(ARCHIVE_CHAN_THREAD_CHUNK_SIZE=2)
+    def test_cached_chunks(self):
+        """Posts should not be fetched if all chunks are in the cache."""
+        cache.invalidate_thread('a', 1)
+        url = reverse('archive_chan:thread', args=('a', 1))
+        b''.join(self.client.get(url).streaming_content)
+
+        with CaptureQueriesContext(connection) as queries:
+            content = b''.join(self.client.get(url).streaming_content).decode()
+
+        self.assertIn('id="post-5"', content)
+        self.assertFalse([query for query in queries.captured_queries if models.Post._meta.db_table in query['sql']])
+
+    def test_chunk_bounds(self):
+        self.assertEqual(self.thread.get_post_chunk_bounds(2), [(1, 2), (3, 4), (5, 5)])
+        self.assertEqual([post.number for post in self.thread.get_post_chunk(3, 4)], [3, 4])
+
+    def test_chunk_iterator(self):
+        chunks = list(self.thread.iter_post_chunks(2))
+        self.assertEqual([[post.number for post in chunk] for chunk in chunks], [[1, 2], [3, 4], [5]])
+
+
+class CacheTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+
+    def test_lru(self):
+        lru = cache.LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertEqual(lru.get('b'), None)
+        self.assertEqual(lru.get('c'), 3)
+
+    def test_versions(self):
+        version = cache.get_version('board', 'a')
+        self.assertEqual(cache.get_version('board', 'a'), version)
+
+        cache.invalidate_thread('a', 1)
+        self.assertNotEqual(cache.get_version('board', 'a'), version)
+
+    def test_board_page(self):
+        """Board page should be served from the cache until the board is invalidated."""
+        board = models.Board.objects.create(name='a')
+        url = reverse('archive_chan:board', args=(board.name,))
+
+        response = self.client.get(url)
+        self.assertNotIn('thread/1/', response.content.decode())
+
+        thread = models.Thread.objects.create(board=board, number=1, first_reply=now, last_reply=now)
+        models.Post.objects.create(thread=thread, number=1, time=now)
+
+        response = self.client.get(url)
+        self.assertNotIn('thread/1/', response.content.decode())
+
+        cache.invalidate_board(board.name)
+
+        response = self.client.get(url)
+        self.assertIn('thread/1/', response.content.decode())
+
+
+class FormattingTest(TestCase):
+    def test_render_comment(self):
+        self.assertEqual(
+            formatting.render_comment('>>123 text\n>green <b>\n[code]a\nb[/code]'),
+            '<a class="post-link" post_id="123">&gt;&gt;123</a> text<br />'
+            '<span class="greentext">&gt;green &lt;b&gt;</span><br />'
+            '<pre><code>a<br />b</code></pre>'
+        )
+
+    def test_outdated(self):
+        """Outdated comments should be rendered on the fly."""
+        post = models.Post(comment='>>1', comment_html='old', comment_html_version=0)
+        self.assertEqual(post.get_comment_html(), formatting.render_comment('>>1'))
+
+        post.render_comment()
+        self.assertEqual(post.comment_html_version, formatting.FORMAT_VERSION)
+        self.assertEqual(post.get_comment_html(), post.comment_html)
+
+    def test_legacy(self):
+        """Output should not differ from the previously used filters."""
+        for comment in benchmark_formatting.sample_comments:
+            self.assertEqual(formatting.render_comment(comment), benchmark_formatting.legacy_render_comment(comment))
+
+    def test_code_in_greentext(self):
+        """Code blocks started in greentext lines can span many lines. The previous filters
+        closed the greentext inside the code block.
+        """
+        self.assertEqual(
+            formatting.render_comment('>a [code]b\nc[/code] d\ne'),
+            '<span class="greentext">&gt;a <pre><code>b<br />c</code></pre> d</span><br />e'
+        )
+        self.assertEqual(
+            formatting.render_comment('>a [code]b\nc'),
+            '<span class="greentext">&gt;a [code]b</span><br />c'
+        )
+
+    def test_highlight(self):
+        self.assertEqual(
+            formatting.render_comment('>>12 Text\ntext', 'text'),
+            '<a class="post-link" post_id="12">&gt;&gt;12</a> <span class="highlight">Text</span><br />'
+            '<span class="highlight">text</span>'
+        )
+
+    def test_highlight_escaped(self):
+        """Phrase should be treated literally and should not break HTML entities."""
+        self.assertEqual(formatting.render_comment('a (b+)+ c', '(b+)+'), 'a <span class="highlight">(b+)+</span> c')
+        self.assertEqual(formatting.render_comment('a > b', 'gt'), 'a &gt; b')
+        self.assertEqual(formatting.render_comment('a > b', '>'), 'a <span class="highlight">&gt;</span> b')
+
+
+class HourlyStatsTest(TestCase):
+    def setUp(self):
+        self.board = models.Board.objects.create(name='a')
+        self.thread = models.Thread.objects.create(board=self.board, number=1, first_reply=now, last_reply=now)
+
+        for number in range(1, 4):
+            time = now + datetime.timedelta(hours=number - 1)
+            models.Post.objects.create(thread=self.thread, number=number, time=time)
+            stats.add_post_to_hourly_stats(self.board, time, has_image=False, is_main=number == 1)
+
+    def test_stats(self):
+        context = stats.get_stats(board='a')
+        self.assertEqual(context['total_posts'], 3)
+        self.assertEqual(context['total_image_posts'], 0)
+        self.assertEqual(context['total_threads'], 1)
+        self.assertEqual(len(context['chart_data']['rows']), 3)
+
+    def test_remove(self):
+        stats.remove_posts_from_hourly_stats(models.Post.objects.filter(number=1))
+        context = stats.get_stats(board='a')
+        self.assertEqual(context['total_posts'], 2)
+        self.assertEqual(context['total_threads'], 0)
+
+    def test_rebuild(self):
+        models.HourlyStats.objects.all().delete()
+        stats.rebuild_hourly_stats(self.board)
+        self.assertEqual(stats.get_stats(board='a'), stats.get_stats())
+        self.assertEqual(stats.get_stats()['total_posts'], 3)
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        board = models.Board.objects.create(name='a')
+        self.thread = models.Thread.objects.create(board=board, number=1)
+
+        for number in range(1, 4):
+            models.Post.objects.create(thread=self.thread, number=number, time=now + datetime.timedelta(minutes=number))
+
+    def get_thread(self):
+        return models.Thread.objects.get(pk=self.thread.pk)
+
+    def test_add(self):
+        thread = self.get_thread()
+        self.assertEqual(thread.replies, 3)
+        self.assertEqual(thread.first_reply, now + datetime.timedelta(minutes=1))
+        self.assertEqual(thread.last_reply, now + datetime.timedelta(minutes=3))
+
+    def test_delete(self):
+        models.Post.objects.get(thread=self.thread, number=3).delete()
+
+        thread = self.get_thread()
+        self.assertEqual(thread.replies, 2)
+        self.assertEqual(thread.last_reply, now + datetime.timedelta(minutes=2))
+
+    def test_recount(self):
+        models.Thread.objects.filter(pk=self.thread.pk).update(replies=10, images=5, first_reply=None)
+
+        self.assertEqual(models.Thread.objects.recount([self.thread.pk]), 1)
+        self.assertEqual(models.Thread.objects.recount([self.thread.pk]), 0)
+
+        thread = self.get_thread()
+        self.assertEqual(thread.replies, 3)
+        self.assertEqual(thread.images, 0)
+        self.assertEqual(thread.first_reply, now + datetime.timedelta(minutes=1))
+
+    def test_recount_command(self):
+        board = models.Board.objects.get(name='a')
+        other_board = models.Board.objects.create(name='b')
+
+        threads = [self.thread]
+        for number in range(2, 4):
+            thread = models.Thread.objects.create(board=board, number=number * 10)
+            post = models.Post.objects.create(thread=thread, number=number * 10, time=now)
+            models.Image.objects.create(post=post, original_name='image', image='post_images/%s.jpg' % number, thumbnail='post_thumbnails/%s.jpg' % number)
+            threads.append(thread)
+
+        other_thread = models.Thread.objects.create(board=other_board, number=1)
+
+        models.Thread.objects.update(replies=10, images=5, last_reply=now - datetime.timedelta(days=1))
+
+        call_command('archive_chan_recount_denormalized', board='a', chunk_size=2)
+
+        counters = dict([(thread.number, (thread.replies, thread.images, thread.last_reply)) for thread in models.Thread.objects.filter(board=board)])
+        self.assertEqual(counters, {
+            1: (3, 0, now + datetime.timedelta(minutes=3)),
+            20: (1, 1, now),
+            30: (1, 1, now),
+        })
+
+        other_thread = models.Thread.objects.get(pk=other_thread.pk)
+        self.assertEqual((other_thread.replies, other_thread.images), (10, 5))
+
+
+class RemoveOldThreadsTest(TestCase):
+    def setUp(self):
+        self.board = models.Board.objects.create(name='a', store_threads_for=1)
+
+        for number, saved in ((1, False), (2, True)):
+            thread = models.Thread.objects.create(board=self.board, number=number, saved=saved)
+            models.Post.objects.create(thread=thread, number=number, time=now)
+            models.TagToThread.objects.create(thread=thread, tag=models.Tag.objects.create(name=str(number)))
+
+    def test_dry_run(self):
+        call_command('archive_chan_remove_old_threads', dry_run=True)
+        self.assertEqual(models.Thread.objects.count(), 2)
+
+    def test_remove(self):
+        call_command('archive_chan_remove_old_threads', batch_size=1)
+        self.assertEqual(list(models.Thread.objects.values_list('number', flat=True)), [2])
+        self.assertEqual(list(models.Post.objects.values_list('number', flat=True)), [2])
+        self.assertEqual(models.TagToThread.objects.count(), 1)
+
+
+class FrozenThreadTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+
+        board = models.Board.objects.create(name='a')
+        self.thread = models.Thread.objects.create(board=board, number=1, saved=True)
+
+        for number in range(1, 4):
+            post = models.Post.objects.create(thread=self.thread, number=number, time=now, comment='&gt;Post %s' % number)
+            models.Image.objects.create(post=post, original_name='image', image='post_images/%s.jpg' % number, thumbnail='post_thumbnails/%s.jpg' % number)
+
+        self.thread = models.Thread.objects.get(pk=self.thread.pk)
+
+    def test_freeze(self):
+        call_command('archive_chan_freeze_threads', days=0)
+
+        self.assertEqual(models.Post.objects.count(), 0)
+        self.assertEqual(models.Image.objects.count(), 0)
+        self.assertEqual(models.Thread.objects.get(pk=self.thread.pk).replies, 3)
+
+        chunks = list(self.thread.iter_post_chunks(2))
+        self.assertEqual([[post.number for post in chunk] for chunk in chunks], [[1, 2], [3]])
+        self.assertEqual(chunks[0][0].image.image.name, 'post_images/1.jpg')
+
+        response = self.client.get(reverse('archive_chan:thread', args=('a', 1)))
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('id="post-3"', content)
+        self.assertIn('post_thumbnails/3.jpg', content)
+
+    def test_chunks(self):
+        chunk_size = models.FrozenThread.CHUNK_SIZE
+        models.FrozenThread.CHUNK_SIZE = 2
+
+        try:
+            with transaction.atomic():
+                frozen = models.FrozenThread.freeze(self.thread)
+        finally:
+            models.FrozenThread.CHUNK_SIZE = chunk_size
+
+        self.assertEqual(models.FrozenPostChunk.objects.count(), 2)
+        self.assertEqual(frozen.get_numbers(), [1, 2, 3])
+
+        thread = models.Thread.objects.get(pk=self.thread.pk)
+        self.assertEqual(thread.get_post_chunk_bounds(3), [(1, 3)])
+        self.assertEqual([post.number for post in thread.get_post_chunk(2, 3)], [2, 3])
+
+        # Board listings get the first post without additional queries.
+        with self.assertNumQueries(1):
+            thread = models.Thread.objects.select_related('frozenthread').get(pk=self.thread.pk)
+            self.assertEqual(thread.first_post().number, 1)
+
+    def test_recount(self):
+        with transaction.atomic():
+            models.FrozenThread.freeze(self.thread)
+
+        call_command('archive_chan_recount_denormalized')
+
+        thread = models.Thread.objects.get(pk=self.thread.pk)
+        self.assertEqual((thread.replies, thread.images, thread.last_reply), (3, 3, now))
+
+    def test_thaw(self):
+        models.Post.objects.filter(thread=self.thread).update(save_time=now)
+        save_times = list(models.Post.objects.order_by('number').values_list('save_time', flat=True))
+
+        with transaction.atomic():
+            frozen = models.FrozenThread.freeze(self.thread)
+
+        self.assertEqual(len(frozen.get_file_names()), 6)
+
+        with transaction.atomic():
+            frozen.thaw()
+
+        self.assertEqual(models.FrozenThread.objects.count(), 0)
+        self.assertEqual(list(models.Post.objects.values_list('number', flat=True)), [1, 2, 3])
+        self.assertEqual(models.Image.objects.count(), 3)
+        self.assertEqual(list(models.Post.objects.order_by('number').values_list('save_time', flat=True)), save_times)
+
+
+class ImportJsonTest(TestCase):
+    def setUp(self):
+        models.Board.objects.create(name='a')
+        import_json.init_worker('a', None)
+
+        self.thread_json = {'posts': [
+            {'no': 10, 'time': 1398265200, 'name': 'Anonymous', 'com': 'First'},
+            {'no': 11, 'time': 1398265260, 'name': 'Anonymous', 'com': '&gt;&gt;10<br>Reply', 'tim': 1398265260000, 'ext': '.jpg', 'filename': 'image'},
+        ]}
+
+    def test_import(self):
+        self.assertEqual(import_json.import_thread(self.thread_json), 2)
+
+        thread = models.Thread.objects.get(board='a', number=10)
+        self.assertEqual(thread.replies, 2)
+        self.assertEqual(list(thread.post_set.values_list('number', flat=True)), [10, 11])
+        self.assertEqual(sum(models.HourlyStats.objects.values_list('posts', flat=True)), 2)
+        self.assertEqual(sum(models.HourlyStats.objects.values_list('threads', flat=True)), 1)
+
+        # Images are not imported without the media directory.
+        self.assertEqual(models.Image.objects.count(), 0)
+
+    def test_repeated_import(self):
+        import_json.import_thread(self.thread_json)
+        self.assertEqual(import_json.import_thread(self.thread_json), 0)
+        self.assertEqual(models.Post.objects.count(), 2)
+
+
+class ImportLogTest(TestCase):
+    line = '2014-04-23 15:00:00.123456 Board: /a/ Time passed: 12.5 seconds (10% waiting, 20% downloading files) Processed threads: 5 Added posts: 10 Removed posts: 1 Downloaded images: 2 Downloaded thumbnails: 3 Downloaded threads: 4\n'
+
+    def setUp(self):
+        models.Board.objects.create(name='a')
+
+    def test_parse_line(self):
+        data = import_log.parse_line(self.line, 10)
+        self.assertEqual(data['board'], 'a')
+        self.assertEqual(data['end'] - data['start'], datetime.timedelta(seconds=12.5))
+        self.assertEqual(data['wait_time'], 1.25)
+        self.assertEqual(data['added_posts'], 10)
+        self.assertEqual(data['downloaded_threads'], 4)
+
+    def test_import(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            path = os.path.join(directory, 'log.gz')
+            with gzip.open(path, 'wt') as f:
+                f.write(self.line)
+                f.write(self.line)
+                f.write('Invalid line\n')
+
+            call_command('archive_chan_import_log', path, used_threads=10, jobs=1)
+            call_command('archive_chan_import_log', path, used_threads=10, jobs=1)
+
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(models.Update.objects.count(), 1)
+        self.assertEqual(models.Update.objects.get().status, models.Update.COMPLETED)
+
+    def test_status_after_import(self):
+        """Imported updates should be included in the status just like the updates saved by the scraper."""
+        # The cached status would outlive the rolled back updates.
+        self.addCleanup(cache.invalidate_status)
+
+        directory = tempfile.mkdtemp()
+
+        try:
+            path = os.path.join(directory, 'log')
+            with open(path, 'w') as f:
+                f.write(self.line)
+
+            call_command('archive_chan_import_log', path, used_threads=10, jobs=1)
+
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(models.Board.objects.get(name='a').last_update, models.Update.objects.get())
+        self.assertEqual(models.UpdateDailyStats.objects.get().added_posts, 10)
+
+        response = Client().get(reverse('archive_chan:api_status'))
+        response_data = json.loads(response.content.decode())
+        self.assertEqual([update['board'] for update in response_data['last_updates']], ['/a/'])
+        self.assertEqual(len(response_data['chart_data']['rows']), 1)
+
+
+class ExportTest(TestCase):
+    def test_months(self):
+        since = datetime.datetime(2014, 11, 15, 0, 0, 0, 0, utc)
+        until = datetime.datetime(2015, 1, 2, 0, 0, 0, 0, utc)
+        months = export.get_months(since, until)
+
+        self.assertEqual([start.month for start, end in months], [11, 12, 1])
+        self.assertEqual(months[0][0], since)
+        self.assertEqual(months[-1][1], until)
+
+    def test_queryset(self):
+        board = models.Board.objects.create(name='a')
+        thread = models.Thread.objects.create(board=board, number=1)
+        models.Post.objects.create(thread=thread, number=1, time=now)
+
+        self.assertEqual(export.get_queryset('post', 'a', now, None).count(), 1)
+        self.assertEqual(export.get_queryset('post', 'a', None, now).count(), 0)
+        self.assertEqual(export.get_queryset('thread', 'b', None, None).count(), 0)
+
+    def test_frozen_rows(self):
+        board = models.Board.objects.create(name='a')
+        thread = models.Thread.objects.create(board=board, number=1, saved=True)
+
+        for number in range(1, 3):
+            post = models.Post.objects.create(thread=thread, number=number, time=now + datetime.timedelta(days=number), comment='Post %s' % number)
+
+        image = models.Image.objects.create(post=post, original_name='image', image='post_images/2.jpg', thumbnail='post_thumbnails/2.jpg')
+
+        with transaction.atomic():
+            models.FrozenThread.freeze(thread)
+
+        posts = list(export.iter_frozen_rows('post', 'a', None, None))
+        self.assertEqual([(row[1], row[2], row[3]) for row in posts], [(thread.pk, 1, now + datetime.timedelta(days=1)), (thread.pk, 2, now + datetime.timedelta(days=2))])
+        self.assertEqual(list(export.iter_frozen_rows('image', 'a', None, None)), [(image.pk, post.pk, 'image', 'post_images/2.jpg', 'post_thumbnails/2.jpg')])
+        self.assertEqual(len(list(export.iter_frozen_rows('post', 'a', now + datetime.timedelta(days=2), None))), 1)
+        self.assertEqual(list(export.iter_frozen_rows('post', 'b', None, None)), [])
+
+
+class TagIndexTest(TestCase):
+    def test_suggest(self):
+        index = tags.TagIndex([('Linux', 1), ('linux-kernel', 5), ('Gentoo', 3), ('nix', 2)])
+
+        self.assertEqual(index.suggest('lin', 5), ['linux-kernel', 'Linux'])
+        self.assertEqual(index.suggest('NIX', 5), ['nix'])
+        self.assertEqual(index.suggest('x', 2), ['linux-kernel', 'nix'])
+        self.assertEqual(index.suggest('inux-k', 5), ['linux-kernel'])
+        self.assertEqual(index.suggest('windows', 5), [])
+
+    def test_refresh(self):
+        board = models.Board.objects.create(name='a')
+        thread = models.Thread.objects.create(board=board, number=1)
+
+        models.Tag.objects.create(name='first')
+        self.assertEqual(tags.suggest('fir'), ['first'])
+
+        tag = models.Tag.objects.create(name='fire')
+        models.TagToThread.objects.create(thread=thread, tag=tag)
+        self.assertEqual(tags.suggest('fir'), ['fire', 'first'])
+
+
+class RemoveOrphanedFilesTest(TestCase):
+    def setUp(self):
+        self.command = remove_orphaned_files.Command()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_file_names_order(self):
+        for name in ('a/b', 'a-c', 'a/a/z', 'b'):
+            path = os.path.join(self.directory, 'post_images', *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'w').close()
+
+        names = list(self.command.iter_file_names(os.path.join(self.directory, 'post_images'), 'post_images'))
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), 4)
+
+    def test_merge(self):
+        db_names = iter(['a', 'b', 'b', 'd'])
+        file_names = iter(['b', 'c', 'd', 'e'])
+        self.assertEqual(
+            list(self.command.merge(db_names, file_names)),
+            [('missing', 'a'), ('orphaned', 'c'), ('orphaned', 'e')]
+        )
+
+    def test_new_files(self):
+        old_path = os.path.join(self.directory, 'post_images', 'old.jpg')
+        new_path = os.path.join(self.directory, 'post_images', 'new.jpg')
+        os.makedirs(os.path.dirname(old_path))
+
+        for path in (old_path, new_path):
+            open(path, 'w').close()
+
+        # The new file was downloaded while the directory was being walked.
+        os.utime(old_path, (0, 0))
+        os.utime(new_path, (time.time() + 60, time.time() + 60))
+
+        self.command.iter_db_names = lambda field, upload_to_directory, chunk_size: iter([])
+
+        with override_settings(MEDIA_ROOT=self.directory), ThreadPoolExecutor(max_workers=1) as executor:
+            result = self.command.process_directory('post_images', 'image', executor, {'chunk_size': 10, 'dry_run': False, 'progress': False, 'verbosity': 1})
+
+        self.assertEqual(result, (1, 0, 1))
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(new_path))
+
+
+class ShardMediaTest(TestCase):
+    def setUp(self):
+        self.command = shard_media.Command()
+        self.directory = tempfile.mkdtemp()
+
+        # Files are moved in a temporary media directory.
+        self.fs = shard_media.fs
+        shard_media.fs = FileSystemStorage(location=self.directory)
+
+    def tearDown(self):
+        shard_media.fs = self.fs
+        shutil.rmtree(self.directory)
+
+    def create_file(self, name, content=''):
+        path = os.path.join(self.directory, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, 'w') as f:
+            f.write(content)
+
+        return path
+
+    def test_sharded_path(self):
+        path = models.get_sharded_path('post_images', '1400000000000.jpg')
+        self.assertRegex(path, r'^post_images/[0-9a-f]{2}/[0-9a-f]{2}/1400000000000\.jpg$')
+        self.assertEqual(path, models.image_upload_to(None, '1400000000000.jpg'))
+
+    def test_move(self):
+        source = self.create_file('post_images/1.jpg')
+        new_name = self.command.move_file('post_images/1.jpg', 'post_images')
+
+        self.assertEqual(new_name, models.get_sharded_path('post_images', '1.jpg'))
+        self.assertFalse(os.path.exists(source))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, *new_name.split('/'))))
+
+        # Moved during the previous run.
+        self.assertEqual(self.command.move_file('post_images/1.jpg', 'post_images'), new_name)
+        self.assertEqual(self.command.move_file('post_images/2.jpg', 'post_images'), None)
+
+    def test_collision(self):
+        source = self.create_file('post_images/1.jpg', 'old')
+        destination = self.create_file(models.get_sharded_path('post_images', '1.jpg'), 'new')
+
+        self.assertEqual(self.command.move_file('post_images/1.jpg', 'post_images'), 'post_images/1.jpg')
+        self.assertEqual(self.command.collisions, 1)
+
+        with open(destination) as f:
+            self.assertEqual(f.read(), 'new')
+        self.assertTrue(os.path.exists(source))
+
+
+class ModerationTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+
+        board = models.Board.objects.create(name='a')
+
+        for number in range(1, 5):
+            thread = models.Thread.objects.create(board=board, number=number, replies=1, saved=(number == 1))
+            models.Post.objects.create(thread=thread, number=number, time=now)
+
+    def test_select(self):
+        self.assertEqual(sorted(number for id, number in moderation.get_threads('a', numbers=[2, 3, 9])), [2, 3])
+        self.assertEqual(sorted(number for id, number in moderation.get_threads('a', parameters={'saved': 'no'})), [2, 3, 4])
+        self.assertEqual(len(moderation.get_threads('a', parameters={})), 4)
+
+    def test_tags(self):
+        threads = moderation.get_threads('a', numbers=[1, 2])
+        self.assertEqual(moderation.add_tag('a', threads, 'tag'), 2)
+        self.assertEqual(moderation.add_tag('a', moderation.get_threads('a', parameters={}), 'tag'), 2)
+        self.assertEqual(models.TagToThread.objects.filter(tag__name='tag').count(), 4)
+        self.assertEqual(tags.suggest('ta'), ['tag'])
+
+        self.assertEqual(moderation.remove_tag('a', threads, 'tag'), 2)
+        self.assertEqual(moderation.remove_tag('a', threads, 'missing'), 0)
+        self.assertEqual(sorted(models.TagToThread.objects.values_list('thread__number', flat=True)), [3, 4])
+
+    def test_save(self):
+        with transaction.atomic():
+            models.FrozenThread.freeze(models.Thread.objects.get(number=1))
+
+        self.assertEqual(moderation.set_saved('a', moderation.get_threads('a', parameters={'saved': 'no'}), True), 3)
+        self.assertEqual(moderation.set_saved('a', moderation.get_threads('a', numbers=[1]), False), 1)
+        self.assertEqual(models.FrozenThread.objects.count(), 0)
+        self.assertEqual(models.Post.objects.filter(thread__number=1).count(), 1)
+
+    def test_command(self):
+        call_command('archive_chan_moderate', 'a', filter='saved=no', add_tag='unsaved', save=True)
+        self.assertEqual(models.Thread.objects.filter(saved=True).count(), 4)
+        self.assertEqual(models.TagToThread.objects.count(), 3)
+
+    def test_not_authorized(self):
+        response = self.client.post(reverse('archive_chan:ajax_bulk_save_threads'), {'board': 'a', 'filter': '', 'state': 'true'})
+        self.assertIn('error', json.loads(response.content.decode()))
+        self.assertEqual(models.Thread.objects.filter(saved=True).count(), 1)
+
+
+class PartitionPostsTest(TestCase):
+    def setUp(self):
+        self.command = partition_posts.Command()
+
+    def test_months(self):
+        months = list(self.command.iter_months(datetime.date(2013, 11, 15), datetime.date(2014, 2, 1)))
+        self.assertEqual(months, [datetime.date(2013, 11, 1), datetime.date(2013, 12, 1), datetime.date(2014, 1, 1), datetime.date(2014, 2, 1)])
+
+    def test_partition_sql(self):
+        sql = self.command.get_partition_sql(datetime.date(2013, 12, 1))
+        self.assertIn('_y2013m12', sql)
+        self.assertIn("FROM ('2013-12-01') TO ('2014-01-01')", sql)
+
+    def test_convert_sql(self):
+        board = models.Board.objects.create(name='a')
+        thread = models.Thread.objects.create(board=board, number=1)
+        models.Post.objects.create(thread=thread, number=1, time=now)
+
+        statements = self.command.get_convert_sql(1)
+
+        self.assertTrue([sql for sql in statements if 'PARTITION BY RANGE' in sql])
+        self.assertTrue([sql for sql in statements if '_y2014m04' in sql])
+        self.assertTrue([sql for sql in statements if 'FOREIGN KEY' in sql and models.Thread._meta.db_table in sql])
+
+    def test_refuse_twice(self):
+        self.command.is_partitioned = lambda: True
+        self.assertRaises(CommandError, self.command.handle, convert=True, months_ahead=1, apply=False)
+
+        self.command.is_partitioned = lambda: False
+        self.assertRaises(CommandError, self.command.handle, convert=False, months_ahead=1, apply=False)
+
+
 class ApiTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -179,6 +847,151 @@ class ApiTest(TestCase):
         self.assertEqual('last_updates' in response_data and len(response_data['last_updates']) == 2, True)
         self.assertEqual('chart_data' in response_data and len(response_data['chart_data']['rows']) == 1, True)
 
+    def test_status_rollups(self):
+        # The cached status would outlive the rolled back updates.
+        self.addCleanup(cache.invalidate_status)
+
+        start = now - datetime.timedelta(seconds=30)
+        models.Update.objects.create(board=self.board_a, start=start, end=now, status=models.Update.COMPLETED, used_threads=1, total_time=30, added_posts=10)
+        models.Update.objects.create(board=self.board_a, start=start, end=now, status=models.Update.COMPLETED, used_threads=1, total_time=10, added_posts=10)
+        last = models.Update.objects.create(board=self.board_a, start=now, status=models.Update.CURRENT, used_threads=1)
+
+        self.assertEqual(models.Board.objects.get(name='a').last_update, last)
+
+        stats = models.UpdateDailyStats.objects.get()
+        self.assertEqual((stats.date, stats.updates, stats.total_time, stats.added_posts), (now.date(), 2, 40, 20))
+
+        response, response_data = self.get_api(reverse('archive_chan:api_status'))
+        self.assertEqual(response_data['chart_data']['rows'][0]['c'][1]['v'], 2)
+
+        last.delete()
+        self.assertEqual(models.Board.objects.get(name='a').last_update.status, models.Update.COMPLETED)
+
+    def test_get_parent_threads(self):
+        thread = models.Thread.objects.create(board=self.board_a, number=1)
+        for number in (1, 2):
+            models.Post.objects.create(thread=thread, number=number, time=now)
+
+        response, response_data = self.get_api(reverse('archive_chan:ajax_get_parent_threads') + '?board=a&posts=1,2,3')
+        self.assertEqual(response_data['parent_threads'], {'1': 1, '2': 1})
+
+        response, response_data = self.get_api(reverse('archive_chan:ajax_get_parent_thread') + '?board=a&post=2')
+        self.assertEqual(response_data['parent_thread'], 1)
+
+        response, response_data = self.get_api(reverse('archive_chan:ajax_get_parent_threads') + '?board=a&posts=x')
+        self.assertIn('error', response_data)
+
+    @override_settings(ARCHIVE_CHAN_GALLERY_MAX_AMOUNT=2)
+    def test_gallery(self):
+        thread = models.Thread.objects.create(board=self.board_a, number=1)
+        for number in range(1, 4):
+            post = models.Post.objects.create(thread=thread, number=number, time=now)
+            models.Image.objects.create(post=post, original_name='image', image='post_images/%s.webm' % number, thumbnail='post_thumbnails/%s.jpg' % number)
+
+        response, response_data = self.get_api(reverse('archive_chan:api_gallery') + '?amount=100')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([image['post'] for image in response_data['images']], [3, 2])
+        self.assertEqual(response_data['images'][0]['extension'], '.webm')
+        self.assertEqual(response_data['images'][0]['post_url'], reverse('archive_chan:thread', args=('a', 1)) + '#post-3')
+
+        response, response_data = self.get_api(reverse('archive_chan:api_gallery') + '?last=%s' % response_data['images'][-1]['id'])
+        self.assertEqual([image['post'] for image in response_data['images']], [1])
+
+        response, response_data = self.get_api(reverse('archive_chan:api_gallery') + '?amount=x')
+        self.assertEqual(response.status_code, 400)
+
+    def test_gallery_cache(self):
+        # The cached gallery would outlive the rolled back images.
+        self.addCleanup(cache.invalidate_board, 'a')
+
+        thread = models.Thread.objects.create(board=self.board_a, number=1)
+        post = models.Post.objects.create(thread=thread, number=1, time=now)
+        models.Image.objects.create(post=post, original_name='image', image='post_images/1.jpg', thumbnail='post_thumbnails/1.jpg')
+
+        url = reverse('archive_chan:api_gallery') + '?board=a'
+        response, response_data = self.get_api(url)
+        self.assertEqual(len(response_data['images']), 1)
+        self.assertIn('max-age=', response['Cache-Control'])
+
+        post = models.Post.objects.create(thread=thread, number=2, time=now)
+        models.Image.objects.create(post=post, original_name='image', image='post_images/2.jpg', thumbnail='post_thumbnails/2.jpg')
+
+        response, response_data = self.get_api(url)
+        self.assertEqual(len(response_data['images']), 1)
+
+        cache.invalidate_thread('a', 1)
+
+        response, response_data = self.get_api(url)
+        self.assertEqual(len(response_data['images']), 2)
+
+    def test_gallery_cache_all_boards(self):
+        thread = models.Thread.objects.create(board=self.board_a, number=1)
+        post = models.Post.objects.create(thread=thread, number=1, time=now)
+        models.Image.objects.create(post=post, original_name='image', image='post_images/1.jpg', thumbnail='post_thumbnails/1.jpg')
+
+        url = reverse('archive_chan:api_gallery')
+        response, response_data = self.get_api(url)
+        self.assertEqual(len(response_data['images']), 1)
+
+        # Nothing invalidates the data of all boards so it is not cached.
+        post = models.Post.objects.create(thread=thread, number=2, time=now)
+        models.Image.objects.create(post=post, original_name='image', image='post_images/2.jpg', thumbnail='post_thumbnails/2.jpg')
+
+        response, response_data = self.get_api(url)
+        self.assertEqual(len(response_data['images']), 2)
+
+    def test_gzip(self):
+        # The cached status would outlive the rolled back updates.
+        self.addCleanup(cache.invalidate_status)
+
+        for number in range(1, 4):
+            models.Update.objects.create(board=self.board_a, start=now, end=now, status=models.Update.COMPLETED, used_threads=1)
+
+        response = self.client.get(reverse('archive_chan:api_status'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('last_updates', json.loads(gzip.decompress(response.content).decode()))
+
+    def test_thread_json(self):
+        thread = models.Thread.objects.create(board=self.board_a, number=1)
+        for number in range(1, 4):
+            models.Post.objects.create(thread=thread, number=number, time=now, comment='Post %s' % number)
+
+        url = reverse('archive_chan:api_thread', args=('a', 1))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        response_data = json.loads(b''.join(response.streaming_content).decode())
+        self.assertEqual([post['no'] for post in response_data['posts']], [1, 2, 3])
+        self.assertEqual([post['resto'] for post in response_data['posts']], [0, 1, 1])
+        self.assertEqual(response_data['posts'][0]['replies'], 2)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(reverse('archive_chan:api_thread', args=('a', 2)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_board_threads_json(self):
+        for number in (1, 2):
+            models.Thread.objects.create(board=self.board_a, number=number, last_reply=now)
+
+        response = self.client.get(reverse('archive_chan:api_board_threads', args=('a',)))
+        response_data = json.loads(b''.join(response.streaming_content).decode())
+        self.assertEqual([thread['no'] for thread in response_data[0]['threads']], [2, 1])
+
+    def test_board_threads_json_etag(self):
+        thread = models.Thread.objects.create(board=self.board_a, number=1)
+        models.Post.objects.create(thread=thread, number=1, time=now)
+        models.Post.objects.create(thread=thread, number=2, time=now)
+
+        url = reverse('archive_chan:api_board_threads', args=('a',))
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # A removed reply doesn't change the last reply time.
+        models.Post.objects.get(thread=thread, number=1).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
 class TriggersTest(TestCase):
     def setUp(self):
         board = models.Board.objects.create(name='a')
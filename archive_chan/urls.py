@@ -1,9 +1,9 @@
 from django.conf.urls import patterns, url
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.views.decorators.cache import cache_page
 
 import archive_chan.views.core as core
 import archive_chan.views.api as api
+from archive_chan.lib.cache import cache_page
 
 from archive_chan.settings import AppSettings
 
@@ -12,7 +12,7 @@ cache_static = AppSettings.get('VIEW_CACHE_AGE_STATIC')
 
 urlpatterns = patterns('',
     # Global.
-    url(r'^$', cache_page(cache)(core.IndexView.as_view()), name='index'),
+    url(r'^$', cache_page(cache, 'boards')(core.IndexView.as_view()), name='index'),
     url(r'^stats/$', cache_page(cache_static)(core.StatsView.as_view()), name='stats'),
     url(r'^gallery/$', cache_page(cache_static)(core.GalleryView.as_view()), name='gallery'),
     url(r'^search/$', core.SearchView.as_view(), name='search'),
@@ -36,11 +36,18 @@ urlpatterns = patterns('',
     url(r'^api/status/$', api.StatusView.as_view(), name='api_status'),
     url(r'^api/stats/$', api.StatsView.as_view(), name='api_stats'),
     url(r'^api/gallery/$', api.GalleryView.as_view(), name='api_gallery'),
+    url(r'^api/board/(?P<board>[a-z]+)/threads/$', api.board_threads_json, name='api_board_threads'),
+    url(r'^api/board/(?P<board>[a-z]+)/thread/(?P<thread>[0-9]+)/$', api.thread_json, name='api_thread'),
 
     url(r'^ajax/thread/save/$', api.ajax_save_thread, name='ajax_save_thread'),
     url(r'^ajax/get_parent_thread/$', api.ajax_get_parent_thread, name='ajax_get_parent_thread'),
+    url(r'^ajax/get_parent_threads/$', api.ajax_get_parent_threads, name='ajax_get_parent_threads'),
 
     url(r'^ajax/tag/suggest/$', api.ajax_suggest_tag, name='ajax_suggest_tag'),
     url(r'^ajax/tag/add/$', api.ajax_add_tag, name='ajax_add_tag'),
     url(r'^ajax/tag/remove/$', api.ajax_remove_tag, name='ajax_remove_tag'),
+
+    url(r'^ajax/bulk/save/$', api.ajax_bulk_save_threads, name='ajax_bulk_save_threads'),
+    url(r'^ajax/bulk/tag/add/$', api.ajax_bulk_add_tag, name='ajax_bulk_add_tag'),
+    url(r'^ajax/bulk/tag/remove/$', api.ajax_bulk_remove_tag, name='ajax_bulk_remove_tag'),
 )
@@ -1,12 +1,21 @@
-import json
+import json, os, hashlib
 
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Max, Count, Sum
 from django.core.urlresolvers import reverse
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse, Http404, QueryDict
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 from django.views.generic.base import View
 
-from archive_chan.models import Update, Image, Thread, Tag, TagToThread
+from archive_chan.models import Board, Update, UpdateDailyStats, Image, Post, Thread, Tag, TagToThread, FrozenThread, fs
+from archive_chan.settings import AppSettings
 import archive_chan.lib.stats as stats
+import archive_chan.lib.cache as cache
+import archive_chan.lib.serialization as serialization
+import archive_chan.lib.tags as tags
+import archive_chan.lib.moderation as moderation
 
 class ApiError(Exception):
     def __init__(self, status_code=500, error_code='unknown', message='Unknown server error.'):
@@ -21,7 +30,50 @@ class NotImplementedApiError(ApiError):
         message = kwargs.get('message', 'Not implemented.')
         super(NotImplementedApiError, self).__init__(status_code, error_code, message) 
 
+gzip_middleware = GZipMiddleware()
+
 class ApiView(View):
+    # Data returned for GET requests is cached for that many seconds if this is set.
+    # The key contains the versions of the board and the thread passed in the query
+    # string so the data is replaced as soon as it changes. Requests without a board
+    # are not cached, nothing is invalidated when the data of any board changes.
+    cache_timeout = None
+
+    # Responses to GET requests can be cached by the clients if this is set.
+    client_cache_age = None
+
+    def get_cache_scopes(self, request):
+        """Scopes of the data requested with the board and thread parameters.
+        Returns None if the request is not limited to a board.
+        """
+        if not request.GET.get('board'):
+            return None
+
+        kwargs = {'board': request.GET['board']}
+
+        if request.GET.get('thread'):
+            kwargs['thread'] = request.GET['thread']
+
+        return cache.get_scopes(kwargs, [])
+
+    def get_response_data(self, request, attr_name, *args, **kwargs):
+        function = lambda: getattr(self, attr_name)(request, *args, **kwargs)
+
+        if self.cache_timeout is None or request.method != 'GET':
+            return function()
+
+        scopes = self.get_cache_scopes(request)
+
+        if scopes is None:
+            return function()
+
+        name = format('api:%s:%s' % (
+            self.__class__.__name__,
+            hashlib.md5(request.get_full_path().encode()).hexdigest()
+        ))
+
+        return cache.get_or_set(name, scopes, self.cache_timeout, function)
+
     def handle_exception(self, exception):
         """Extract exception parameters."""
         response_data = {
@@ -37,7 +89,7 @@ class ApiView(View):
         try:
             attr_name = request.method.lower() + '_api_response'
             if request.method.lower() in self.http_method_names and hasattr(self, attr_name):
-                response_data = getattr(self, attr_name)(request, *args, **kwargs)
+                response_data = self.get_response_data(request, attr_name, *args, **kwargs)
                 status_code = 200
             else:
                 return self.http_method_not_allowed(request, *args, **kwargs)
@@ -50,13 +102,24 @@ class ApiView(View):
         except Exception as e:
             response_data, status_code = self.handle_exception(ApiError())
 
-        return HttpResponse(
-            json.dumps(response_data, indent=4),
+        response = HttpResponse(
+            json.dumps(response_data, separators=(',', ':')),
             content_type='application/json',
             status=status_code
         )
 
+        if self.client_cache_age is not None and request.method == 'GET' and status_code == 200:
+            patch_cache_control(response, public=True, max_age=self.client_cache_age)
+
+        # Compressed if the client accepts it and the response is not too short.
+        return gzip_middleware.process_response(request, response)
+
 class StatusView(ApiView):
+    """Served from the last update pointers of the boards and UpdateDailyStats. The response
+    is cached until the next update starts or ends.
+    """
+    client_cache_age = AppSettings.get('API_CLIENT_CACHE_AGE')
+
     def get_chart_data(self, queryset):
         """Creates data structured as required by Google Charts."""
         chart_data = {
@@ -69,18 +132,18 @@ class StatusView(ApiView):
 
         for entry in queryset:
             value_string = format("Date(%s, %s, %s, %s, %s, %s)" % (
-                entry['date'].year,
-                entry['date'].month - 1, # JavaScript months start at 0.
-                entry['date'].day,
+                entry.date.year,
+                entry.date.month - 1, # JavaScript months start at 0.
+                entry.date.day,
                 0,
                 0,
                 0
             ))
 
-            label_string = entry['date'].strftime('%Y-%m-%d')
+            label_string = entry.date.strftime('%Y-%m-%d')
 
-            if entry['average_posts'] != 0:
-                value = round(entry['average_time'] / entry['average_posts'], 3)
+            if entry.added_posts != 0:
+                value = round(entry.total_time / entry.added_posts, 3)
             else:
                 value = 0
 
@@ -93,47 +156,70 @@ class StatusView(ApiView):
 
         return chart_data
 
-    def get_api_response(self, request, *args, **kwargs):
+    def get_status(self):
         response_data = {}
 
         # Last updates.
-        last_updates = Update.objects.order_by('board__name', '-start').distinct('board').select_related('board')
+        boards = Board.objects.exclude(last_update=None).select_related('last_update')
 
         response_data['last_updates'] = [{
-            'board': str(update.board),
-            'start': update.start.isoformat(),
-            'end': update.end.isoformat() if update.end else None,
-            'status': update.status,
-            'status_verbose': update.get_status_display(),
-        } for update in last_updates]
+            'board': str(board),
+            'start': board.last_update.start.isoformat(),
+            'end': board.last_update.end.isoformat() if board.last_update.end else None,
+            'status': board.last_update.status,
+            'status_verbose': board.last_update.get_status_display(),
+        } for board in boards]
 
         # Chart data.
-        updates = Update.objects.filter(status=Update.COMPLETED).extra({
-            'date': 'date("end")'
-        }).values('date').order_by('date').annotate(
-            average_time=Avg('total_time'),
-            average_posts=Avg('added_posts')
-        )
-
-        response_data['chart_data'] = self.get_chart_data(updates)
+        response_data['chart_data'] = self.get_chart_data(UpdateDailyStats.objects.all())
 
         return response_data
 
+    def get_api_response(self, request, *args, **kwargs):
+        return cache.get_or_set('status', [('status',)], AppSettings.get('VIEW_CACHE_AGE'), self.get_status)
+
 class StatsView(ApiView):
+    cache_timeout = AppSettings.get('VIEW_CACHE_AGE_STATIC')
+    client_cache_age = AppSettings.get('API_CLIENT_CACHE_AGE')
+
     def get_api_response(self, request, *args, **kwargs):
         board_name = request.GET.get('board', None)
         thread_number = request.GET.get('thread', None)
         return stats.get_stats(board=board_name, thread=thread_number)
 
 class GalleryView(ApiView):
+    cache_timeout = AppSettings.get('VIEW_CACHE_AGE_STATIC')
+    client_cache_age = AppSettings.get('API_CLIENT_CACHE_AGE')
+
+    # Valid thread number which is replaced with the actual number in the URLs.
+    thread_marker = '987654321987654321'
+
+    def get_integer(self, request, name, default=None):
+        value = request.GET.get(name)
+
+        if value is None:
+            return default
+
+        try:
+            return int(value)
+        except ValueError:
+            raise ApiError(400, 'invalid_parameter', 'Parameter %s must be a number.' % name)
+
+    def get_thread_url_template(self, board_name):
+        """Returns a format string for the URLs of the threads in the board."""
+        url = reverse('archive_chan:thread', args=(board_name, self.thread_marker))
+        return url.replace('%', '%%').replace(self.thread_marker, '%s') + '#post-%s'
+
     def get_api_response(self, request, *args, **kwargs):
         board_name = request.GET.get('board')
-        thread_number = request.GET.get('thread')
-        last = request.GET.get('last')
-        amount = int(request.GET.get('amount', 10))
+        thread_number = self.get_integer(request, 'thread')
+        last = self.get_integer(request, 'last')
+        amount = self.get_integer(request, 'amount', 10)
+        amount = max(1, min(amount, AppSettings.get('GALLERY_MAX_AMOUNT')))
+
+        # Rows: id, image, post number, thread number, board name.
+        queryset = Image.objects.values_list('id', 'image', 'post__number', 'post__thread__number', 'post__thread__board')
 
-        queryset = Image.objects.select_related('post', 'post__thread', 'post__thread__board')
-        
         # Board specific gallery?
         if board_name is not None:
             queryset = queryset.filter(
@@ -152,29 +238,113 @@ class GalleryView(ApiView):
                 id__lt=last
             )
 
-        queryset = queryset.order_by('-id')[:amount]
+        rows = queryset.order_by('-id')[:amount]
+
+        # Images of a frozen thread are stored in the archive.
+        if board_name is not None and thread_number is not None:
+            frozen = FrozenThread.objects.filter(thread__board=board_name, thread__number=thread_number).first()
+
+            if frozen is not None:
+                rows = [
+                    (image.id, image.image.name, image.post.number, thread_number, board_name)
+                    for image in reversed(frozen.get_images()) if last is None or image.id < last
+                ][:amount]
 
         # Prepare the data.
         json_data = {
             'images': []
         }
 
-        for image in queryset:
+        url_templates = {}
+
+        for image_id, image_name, post_number, thread_number, board_name in rows:
+            if not board_name in url_templates:
+                url_templates[board_name] = self.get_thread_url_template(board_name)
+
             json_data['images'].append({
-                'id': image.id,
-                'board': image.post.thread.board.name,
-                'thread': image.post.thread.number,
-                'post': image.post.number,
-                'extension': image.get_extension(),
-                'url': image.image.url,
-                'post_url': reverse(
-                    'archive_chan:thread',
-                    args=(image.post.thread.board.name, image.post.thread.number)
-                ) + format('#post-%s' % image.post.number)
+                'id': image_id,
+                'board': board_name,
+                'thread': thread_number,
+                'post': post_number,
+                'extension': os.path.splitext(image_name)[1],
+                'url': fs.url(image_name),
+                'post_url': url_templates[board_name] % (thread_number, post_number),
             })
-        
+
         return json_data
 
+def get_thread_state(request, board, thread):
+    """Returns the values which change when the thread is updated. Stored in the request because
+    it is needed by the ETag and the Last-Modified functions.
+    """
+    if not hasattr(request, 'archive_chan_thread_state'):
+        request.archive_chan_thread_state = Thread.objects.filter(
+            board=board,
+            number=thread
+        ).values_list('last_reply', 'replies', 'images').first()
+
+    return request.archive_chan_thread_state
+
+def thread_json_etag(request, board, thread):
+    state = get_thread_state(request, board, thread)
+    if state is None:
+        return None
+    return hashlib.md5(('%s-%s-%s-%s-%s' % ((board, thread) + state)).encode()).hexdigest()
+
+def thread_json_last_modified(request, board, thread):
+    state = get_thread_state(request, board, thread)
+    return state[0] if state else None
+
+@condition(etag_func=thread_json_etag, last_modified_func=thread_json_last_modified)
+def thread_json(request, board, thread):
+    """All posts in the thread in the format used by the 4chan API. Posts are fetched and sent in chunks."""
+    if get_thread_state(request, board, thread) is None:
+        raise Http404
+
+    thread = Thread.objects.select_related('board').get(board=board, number=thread)
+
+    return StreamingHttpResponse(
+        serialization.iter_thread_json(thread, AppSettings.get('THREAD_CHUNK_SIZE')),
+        content_type='application/json'
+    )
+
+def get_board_state(request, board):
+    if not hasattr(request, 'archive_chan_board_state'):
+        request.archive_chan_board_state = Thread.objects.filter(board=board).aggregate(
+            last_reply=Max('last_reply'),
+            threads=Count('id'),
+            replies=Sum('replies'),
+            images=Sum('images')
+        )
+
+    return request.archive_chan_board_state
+
+def board_threads_json_etag(request, board):
+    # Removed posts and images change the counters, the version covers other modifications.
+    state = get_board_state(request, board)
+    return hashlib.md5(('%s-%s-%s-%s-%s-%s' % (
+        board,
+        cache.get_version('board', board),
+        state['last_reply'],
+        state['threads'],
+        state['replies'],
+        state['images']
+    )).encode()).hexdigest()
+
+def board_threads_json_last_modified(request, board):
+    return get_board_state(request, board)['last_reply']
+
+@condition(etag_func=board_threads_json_etag, last_modified_func=board_threads_json_last_modified)
+def board_threads_json(request, board):
+    """List of the threads in the board in the format of threads.json from the 4chan API."""
+    if not Board.objects.filter(name=board).exists():
+        raise Http404
+
+    return StreamingHttpResponse(
+        serialization.iter_thread_list_json(board, 1000),
+        content_type='application/json'
+    )
+
 def ajax_save_thread(request):
     """View used for AJAX save thread calls."""
     response = {}
@@ -188,8 +358,18 @@ def ajax_save_thread(request):
             state = (state == 'true')
 
             thread = Thread.objects.get(board=board_name, number=thread_number)
-            thread.saved = state
-            thread.save()
+
+            with transaction.atomic():
+                thread.saved = state
+                thread.save(update_fields=['saved'])
+
+                # Only saved threads can be frozen.
+                if not state:
+                    frozen = FrozenThread.objects.filter(thread=thread).first()
+                    if frozen is not None:
+                        frozen.thaw()
+
+            cache.invalidate_thread(board_name, thread_number)
 
             response = {
                 'state': thread.saved
@@ -207,6 +387,36 @@ def ajax_save_thread(request):
 
     return HttpResponse(json.dumps(response), content_type='application/json')
 
+# Post numbers mapped to the thread numbers. Posts don't move between the threads.
+# Entries are not removed when archive_chan_remove_old_threads deletes a thread, the command
+# runs in a different process. Links to such posts point to a missing thread instead of being
+# marked as dead until the entries are evicted or the web server is restarted.
+parent_threads = cache.LRUCache(AppSettings.get('PARENT_THREAD_CACHE_SIZE'))
+
+def get_parent_threads(board_name, post_numbers):
+    """Returns a dictionary mapping the post numbers to the numbers of their threads.
+    Posts which don't exist are omitted and not cached, they might be added later.
+    """
+    result = {}
+    missing = []
+
+    for post_number in post_numbers:
+        thread_number = parent_threads.get((board_name, post_number))
+
+        if thread_number is None:
+            missing.append(post_number)
+        else:
+            result[post_number] = thread_number
+
+    if missing:
+        rows = Post.objects.filter(thread__board=board_name, number__in=missing).values_list('number', 'thread__number')
+
+        for post_number, thread_number in rows:
+            parent_threads.set((board_name, post_number), thread_number)
+            result[post_number] = thread_number
+
+    return result
+
 def ajax_get_parent_thread(request):
     """Returns a number of a thread the specified post belongs to."""
     response = {}
@@ -215,13 +425,32 @@ def ajax_get_parent_thread(request):
         post_number = int(request.GET['post'])
         board_name = request.GET['board']
 
-        parent_thread_number = Post.objects.get(
-            thread__board=board_name,
-            number=post_number
-        ).thread.number
+        response = {
+            'parent_thread': get_parent_threads(board_name, [post_number])[post_number]
+        }
+
+    except:
+        response = {
+            'error': 'Error.'
+        }
+
+    return HttpResponse(json.dumps(response), content_type='application/json')
+
+def ajax_get_parent_threads(request):
+    """Returns numbers of the threads the specified posts belong to. Posts are passed as a comma
+    separated list of numbers. Posts which don't exist are not included in the response.
+    """
+    response = {}
+
+    try:
+        board_name = request.GET['board']
+        post_numbers = set([int(number) for number in request.GET['posts'].split(',') if number])
+
+        if len(post_numbers) > AppSettings.get('PARENT_THREAD_MAX_AMOUNT'):
+            raise ValueError()
 
         response = {
-            'parent_thread': parent_thread_number
+            'parent_threads': dict([(str(post), thread) for post, thread in get_parent_threads(board_name, post_numbers).items()])
         }
 
     except:
@@ -238,11 +467,9 @@ def ajax_suggest_tag(request):
     try:
         query = request.GET['query']
 
-        tags = Tag.objects.filter(name__icontains=query)[:5]
-
         response = {
             'query': query, 
-            'suggestions': [tag.name for tag in tags]
+            'suggestions': tags.suggest(query, 5)
         }
 
     except:
@@ -274,6 +501,8 @@ def ajax_add_tag(request):
                 tag_to_thread = TagToThread(thread=thread, tag=tag)
                 tag_to_thread.save()
 
+                cache.invalidate_thread(board_name, thread_number)
+
                 added = True
             else:
                 added = False
@@ -309,6 +538,8 @@ def ajax_remove_tag(request):
                 tag__name=tag
             ).delete()
 
+            cache.invalidate_thread(board_name, thread_number)
+
             response = {
                 'removed': True
             }
@@ -323,3 +554,93 @@ def ajax_remove_tag(request):
         }
 
     return HttpResponse(json.dumps(response), content_type='application/json')
+
+def get_bulk_threads(request):
+    """Selects the threads for the bulk views. Threads are passed as a comma separated list
+    of numbers or as a filter, which is a query string of the board view, for example
+    'saved=no&last_reply=week'. An empty filter selects all threads in the board.
+    """
+    board_name = request.POST['board']
+
+    if 'threads' in request.POST:
+        numbers = [int(number) for number in request.POST['threads'].split(',') if number]
+        return board_name, moderation.get_threads(board_name, numbers=numbers)
+
+    return board_name, moderation.get_threads(board_name, parameters=QueryDict(request.POST['filter']))
+
+def ajax_bulk_save_threads(request):
+    """View used to save or unsave many threads at once."""
+    response = {}
+
+    if request.user.is_staff:
+        try:
+            board_name, threads = get_bulk_threads(request)
+            state = (request.POST['state'] == 'true')
+
+            response = {
+                'threads': len(threads),
+                'modified': moderation.set_saved(board_name, threads, state)
+            }
+
+        except:
+            response = {
+                'error': 'Error.'
+            }
+    else:
+        response = {
+            'error': 'Not authorized.'
+        }
+
+    return HttpResponse(json.dumps(response), content_type='application/json')
+
+def ajax_bulk_add_tag(request):
+    """View used to add a tag to many threads at once."""
+    response = {}
+
+    if request.user.is_staff:
+        try:
+            board_name, threads = get_bulk_threads(request)
+            tag = request.POST['tag']
+
+            if not tag:
+                raise ValueError()
+
+            response = {
+                'threads': len(threads),
+                'modified': moderation.add_tag(board_name, threads, tag)
+            }
+
+        except:
+            response = {
+                'error': 'Error.'
+            }
+    else:
+        response = {
+            'error': 'Not authorized.'
+        }
+
+    return HttpResponse(json.dumps(response), content_type='application/json')
+
+def ajax_bulk_remove_tag(request):
+    """View used to remove a tag from many threads at once."""
+    response = {}
+
+    if request.user.is_staff:
+        try:
+            board_name, threads = get_bulk_threads(request)
+
+            response = {
+                'threads': len(threads),
+                'modified': moderation.remove_tag(board_name, threads, request.POST['tag'])
+            }
+
+        except:
+            response = {
+                'error': 'Error.'
+            }
+    else:
+        response = {
+            'error': 'Not authorized.'
+        }
+
+    return HttpResponse(json.dumps(response), content_type='application/json')
@@ -1,9 +1,15 @@
+import hashlib
+
 from django.shortcuts import get_object_or_404
 from django.db.models import Max, Min, Count, Q, F
+from django.http import StreamingHttpResponse
+from django.template import loader, Context
 from django.views.generic import ListView, TemplateView
 
 from archive_chan.models import Board, Thread, Post
+from archive_chan.settings import AppSettings
 import archive_chan.lib.modifiers as modifiers
+import archive_chan.lib.cache as cache
 
 class BodyIdMixin(object):
     """This mixin adds an easy way to add body_id to the context."""
@@ -67,35 +73,47 @@ class BoardView(BodyIdMixin, ListView):
         )
     }
 
+    @classmethod
+    def get_modifiers(cls, parameters):
+        """Creates the sort and filter objects from a dictionary like request.GET."""
+        return {
+            'sort': modifiers.SimpleSort(
+                cls.available_parameters['sort'],
+                parameters.get('sort', None)
+            ),
+            'saved': modifiers.SimpleFilter(
+                cls.available_parameters['saved'],
+                parameters.get('saved', None)
+            ),
+            'tagged': modifiers.SimpleFilter(
+                cls.available_parameters['tagged'],
+                parameters.get('tagged', None)
+            ),
+            'last_reply': modifiers.TimeFilter(
+                cls.available_parameters['last_reply'],
+                parameters.get('last_reply', None)
+            ),
+            'tag': modifiers.TagFilter(
+                parameters.get('tag', None)
+            ),
+        }
+
+    @classmethod
+    def filter_threads(cls, queryset, parameters):
+        """Applies the filters without sorting. Used by the bulk moderation tools to select
+        the same threads which are displayed in the board view.
+        """
+        for key, modifier in cls.get_modifiers(parameters).items():
+            if key != 'sort':
+                queryset = modifier.execute(queryset)
+
+        return queryset
+
     def get_parameters(self):
         """Extracts parameters related to filtering and sorting from a request object."""
         parameters = {}
 
-        self.modifiers = {}
-
-        self.modifiers['sort'] = modifiers.SimpleSort(
-            self.available_parameters['sort'],
-            self.request.GET.get('sort', None)
-        )
-
-        self.modifiers['saved'] = modifiers.SimpleFilter(
-            self.available_parameters['saved'],
-            self.request.GET.get('saved', None)
-        )
-
-        self.modifiers['tagged'] = modifiers.SimpleFilter(
-            self.available_parameters['tagged'],
-            self.request.GET.get('tagged', None)
-        )
-
-        self.modifiers['last_reply'] = modifiers.TimeFilter(
-            self.available_parameters['last_reply'],
-            self.request.GET.get('last_reply', None)
-        )
-
-        self.modifiers['tag'] = modifiers.TagFilter(
-            self.request.GET.get('tag', None)
-        )
+        self.modifiers = self.get_modifiers(self.request.GET)
 
         parameters['sort'], parameters['sort_reverse'] = self.modifiers['sort'].get()
         parameters['sort_with_operator'] = self.modifiers['sort'].get_full()
@@ -111,7 +129,7 @@ class BoardView(BodyIdMixin, ListView):
 
         # I don't know how to select all data I need using the ORM without executing
         # TWO damn additional queries for each thread (first post + tags).
-        queryset = Thread.objects.filter(board=self.kwargs['board'], replies__gte=1).select_related('board')
+        queryset = Thread.objects.filter(board=self.kwargs['board'], replies__gte=1).select_related('board', 'frozenthread')
 
         for key, modifier in self.modifiers.items():
             queryset = modifier.execute(queryset)
@@ -125,31 +143,92 @@ class BoardView(BodyIdMixin, ListView):
         context['available_parameters'] = self.available_parameters
         return context
 
-class ThreadView(BodyIdMixin, ListView):
-    """View showing all posts in a specified thread."""
-    model = Post
-    context_object_name = 'post_list'
+class ThreadView(BodyIdMixin, TemplateView):
+    """View showing all posts in a specified thread.
+    Posts are rendered and sent in chunks so the time to the first byte and the memory usage
+    do not depend on the size of the thread.
+    """
     template_name = 'archive_chan/thread.html'
+    posts_template_name = 'archive_chan/snippets/thread_posts.html'
+    posts_marker = '<!-- archive_chan_posts -->'
     body_id = 'body-thread'
 
-    def get_queryset(self):
-        board_name = self.kwargs['board']
-        thread_number = self.kwargs['thread']
-        return Post.objects.select_related('image', 'thread', 'thread__board').filter(
-                thread__number=thread_number,
-                thread__board=board_name
-            )
-
     def get_context_data(self, **kwargs):
-        thread = get_object_or_404(Thread, board=self.kwargs['board'], number=self.kwargs['thread'])
+        self.thread = get_object_or_404(
+            Thread.objects.select_related('board'),
+            board=self.kwargs['board'],
+            number=self.kwargs['thread']
+        )
 
         context = super(ThreadView, self).get_context_data(**kwargs)
         context['board_name'] = self.kwargs['board']
         context['thread_number'] = int(self.kwargs['thread'])
-        context['thread'] = thread 
-        context['tags'] = thread.tagtothread_set.select_related('tag').order_by('tag__name')
+        context['thread'] = self.thread
+        context['tags'] = self.thread.tagtothread_set.select_related('tag').order_by('tag__name')
+        context['posts_marker'] = self.posts_marker
         return context
 
+    def render_posts(self, context):
+        """Generator rendering the posts chunk by chunk. Rendered chunks are cached with the
+        version of the thread and the posts are fetched only if a chunk is not in the cache.
+        """
+        template = loader.get_template(self.posts_template_name)
+        board_name = context['board_name']
+        thread_number = context['thread_number']
+        cache_age = AppSettings.get('VIEW_CACHE_AGE')
+        chunk_size = AppSettings.get('THREAD_CHUNK_SIZE')
+
+        thread_version = cache.get_version('thread', board_name, thread_number)
+        bounds = cache.get_or_set(
+            format('thread_chunks:%s:%s:%s' % (board_name, thread_number, chunk_size)),
+            [('thread', board_name, thread_number)],
+            cache_age,
+            lambda: self.thread.get_post_chunk_bounds(chunk_size)
+        )
+        variant = hashlib.md5(format('%s:%s:%s' % (
+            self.thread.saved,
+            self.request.user.is_staff,
+            ','.join([tagtothread.tag.name for tagtothread in context['tags']])
+        )).encode()).hexdigest()
+
+        for first_number, last_number in bounds:
+            key = format('archive_chan_fragment:thread_posts:%s:%s:%s:%s:%s:%s' % (
+                board_name, thread_number, thread_version, first_number, last_number, variant
+            ))
+            html = cache.backend.get(key)
+
+            if html is None:
+                html = template.render(Context({
+                    'board_name': board_name,
+                    'thread_number': thread_number,
+                    'thread': context['thread'],
+                    'tags': context['tags'],
+                    'user': self.request.user,
+                    'post_list': self.thread.get_post_chunk(first_number, last_number),
+                }))
+                cache.backend.set(key, html, cache_age)
+
+            yield html
+
+    def stream(self, head, tail, context):
+        yield head
+
+        for html in self.render_posts(context):
+            yield html
+
+        yield tail
+
+    def render_to_response(self, context, **response_kwargs):
+        # Render the page without the posts and split it where the posts should be inserted.
+        response = super(ThreadView, self).render_to_response(context, **response_kwargs)
+        head, tail = response.rendered_content.split(self.posts_marker, 1)
+
+        return StreamingHttpResponse(
+            self.stream(head, tail, context),
+            content_type=response['Content-Type'],
+            status=response.status_code
+        )
+
 
 class SearchView(UniversalViewMixin, ListView):
     """View showing all threads in a specified board."""
@@ -1,5 +1,11 @@
 #!/usr/bin/env python
-import os, argparse, json, sys
+import os, argparse, json, sys, re, hashlib, gzip, time
+from multiprocessing import Pool
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 colors = {
     'white': '\033[0m',
@@ -18,6 +24,11 @@ parser = argparse.ArgumentParser()
 parser.add_argument('-m', '--makefile', help='Path to a makefile relative to the current working directory.', default='makefile.json')
 parser.add_argument('--dryrun', help='Don\'t execute any commands.', action='store_true')
 parser.add_argument('--verbose', help='Increase verbosity', action='store_true')
+parser.add_argument('--no-bundles', help='Don\'t create the hashed and compressed copies of the output files.', action='store_true')
+parser.add_argument('--force', help='Rebuild all tasks even if their inputs did not change.', action='store_true')
+parser.add_argument('-j', '--jobs', help='Number of tasks built at the same time.', type=int, default=os.cpu_count() or 1)
+parser.add_argument('--watch', help='Keep running and rebuild the tasks when their inputs change.', action='store_true')
+parser.add_argument('--interval', help='Number of seconds between the checks in the watch mode.', type=float, default=1)
 args = parser.parse_args()
 
 # Establish the path to the makefile and its directory.
@@ -67,6 +78,9 @@ def get_conversion_chain(file_path):
 
     return chain
 
+class BuildError(Exception):
+    pass
+
 def process_file(file_path):
     if args.verbose:
         print('\nPROCESS: %s' % (file_path))
@@ -84,13 +98,70 @@ def process_file(file_path):
             print(command)
         if not args.dryrun:
             if os.system(command) != 0:
-                sys.exit(1)
+                raise BuildError(command)
 
     if len(conversion_chain) > 0:
         return conversion_chain[-1][1]
     else:
         return file_path
 
+def write_compressed(file_path, data):
+    """Creates the .gz variant and the .br variant if the brotli module is installed.
+    Web servers can send them without compressing the file for every request.
+    """
+    with gzip.open(file_path + '.gz', 'wb', 9) as f:
+        f.write(data)
+
+    if brotli is not None:
+        with open(file_path + '.br', 'wb') as f:
+            f.write(brotli.compress(data))
+
+def create_bundle(output):
+    """Copies the output file to a file with a hash of its content in the name and compresses
+    it. Bundles with the previous content are removed. Returns the path of the bundle.
+    """
+    with open(get_full_path(output), 'rb') as f:
+        data = f.read()
+
+    name, extension = os.path.splitext(output)
+    bundle = format('%s.%s%s' % (name, hashlib.md5(data).hexdigest()[:12], extension))
+
+    directory = os.path.dirname(get_full_path(output))
+    pattern = re.compile(re.escape(os.path.basename(name)) + r'\.[0-9a-f]{12}' + re.escape(extension) + r'(\.gz|\.br)?$')
+
+    for file_name in os.listdir(directory):
+        if pattern.match(file_name) and not file_name.startswith(os.path.basename(bundle)):
+            if args.verbose:
+                print('REMOVE: %s' % file_name)
+            os.remove(os.path.join(directory, file_name))
+
+    with open(get_full_path(bundle), 'wb') as f:
+        f.write(data)
+
+    write_compressed(get_full_path(bundle), data)
+
+    return bundle
+
+def update_manifest(bundles):
+    """Stores the paths of the bundles relative to the static directory. Used by the
+    static_bundle template tag.
+    """
+    manifest_path = get_full_path(makefile_data['manifest'])
+
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    for output, bundle in bundles.items():
+        key = os.path.relpath(get_full_path(output), get_full_path(makefile_data['static'])).replace(os.sep, '/')
+        manifest[key] = os.path.relpath(get_full_path(bundle), get_full_path(makefile_data['static'])).replace(os.sep, '/')
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+        f.write('\n')
+
 def get_intermediate_files(file_path):
     return [conversion[1] for conversion in get_conversion_chain(file_path)]
 
@@ -114,7 +185,7 @@ def handle(task):
         print(command)
     if not args.dryrun:
         if os.system(command) != 0:
-            sys.exit(1)
+            raise BuildError(command)
 
     # Remove intermediate files.
     for file_path in task['input']:
@@ -133,6 +204,133 @@ def handle(task):
                 except:
                     pass
 
-for task in makefile_data['tasks']:
-    handle(task)
-    print('')
+# Signatures of the tasks built previously. A task is rebuilt when its signature changes.
+cache_path = os.path.join(makefile_dir, '.make_cache.json')
+
+def load_cache():
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache):
+    with open(cache_path, 'w') as f:
+        json.dump(cache, f, indent=4, sort_keys=True)
+        f.write('\n')
+
+def get_signature(task):
+    """Hash of the contents of the input files and the commands used to build the task."""
+    signature = hashlib.md5(json.dumps([task, makefile_data['chains']], sort_keys=True).encode())
+
+    for file_path in task['input']:
+        with open(get_full_path(file_path), 'rb') as f:
+            signature.update(f.read())
+
+    return signature.hexdigest()
+
+def is_built(task, entry):
+    """Checks if the cache entry describes the current inputs and the output files still exist."""
+    if entry is None or entry['signature'] != get_signature(task):
+        return False
+
+    if not os.path.exists(get_full_path(task['output'])):
+        return False
+
+    return args.no_bundles or (entry.get('bundle') is not None and os.path.exists(get_full_path(entry['bundle'])))
+
+def build(task):
+    """Executed by the workers. Returns (task, bundle, error)."""
+    try:
+        handle(task)
+
+        bundle = None
+
+        if not args.dryrun and not args.no_bundles:
+            bundle = create_bundle(task['output'])
+            print(color('blue', ' #'), end='', flush=True)
+
+        print('')
+        return (task, bundle, None)
+
+    except (BuildError, OSError) as e:
+        return (task, None, format('%s' % e))
+
+def build_all(force):
+    """Builds the tasks which changed since the last build. Returns False if any of them failed."""
+    cache = load_cache()
+    tasks = [task for task in makefile_data['tasks'] if force or not is_built(task, cache.get(task['output']))]
+
+    # Computed before building so changes made in the meantime trigger another build.
+    signatures = dict([(task['output'], get_signature(task)) for task in tasks])
+
+    if args.verbose:
+        print('Tasks to build: %s' % len(tasks))
+
+    if not tasks:
+        return True
+
+    bundles = {}
+    failed = False
+
+    # Tasks write different output files so they can be built at the same time.
+    with Pool(max(1, min(args.jobs, len(tasks)))) as pool:
+        for task, bundle, error in pool.imap_unordered(build, tasks):
+            if error is not None:
+                failed = True
+                cache.pop(task['output'], None)
+                print(color('red', 'FAILED: %s %s' % (task['output'], error)))
+                continue
+
+            cache[task['output']] = {
+                'signature': signatures[task['output']],
+                'bundle': bundle,
+            }
+
+            if bundle is not None:
+                bundles[task['output']] = bundle
+
+    if bundles:
+        update_manifest(bundles)
+
+    if not args.dryrun:
+        save_cache(cache)
+
+    return not failed
+
+def get_modification_times():
+    times = {}
+
+    for task in makefile_data['tasks']:
+        for file_path in task['input']:
+            try:
+                times[file_path] = os.path.getmtime(get_full_path(file_path))
+            except OSError:
+                times[file_path] = None
+
+    return times
+
+def watch():
+    """Polls the modification times of the input files and rebuilds the changed tasks."""
+    build_all(args.force)
+    times = get_modification_times()
+
+    print('Watching for changes, press Ctrl+C to stop.')
+
+    try:
+        while True:
+            time.sleep(args.interval)
+            current_times = get_modification_times()
+
+            if current_times != times:
+                times = current_times
+                build_all(False)
+
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    if args.watch:
+        watch()
+    elif not build_all(args.force):
+        sys.exit(1)